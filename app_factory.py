@@ -0,0 +1,114 @@
+import os
+from flask import Flask, Blueprint, request, jsonify
+from flask_cors import CORS
+from channels import load_channels
+from credentials import reload_credentials
+from job_queue import get_job_queue
+from delivery_store import get_delivery_store
+from scheduler import get_scheduler, parse_send_at, CHANNELS
+
+core = Blueprint('core', __name__)
+
+
+@core.route('/api/schedule', methods=['POST'])
+def api_schedule():
+    try:
+        data = request.json
+        channel = data.get('channel')
+        if channel not in CHANNELS:
+            return jsonify({'error': f"channel must be one of: {', '.join(CHANNELS)}"}), 400
+        payload = {k: v for k, v in data.items() if k not in ('channel', 'send_at')}
+        message_id = get_scheduler().schedule(channel, payload, parse_send_at(data.get('send_at')))
+        return jsonify({'id': message_id, 'status_url': f'/api/scheduled/{message_id}'}), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@core.route('/api/scheduled/<message_id>', methods=['GET'])
+def api_scheduled_status(message_id):
+    entry = get_scheduler().get(message_id)
+    if entry is None:
+        return jsonify({'error': 'Scheduled message not found'}), 404
+    return jsonify(entry)
+
+
+@core.route('/api/scheduled/<message_id>', methods=['DELETE'])
+def api_scheduled_cancel(message_id):
+    if not get_scheduler().cancel(message_id):
+        return jsonify({'error': 'Scheduled message not found or already sent'}), 404
+    return jsonify({'id': message_id, 'status': 'cancelled'})
+
+
+@core.route('/api/history', methods=['GET'])
+def api_history():
+    try:
+        args = request.args
+        page = get_delivery_store().query(
+            recipient=args.get('to'),
+            channel=args.get('channel'),
+            status=args.get('status'),
+            since=args.get('since', type=float),
+            until=args.get('until', type=float),
+            cursor=args.get('cursor'),
+            limit=args.get('limit', 50, type=int)
+        )
+        return jsonify(page)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@core.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+
+@core.route('/api/reload_credentials', methods=['POST'])
+def api_reload_credentials():
+    # Reports which credential groups are set, never the values
+    return jsonify({'configured': reload_credentials().configured()})
+
+
+def create_app(channels=None):
+    """
+    Build the API: one blueprint per delivery channel plus the shared
+    scheduling, history and job routes.
+    Args:
+        channels (list): Channel names to enable (default: ENABLED_CHANNELS, else all)
+    Returns:
+        Flask
+    """
+    if channels is None and os.getenv('ENABLED_CHANNELS'):
+        channels = [name.strip() for name in os.getenv('ENABLED_CHANNELS').split(',') if name.strip()]
+    enabled = load_channels(channels)
+
+    app = Flask(__name__)
+    CORS(app)
+
+    # Provider calls run either inline or, when the request asks for async
+    # mode, on the job queue's worker pool. Provider credentials come from the
+    # shared bundle, and passwords in a request body (SSH, Instagram) are held
+    # in memory by the queue, so neither is written to jobs.db.
+    jobs = get_job_queue()
+    for channel in enabled:
+        app.register_blueprint(channel.blueprint)
+        for kind, handler in channel.jobs.items():
+            jobs.register(kind, handler)
+    app.register_blueprint(core)
+    # Drain anything left queued, and resume sends left pending, by a previous run
+    jobs.start()
+    get_scheduler().start()
+
+    endpoints = sorted({rule.rule for rule in app.url_map.iter_rules() if rule.rule.startswith('/api/')})
+
+    @app.route('/')
+    def home():
+        return jsonify({
+            'message': 'Menu Dashboard API is running!',
+            'endpoints': endpoints,
+            'services': {channel.name: channel.available for channel in enabled}
+        })
+
+    return app
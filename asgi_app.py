@@ -0,0 +1,239 @@
+"""
+ASGI entry point: `uvicorn asgi_app:app` (or gunicorn with uvicorn workers).
+
+The hot single-send routes are served natively on the event loop, using
+async providers: aiohttp for Twilio, aiosmtplib and asyncssh. One process
+can then hold thousands of provider calls in flight instead of one per
+worker thread. Everything else is the regular Flask app, mounted through
+asgiref's WSGI adapter. So are the send routes whenever a request needs a
+Flask-only feature: an Idempotency-Key header, async jobs, a batch body or
+attachments.
+"""
+import os
+import json
+import logging
+import importlib.util
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+from app import app as flask_app
+from channels import has_send_hooks
+from credentials import get_credentials
+from delivery_log import log_delivery
+from rate_limiter import throttle_async
+from resilience import SendResult, before_send, call_with_retry_async, get_breaker
+
+wsgi_app = WsgiToAsgi(flask_app)
+_flask_rules = {rule.rule for rule in flask_app.url_map.iter_rules()}
+
+
+async def _send_sms(data):
+    from twilio_client import get_async_twilio_client
+    account_sid, auth_token, twilio_number = get_credentials().twilio
+    to_number = data['to_number']
+    try:
+        await throttle_async('sms', twilio_number, to_number)
+        client = get_async_twilio_client(account_sid, auth_token)
+        message_obj = await call_with_retry_async(
+            lambda: client.messages.create_async(body=data['message'], from_=twilio_number, to=to_number),
+            breaker=get_breaker(('twilio', account_sid)), retry_if=before_send
+        )
+        log_delivery('sms', to_number, 'sent', sid=message_obj.sid)
+        return {'result': SendResult.success(f"✅ SMS sent successfully! SID: {message_obj.sid}", sid=message_obj.sid)}
+    except Exception as e:
+        logging.error(f"Twilio SMS error: {e}")
+        log_delivery('sms', to_number, 'failed', error=str(e))
+        return {'result': SendResult.failure(f"Error sending SMS: {e}", e)}
+
+
+async def _make_call(data):
+    from twilio_client import get_async_twilio_client
+    account_sid, auth_token, twilio_number = get_credentials().twilio
+    to_number = data['to_number']
+    try:
+        await throttle_async('call', twilio_number, to_number)
+        client = get_async_twilio_client(account_sid, auth_token)
+        call = await call_with_retry_async(lambda: client.calls.create_async(
+            to=to_number, from_=twilio_number, url="http://demo.twilio.com/docs/voice.xml"
+        ), breaker=get_breaker(('twilio', account_sid)), retry_if=before_send)
+        log_delivery('call', to_number, 'sent', sid=call.sid)
+        return {'result': SendResult.success(f"✅ Call initiated successfully! SID: {call.sid}", sid=call.sid)}
+    except Exception as e:
+        logging.error(f"Twilio call error: {e}")
+        log_delivery('call', to_number, 'failed', error=str(e))
+        return {'result': SendResult.failure(f"Error making call: {e}", e)}
+
+
+async def _send_whatsapp_twilio(data):
+    from twilio_client import get_async_twilio_client
+    account_sid, auth_token, twilio_number = get_credentials().twilio
+    to_number = data['to_number']
+    try:
+        await throttle_async('whatsapp', twilio_number, to_number)
+        client = get_async_twilio_client(account_sid, auth_token)
+        message_obj = await call_with_retry_async(lambda: client.messages.create_async(
+            body=data['message'], from_='whatsapp:' + twilio_number, to='whatsapp:' + to_number
+        ), breaker=get_breaker(('twilio', account_sid)), retry_if=before_send)
+        log_delivery('whatsapp', to_number, 'sent', provider='twilio', sid=message_obj.sid)
+        return {'result': SendResult.success(f'WhatsApp message sent via Twilio. SID: {message_obj.sid}', sid=message_obj.sid)}
+    except Exception as e:
+        logging.error(f"Twilio WhatsApp error: {e}")
+        log_delivery('whatsapp', to_number, 'failed', provider='twilio', error=str(e))
+        return {'result': SendResult.failure(f'Error sending WhatsApp message via Twilio: {str(e)}', e)}
+
+
+async def _send_gmail(data):
+    from gmail_utils import _build_message
+    from async_smtp_pool import get_async_smtp_pool
+    sender_email, sender_password = get_credentials().gmail
+    to_email = data['to_email']
+    recipients = to_email if isinstance(to_email, list) else [to_email]
+    try:
+        msg = _build_message(sender_email, to_email, data['subject'], data['message'], data.get('is_html', False))
+        await throttle_async('email', sender_email, recipients)
+        pool = get_async_smtp_pool()
+        serialized = msg.as_string()
+        await call_with_retry_async(
+            lambda: pool.sendmail(sender_email, sender_password, recipients, serialized),
+            breaker=get_breaker(('smtp', pool.host)), retry_if=before_send
+        )
+        for recipient in recipients:
+            log_delivery('email', recipient, 'sent', sender=sender_email)
+        return {'result': SendResult.success(f"✅ Email sent successfully to {', '.join(recipients)}")}
+    except Exception as e:
+        logging.error(f"Gmail error: {e}")
+        log_delivery('email', ', '.join(recipients), 'failed', sender=sender_email, error=str(e))
+        return {'result': SendResult.failure(f"Error sending email: {e}", e)}
+
+
+async def _remote_command(data):
+    from async_ssh_pool import get_async_ssh_pool
+    key_path = (data.get('key_path') or '').strip()
+    password = (data.get('password') or '').strip()
+    if not password:
+        if not key_path:
+            return {'output': '', 'error': "Error: Either password or key file must be provided"}
+        if not os.path.exists(key_path):
+            return {'output': '', 'error': f"Error: Key file not found at {key_path}"}
+    try:
+        pool = get_async_ssh_pool()
+        # Only connecting is retried; the command itself runs once
+        await call_with_retry_async(lambda: pool.get_connection(
+            data['ip'], data['username'], password=password or None, key_path=key_path or None
+        ), breaker=get_breaker(('ssh', data['ip'])))
+        out, err = await pool.run(
+            data['ip'], data['username'], data['command'], password=password or None, key_path=key_path or None
+        )
+        return {'output': out, 'error': err}
+    except Exception as e:
+        return {'output': '', 'error': f"Error: {str(e)}"}
+
+
+# Path -> (handler, credential group checked first, packages the handler needs)
+ROUTES = {
+    '/api/send_sms': (_send_sms, 'twilio', ('twilio', 'aiohttp')),
+    '/api/make_call': (_make_call, 'twilio', ('twilio', 'aiohttp')),
+    '/api/send_whatsapp_twilio': (_send_whatsapp_twilio, 'twilio', ('twilio', 'aiohttp')),
+    '/api/send_gmail': (_send_gmail, 'gmail', ('aiosmtplib',)),
+    '/api/remote_command': (_remote_command, None, ('asyncssh',)),
+}
+# Only routes the Flask app serves too (respects ENABLED_CHANNELS) and whose
+# async dependencies are installed
+NATIVE_ROUTES = {
+    path: (handler, credentials) for path, (handler, credentials, requires) in ROUTES.items()
+    if path in _flask_rules and all(importlib.util.find_spec(name) for name in requires)
+}
+FLASK_ONLY_FIELDS = ('async', 'batch', 'attachments')
+
+
+def _wants_native(scope):
+    if scope['type'] != 'http' or scope['method'] != 'POST' or scope['path'] not in NATIVE_ROUTES:
+        return False
+    if b'async=' in scope.get('query_string', b'') or has_send_hooks():
+        return False
+    if os.getenv('ASYNC_JOBS', '0').lower() in ('1', 'true', 'yes'):
+        return False
+    return not any(name == b'idempotency-key' for name, _ in scope['headers'])
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+def _replay(body, receive):
+    # Hand an already-read body on to the WSGI adapter
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        return await receive()
+    return replay
+
+
+async def _json_response(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({'type': 'http.response.start', 'status': status, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+        (b'access-control-allow-origin', b'*'),
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _serve_flask(scope, receive, send):
+    # Give each request its own thread; without a context asgiref runs every
+    # sync call on one shared thread, serializing the whole Flask app
+    async with ThreadSensitiveContext():
+        await wsgi_app(scope, receive, send)
+
+
+async def _shutdown():
+    from twilio_client import close_async_twilio_clients
+    await close_async_twilio_clients()
+    if importlib.util.find_spec('aiosmtplib'):
+        from async_smtp_pool import get_async_smtp_pool
+        await get_async_smtp_pool().close_all()
+    if importlib.util.find_spec('asyncssh'):
+        from async_ssh_pool import get_async_ssh_pool
+        await get_async_ssh_pool().close_all()
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await _shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if not _wants_native(scope):
+        return await _serve_flask(scope, receive, send)
+
+    body = await _read_body(receive)
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError as e:
+        return await _json_response(send, 400, {'error': str(e)})
+    if not isinstance(data, dict) or any(field in data for field in FLASK_ONLY_FIELDS):
+        return await _serve_flask(scope, _replay(body, receive), send)
+
+    handler, credentials = NATIVE_ROUTES[scope['path']]
+    if credentials:
+        error = get_credentials().missing(credentials)
+        if error:
+            return await _json_response(send, 400, {'error': error})
+    try:
+        result = await handler(data)
+    except Exception as e:
+        return await _json_response(send, 400, {'error': str(e)})
+    await _json_response(send, 200, result)
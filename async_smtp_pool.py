@@ -0,0 +1,145 @@
+import os
+import time
+import hashlib
+import asyncio
+import aiosmtplib
+from smtp_pool import DeliveryUnknown
+
+
+class _SMTP(aiosmtplib.SMTP):
+    """
+    aiosmtplib.SMTP that notes when the current message's DATA command was sent.
+    """
+
+    data_started = False
+
+    async def data(self, *args, **kwargs):
+        self.data_started = True
+        return await super().data(*args, **kwargs)
+
+
+class AsyncSMTPConnectionPool:
+    """
+    asyncio counterpart of SMTPConnectionPool, built on aiosmtplib: logged-in
+    connections keyed by sender account, recycled after a number of messages
+    and checked with NOOP after idling. Waiting for a free connection
+    suspends the coroutine instead of holding a thread.
+    Args:
+        host (str): SMTP server host
+        port (int): SMTP server port
+        use_tls (bool): Whether to run STARTTLS after connecting
+        max_connections (int): Maximum open connections per sender account
+        max_messages_per_connection (int): Recycle a connection after this many sends
+        noop_interval (float): Seconds of idleness after which a NOOP keep-alive check is run
+        idle_timeout (float): Seconds of idleness after which a connection is dropped
+        timeout (float): Socket timeout in seconds
+    """
+
+    def __init__(self, host='smtp.gmail.com', port=587, use_tls=True, max_connections=4,
+                 max_messages_per_connection=100, noop_interval=30, idle_timeout=300, timeout=30):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.max_connections = max_connections
+        self.max_messages_per_connection = max_messages_per_connection
+        self.noop_interval = noop_interval
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = {}
+        self._slots = {}
+
+    async def _connect(self, sender_email, sender_password):
+        smtp = _SMTP(hostname=self.host, port=self.port, timeout=self.timeout, start_tls=False)
+        await smtp.connect()
+        if self.use_tls:
+            await smtp.starttls()
+        if smtp.supports_extension('auth'):
+            await smtp.login(sender_email, sender_password)
+        return smtp
+
+    async def _close(self, smtp):
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            smtp.close()
+
+    def _key(self, sender_email, sender_password):
+        # Hash the password so it isn't kept in the key in clear text
+        return (sender_email, hashlib.sha256(sender_password.encode()).hexdigest())
+
+    async def _checkout(self, key, sender_email, sender_password):
+        idle = self._idle.setdefault(key, [])
+        while idle:
+            smtp, last_used, sent = idle.pop()
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.idle_timeout or not smtp.is_connected:
+                await self._close(smtp)
+                continue
+            if idle_for > self.noop_interval:
+                try:
+                    await smtp.noop()
+                except (aiosmtplib.SMTPException, OSError):
+                    await self._close(smtp)
+                    continue
+            return smtp, sent
+        return await self._connect(sender_email, sender_password), 0
+
+    async def sendmail(self, sender_email, sender_password, recipients, msg):
+        """
+        Send a serialized message over a pooled connection, reconnecting once
+        if the server had dropped it before the message went out.
+        Raises:
+            DeliveryUnknown: If the connection dropped once the message was being sent
+        """
+        key = self._key(sender_email, sender_password)
+        slots = self._slots.setdefault(key, asyncio.Semaphore(self.max_connections))
+        async with slots:
+            for attempt in (1, 2):
+                smtp, sent = await self._checkout(key, sender_email, sender_password)
+                smtp.data_started = False
+                try:
+                    result = await smtp.sendmail(sender_email, recipients, msg)
+                except aiosmtplib.SMTPServerDisconnected as e:
+                    smtp.close()
+                    if smtp.data_started:
+                        raise DeliveryUnknown(
+                            f"Connection lost while sending the message, it may have been delivered: {e}"
+                        ) from e
+                    if attempt == 2:
+                        raise
+                    continue
+                except Exception:
+                    await self._close(smtp)
+                    raise
+                if sent + 1 >= self.max_messages_per_connection:
+                    await self._close(smtp)
+                else:
+                    self._idle[key].append((smtp, time.monotonic(), sent + 1))
+                return result
+
+    async def close_all(self):
+        for idle in self._idle.values():
+            for smtp, _, _ in idle:
+                await self._close(smtp)
+        self._idle.clear()
+
+
+_default_pool = None
+
+
+def get_async_smtp_pool():
+    """
+    Return the process-wide async SMTP pool, configured like get_smtp_pool().
+    """
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = AsyncSMTPConnectionPool(
+            host=os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+            port=int(os.getenv('SMTP_PORT', 587)),
+            use_tls=os.getenv('SMTP_USE_TLS', '1').lower() not in ('0', 'false', 'no'),
+            max_connections=int(os.getenv('SMTP_POOL_SIZE', 4)),
+            max_messages_per_connection=int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', 100)),
+            noop_interval=float(os.getenv('SMTP_NOOP_INTERVAL', 30)),
+            idle_timeout=float(os.getenv('SMTP_IDLE_TIMEOUT', 300)),
+        )
+    return _default_pool
@@ -0,0 +1,118 @@
+import os
+import time
+import asyncio
+import hashlib
+import asyncssh
+
+
+class AsyncSSHConnectionPool:
+    """
+    asyncio counterpart of SSHConnectionPool, built on asyncssh: one
+    authenticated connection per (ip, username, auth method), with each
+    command run on a new channel of it. A connection with a command still
+    running on it is never reaped.
+    Args:
+        idle_timeout (float): Seconds a connection may sit unused before it is closed
+        keepalive (int): Keepalive interval in seconds (0 disables)
+        connect_timeout (float): Timeout for establishing new connections
+    """
+
+    def __init__(self, idle_timeout=300, keepalive=30, connect_timeout=10):
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        # key -> [conn, last_used, commands running]
+        self._conns = {}
+        self._key_locks = {}
+
+    def _key(self, ip, username, password, key_path):
+        if password:
+            # Hash the password so it isn't kept in the key in clear text
+            auth = ('password', hashlib.sha256(password.encode()).hexdigest())
+        else:
+            auth = ('key', os.path.abspath(key_path))
+        return (ip, username, auth)
+
+    async def _connect(self, ip, username, password, key_path):
+        options = {
+            'username': username,
+            # Same trust-on-first-use behaviour as the paramiko AutoAddPolicy path
+            'known_hosts': None,
+            'connect_timeout': self.connect_timeout,
+            'keepalive_interval': self.keepalive,
+        }
+        if password:
+            options['password'] = password
+        else:
+            options['client_keys'] = [key_path]
+            options['passphrase'] = os.getenv('SSH_KEY_PASSPHRASE') or None
+        return await asyncssh.connect(ip, **options)
+
+    def _reap_idle(self):
+        now = time.monotonic()
+        for key, (conn, last_used, running) in list(self._conns.items()):
+            if not running and now - last_used > self.idle_timeout:
+                del self._conns[key]
+                conn.close()
+
+    async def get_connection(self, ip, username, password=None, key_path=None):
+        self._reap_idle()
+        key = self._key(ip, username, password, key_path)
+        # Serialize connects per key so concurrent callers share one handshake
+        async with self._key_locks.setdefault(key, asyncio.Lock()):
+            entry = self._conns.get(key)
+            if entry is None or entry[0].is_closed():
+                entry = [await self._connect(ip, username, password, key_path), time.monotonic(), 0]
+                self._conns[key] = entry
+            entry[1] = time.monotonic()
+            return entry[0]
+
+    def discard(self, ip, username, password=None, key_path=None):
+        entry = self._conns.pop(self._key(ip, username, password, key_path), None)
+        if entry:
+            entry[0].close()
+
+    async def run(self, ip, username, command, password=None, key_path=None):
+        """
+        Run `command` once and return (stdout, stderr). A closed pooled
+        connection is replaced before the command starts; if the connection
+        drops while it runs, the command is not re-run, since it may already
+        have taken effect.
+        """
+        key = self._key(ip, username, password, key_path)
+        conn = await self.get_connection(ip, username, password, key_path)
+        entry = self._conns[key]
+        entry[2] += 1
+        try:
+            result = await conn.run(command, check=False)
+            return result.stdout or '', result.stderr or ''
+        except (asyncssh.ConnectionLost, asyncssh.DisconnectError, BrokenPipeError):
+            self.discard(ip, username, password, key_path)
+            raise
+        finally:
+            # Idle time counts from when the last command finished
+            entry[1] = time.monotonic()
+            entry[2] -= 1
+
+    async def close_all(self):
+        for conn, _, _ in self._conns.values():
+            conn.close()
+            await conn.wait_closed()
+        self._conns.clear()
+
+
+_default_pool = None
+
+
+def get_async_ssh_pool():
+    """
+    Return the process-wide async SSH pool, configured like get_ssh_pool().
+    """
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = AsyncSSHConnectionPool(
+            idle_timeout=float(os.getenv('SSH_IDLE_TIMEOUT', 300)),
+            keepalive=int(os.getenv('SSH_KEEPALIVE', 30)),
+            connect_timeout=float(os.getenv('SSH_CONNECT_TIMEOUT', 10)),
+        )
+    return _default_pool
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+
+def clamp_workers(requested, cap):
+    """
+    Thread count for a client-supplied `workers` value: the server-side `cap`
+    when none was given, and never more than it.
+    Raises:
+        ValueError: If `requested` is not a positive integer
+    """
+    if requested is None:
+        return cap
+    if isinstance(requested, str) and requested.strip().isdigit():
+        requested = int(requested)
+    if isinstance(requested, bool) or not isinstance(requested, int) or requested < 1:
+        raise ValueError("workers must be a positive integer")
+    return min(requested, cap)
+
+
+def run_bounded(func, items, max_workers):
+    """
+    Call `func(item)` for every item on a thread pool of `max_workers`,
+    with at most twice that many calls submitted at once, so a long
+    (or lazily produced) `items` is never queued in full.
+    Yields:
+        Each call's return value, in completion order
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for item in items:
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(func, item))
+        for future in as_completed(pending):
+            yield future.result()
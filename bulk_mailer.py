@@ -0,0 +1,142 @@
+import os
+import queue
+import logging
+import smtplib
+import threading
+from contextlib import ExitStack
+from smtp_pool import get_smtp_pool
+from rate_limiter import get_rate_limiter, RateLimitExceeded
+from resilience import before_send, call_with_retry, get_breaker
+from delivery_log import log_delivery
+
+_DONE = object()
+
+
+class BulkMailer:
+    """
+    Deliver many messages for one sender account over a fixed number of
+    pooled SMTP connections.
+
+    Each worker thread keeps its connection checked out and sends its share
+    of the messages back to back on it, so the connect/STARTTLS/login cost is
+    paid once per worker rather than once per recipient.
+    Args:
+        sender_email (str): Gmail address
+        sender_password (str): Gmail app password
+        workers (int): Number of concurrent SMTP connections; one of the account's
+            pooled connections is always left for single sends
+        pool (SMTPConnectionPool): Pool to borrow connections from
+        limiter (RateLimiter): Paces sends per account and recipient domain
+    """
+
+    def __init__(self, sender_email, sender_password, workers=None, pool=None, limiter=None):
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.pool = pool or get_smtp_pool()
+        if workers is None:
+            workers = int(os.getenv('BULK_EMAIL_WORKERS', 4))
+        # Workers hold their connection for the whole run, so taking every
+        # slot would block the account's single sends until the run ends
+        self.workers = max(1, min(workers, self.pool.max_connections - 1))
+        self.limiter = limiter or get_rate_limiter()
+        self.breaker = get_breaker(('smtp', self.pool.host))
+
+    def _send_one(self, conn, recipient, msg):
+        if not self.limiter.acquire('email', self.sender_email, recipient):
+            raise RateLimitExceeded(f"Rate limit for {self.sender_email} exceeded, try again later")
+        # 4xx replies are retried here on the same connection; a dropped
+        # connection is left to _worker, which moves on to a fresh one
+        call_with_retry(
+            lambda: conn.sendmail(self.sender_email, [recipient], msg),
+            breaker=self.breaker, retry_if=lambda e: not conn.broken and before_send(e)
+        )
+
+    def _connect(self):
+        # Returns (stack, conn); closing the stack hands the connection back
+        stack = ExitStack()
+        conn = stack.enter_context(self.pool.connection(self.sender_email, self.sender_password))
+        return stack, conn
+
+    def _worker(self, jobs, on_result):
+        item = jobs.get()
+        retried = False
+        while item is not _DONE:
+            try:
+                # Connect/login goes through the breaker too, so an unreachable
+                # server opens the circuit instead of every queued recipient
+                # waiting out its own connect timeout
+                stack, conn = call_with_retry(self._connect, breaker=self.breaker)
+            except Exception as e:
+                # Could not open a connection at all: fail the current item and move on
+                index, recipient, _ = item
+                logging.error(f"Failed to send to {recipient}: {e}")
+                on_result(index, {'recipient': recipient, 'status': 'failed', 'error': str(e)})
+                item = jobs.get()
+                retried = False
+                continue
+            with stack:
+                while item is not _DONE and not conn.broken:
+                    index, recipient, msg = item
+                    try:
+                        self._send_one(conn, recipient, msg)
+                        on_result(index, {'recipient': recipient, 'status': 'sent', 'error': None})
+                    except smtplib.SMTPServerDisconnected as e:
+                        if not retried:
+                            # Connection dropped: retry this item once on a fresh one
+                            retried = True
+                            break
+                        logging.error(f"Failed to send to {recipient}: {e}")
+                        on_result(index, {'recipient': recipient, 'status': 'failed', 'error': str(e)})
+                    except Exception as e:
+                        logging.error(f"Failed to send to {recipient}: {e}")
+                        on_result(index, {'recipient': recipient, 'status': 'failed', 'error': str(e)})
+                    item = jobs.get()
+                    retried = False
+
+    def send(self, messages, on_result=None):
+        """
+        Send every (recipient, message) pair from `messages`.
+        Args:
+            messages (iterable): (recipient, serialized message) pairs, consumed lazily;
+                an exception in place of the message fails that recipient
+            on_result (callable): Called as on_result(index, result) for each recipient.
+                When omitted, results are collected and returned in input order.
+        Returns:
+            dict: {'sent': int, 'failed': int, 'results': list}
+        """
+        collected = {}
+        counts = {'sent': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def record(index, result):
+            log_delivery('email', result['recipient'], result['status'], sender=self.sender_email, error=result['error'])
+            with lock:
+                counts[result['status']] += 1
+                if on_result is None:
+                    collected[index] = result
+            if on_result is not None:
+                on_result(index, result)
+
+        jobs = queue.Queue(maxsize=self.workers * 16)
+        threads = [threading.Thread(target=self._worker, args=(jobs, record), daemon=True)
+                   for _ in range(self.workers)]
+        for t in threads:
+            t.start()
+        try:
+            for index, (recipient, msg) in enumerate(messages):
+                if isinstance(msg, Exception):
+                    # Message could not be built for this recipient
+                    record(index, {'recipient': recipient, 'status': 'failed', 'error': str(msg)})
+                    continue
+                jobs.put((index, recipient, msg))
+        finally:
+            for _ in threads:
+                jobs.put(_DONE)
+            for t in threads:
+                t.join()
+
+        return {
+            'sent': counts['sent'],
+            'failed': counts['failed'],
+            'results': [collected[i] for i in sorted(collected)],
+        }
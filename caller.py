@@ -4,7 +4,7 @@ Call using Twilio or system's default calling app.
 
 import os
 from dotenv import load_dotenv
-from twilio.rest import Client
+from twilio_client import get_twilio_client
 import webbrowser
 
 load_dotenv()
@@ -12,13 +12,13 @@ load_dotenv()
 def call_using_twilio(to_number: str) -> str:
     try:
         account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-from_number = os.getenv("TWILIO_PHONE_NUMBER")
+        auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        from_number = os.getenv("TWILIO_PHONE_NUMBER")
 
         if not all([account_sid, auth_token, from_number]):
             return "Twilio credentials missing."
 
-        client = Client(account_sid, auth_token)
+        client = get_twilio_client(account_sid, auth_token)
         call = client.calls.create(
             to=to_number,
             from_=from_number,
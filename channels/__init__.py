@@ -0,0 +1,187 @@
+import os
+import json
+import importlib
+from functools import wraps
+from flask import Blueprint, Response, request, jsonify
+from werkzeug.exceptions import HTTPException
+from services import get_service
+from batching import clamp_workers, run_bounded
+from credentials import get_credentials
+from idempotency import idempotent as idempotent_route
+from job_queue import get_job_queue, dispatch, wants_async
+
+# Channel modules in this package, in the order their routes are registered
+BUILTIN_CHANNELS = ('sms', 'call', 'whatsapp', 'gmail', 'ssh', 'instagram')
+
+CHANNEL_REGISTRY = {}
+_send_hooks = []
+
+
+def register_channel(channel):
+    CHANNEL_REGISTRY[channel.name] = channel
+    return channel
+
+
+def load_channels(names=None):
+    """
+    Import the built-in channel modules (each registers itself) and return
+    the requested channels, all of them by default.
+    """
+    for name in BUILTIN_CHANNELS:
+        importlib.import_module(f'channels.{name}')
+    names = names or list(CHANNEL_REGISTRY)
+    return [CHANNEL_REGISTRY[name] for name in names]
+
+
+def add_send_hook(hook):
+    """
+    Call `hook(channel, kind, data)` before every send on every channel. A
+    hook may return a response to reject the request.
+    """
+    _send_hooks.append(hook)
+
+
+def has_send_hooks():
+    return bool(_send_hooks)
+
+
+def ndjson_response(results):
+    """
+    Stream an iterable of dicts as newline-delimited JSON.
+    """
+    return Response((json.dumps(r) + '\n' for r in results), mimetype='application/x-ndjson')
+
+
+def run_batch(handler, items, max_workers=None):
+    """
+    Run `handler` over many request payloads on a bounded thread pool.
+    Args:
+        max_workers: Client-requested thread count, capped at BATCH_WORKERS (the default)
+    Returns:
+        iterator: handler's result plus 'index' (or 'index' and 'error'), in completion order
+    Raises:
+        ValueError: If max_workers is not a positive integer
+    """
+    max_workers = clamp_workers(max_workers, int(os.getenv('BATCH_WORKERS', 8)))
+
+    def run(indexed):
+        index, item = indexed
+        try:
+            return {'index': index, **handler(item)}
+        except Exception as e:
+            return {'index': index, 'error': str(e)}
+
+    return run_bounded(run, enumerate(items), max_workers)
+
+
+class Channel:
+    """
+    One delivery channel: a blueprint of routes backed by a lazily imported
+    provider service, plus the job handlers those routes dispatch to.
+
+    Every route gets the same treatment: 503 if the provider isn't
+    installed, 400 if a required credential group is unset, 400 with the
+    error message on any exception (HTTP errors such as 413 keep their status). Send routes additionally get
+    idempotency keys, async mode through the job queue, the shared send
+    hooks and batch mode (a `batch` list in the body).
+    Args:
+        name (str): Channel name, also the blueprint name
+        service (str): services.py entry implementing the channel
+        credentials (str): Default credential group its routes require
+        title (str): Name used in error messages
+    """
+
+    def __init__(self, name, service=None, credentials=None, title=None):
+        self.name = name
+        self.title = title or name.capitalize()
+        self.service = get_service(service) if service else None
+        self.credentials = credentials
+        self.blueprint = Blueprint(name, __name__)
+        self.jobs = {}
+
+    @property
+    def available(self):
+        return self.service is None or self.service.available
+
+    def route(self, rule, methods=('POST',), credentials=None, idempotent=False):
+        """
+        Register a custom view on this channel with the shared checks.
+        """
+        credentials = credentials or self.credentials
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.available:
+                    return jsonify({'error': f'{self.title} service not available'}), 503
+                if credentials:
+                    error = get_credentials().missing(credentials)
+                    if error:
+                        return jsonify({'error': error}), 400
+                try:
+                    return view(*args, **kwargs)
+                except HTTPException as e:
+                    # Keep werkzeug's status, e.g. 413 for an over-size upload
+                    return jsonify({'error': e.description}), e.code
+                except Exception as e:
+                    return jsonify({'error': str(e)}), 400
+
+            endpoint = wrapper
+            if idempotent:
+                endpoint = idempotent_route(wrapper)
+            self.blueprint.add_url_rule(rule, view.__name__, endpoint, methods=list(methods))
+            return view
+        return decorator
+
+    def send(self, rule, kind, credentials=None, validate=None, idempotent=True):
+        """
+        Register `handler(data) -> dict` as job `kind` and expose it at `rule`.
+        The request body is passed to the handler inline, queued for async
+        requests, or fanned out item by item when it carries a `batch` list.
+        Args:
+            validate: Optional function(data) returning an error message or None
+        """
+        def decorator(handler):
+            self.jobs[kind] = handler
+
+            def view():
+                data = request.json
+                if isinstance(data.get('batch'), list):
+                    return self._send_batch(kind, handler, data, validate)
+                error = validate(data) if validate else None
+                if error:
+                    return jsonify({'error': error}), 400
+                for hook in _send_hooks:
+                    response = hook(self, kind, data)
+                    if response is not None:
+                        return response
+                return dispatch(kind, handler, data)
+
+            view.__name__ = kind
+            self.route(rule, credentials=credentials, idempotent=idempotent)(view)
+            return handler
+        return decorator
+
+    def _send_batch(self, kind, handler, data, validate):
+        # Top-level fields are shared by every item, e.g. one message to many numbers
+        common = {k: v for k, v in data.items() if k not in ('batch', 'async', 'workers')}
+        items = [{**common, **item} for item in data['batch']]
+        if len(items) > int(os.getenv('BATCH_MAX', 1000)):
+            return jsonify({'error': 'Too many items in one batch'}), 400
+        for index, item in enumerate(items):
+            error = validate(item) if validate else None
+            if error:
+                return jsonify({'error': f'batch[{index}]: {error}'}), 400
+            for hook in _send_hooks:
+                response = hook(self, kind, item)
+                if response is not None:
+                    return response
+
+        if wants_async(data):
+            queue = get_job_queue()
+            job_ids = [queue.enqueue(kind, item) for item in items]
+            return jsonify({
+                'status': 'queued',
+                'jobs': [{'job_id': job_id, 'status_url': f'/api/jobs/{job_id}'} for job_id in job_ids]
+            }), 202
+        return ndjson_response(run_batch(handler, items, data.get('workers')))
@@ -0,0 +1,11 @@
+from credentials import get_credentials
+from channels import Channel, register_channel
+
+channel = register_channel(Channel('call', service='sms', credentials='twilio'))
+calls = channel.service
+
+
+@channel.send('/api/make_call', 'make_call')
+def make_call(data):
+    result = calls.make_call_twilio(*get_credentials().twilio, data['to_number'])
+    return {'result': result}
@@ -0,0 +1,132 @@
+import csv
+import json
+from flask import request, jsonify
+from credentials import get_credentials
+from channels import Channel, register_channel
+
+channel = register_channel(Channel('gmail', service='gmail', credentials='gmail'))
+gmail = channel.service
+
+
+def _bulk_result(result):
+    return {
+        'result': result['message'],
+        'sent': result['sent'],
+        'failed': result['failed'],
+        'results': result['results']
+    }
+
+
+@channel.send('/api/send_gmail', 'send_gmail')
+def send_gmail(data):
+    result = gmail.send_gmail(
+        *get_credentials().gmail, data['to_email'], data['subject'], data['message'],
+        data.get('is_html', False), data.get('attachments', None)
+    )
+    return {'result': result}
+
+
+@channel.send('/api/send_gmail_html', 'send_gmail_html')
+def send_gmail_html(data):
+    result = gmail.send_gmail_html(
+        *get_credentials().gmail, data['to_email'], data['subject'], data['html_content'],
+        data.get('attachments', None)
+    )
+    return {'result': result}
+
+
+@channel.send('/api/send_gmail_bulk', 'send_gmail_bulk')
+def send_gmail_bulk(data):
+    result = gmail.send_gmail_bulk(
+        *get_credentials().gmail, data['recipients_list'], data['subject'], data['message'],
+        data.get('is_html', False), data.get('workers')
+    )
+    return _bulk_result(result)
+
+
+@channel.send('/api/send_gmail_template', 'send_gmail_template')
+def send_gmail_template(data):
+    result = gmail.send_gmail_template(
+        *get_credentials().gmail, data['to_email'], data['template_name'], data['template_data'],
+        data.get('attachments', None)
+    )
+    return {'result': result}
+
+
+@channel.send('/api/send_gmail_newsletter', 'send_gmail_newsletter')
+def send_gmail_newsletter(data):
+    result = gmail.send_gmail_newsletter(
+        *get_credentials().gmail, data['subscribers_list'], data['newsletter_title'],
+        data['newsletter_content'], data.get('attachments', None), data.get('workers')
+    )
+    return _bulk_result(result)
+
+
+def _valid_utf8(values):
+    try:
+        '\0'.join(v for v in values if isinstance(v, str)).encode('utf-8')
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def _iter_merge_rows(stream, content_type):
+    """
+    Lazily parse a streamed CSV (header row + one row per recipient) or
+    NDJSON (one JSON object per line) upload into template data dicts. A
+    row that can't be used is yielded as a ValueError naming its line, so
+    only that recipient fails and the rest of the upload is still sent.
+    """
+    # surrogateescape keeps one bad byte from ending the stream; the row
+    # holding it is rejected below
+    lines = (line.decode('utf-8', 'surrogateescape') for line in stream)
+    if 'csv' in content_type:
+        reader = csv.DictReader(lines)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield ValueError(f"line {reader.line_num}: invalid CSV ({e})")
+                continue
+            if not _valid_utf8(row.values()):
+                yield ValueError(f"line {reader.line_num}: not valid UTF-8")
+                continue
+            yield row
+        return
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if not _valid_utf8([line]):
+            yield ValueError(f"line {number}: not valid UTF-8")
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"line {number}: invalid JSON ({e})")
+            continue
+        if not isinstance(row, dict):
+            yield ValueError(f"line {number}: each line must be a JSON object")
+            continue
+        yield row
+
+
+@channel.route('/api/send_gmail_merge', idempotent=True)
+def send_gmail_merge():
+    # The request body is the recipient list itself (text/csv or
+    # application/x-ndjson); it is read incrementally, never buffered whole
+    template_name = request.args.get('template_name')
+    if not template_name:
+        return jsonify({'error': 'template_name query parameter is required'}), 400
+    workers = request.args.get('workers', type=int)
+
+    rows = _iter_merge_rows(request.stream, request.content_type or '')
+    result = gmail.send_gmail_merge(*get_credentials().gmail, rows, template_name, workers)
+    return jsonify({
+        'result': result['message'],
+        'sent': result['sent'],
+        'failed': result['failed'],
+        'failures': result['failures']
+    })
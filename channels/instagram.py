@@ -0,0 +1,65 @@
+import os
+from flask import request, jsonify
+from uploads import save_upload
+from batching import clamp_workers
+from job_queue import dispatch
+from channels import Channel, register_channel
+
+channel = register_channel(Channel('instagram', service='instagram'))
+instagram = channel.service
+
+
+def _check_login(data):
+    # Instagram credentials come with the request, not from the environment
+    if not all([data.get('username'), data.get('password')]):
+        return 'Instagram username and password are required'
+
+
+def _check_batch(data):
+    posts = data.get('posts')
+    if not posts or not isinstance(posts, list):
+        return 'posts must be a non-empty list of {image_path, caption}'
+    limit = int(os.getenv('INSTAGRAM_BATCH_MAX', 20))
+    if len(posts) > limit:
+        return f'Too many posts (max {limit} per request)'
+    try:
+        clamp_workers(data.get('workers'), 1)
+    except ValueError as e:
+        return str(e)
+    return _check_login(data)
+
+
+@channel.send('/api/post_instagram', 'post_instagram', validate=_check_login, idempotent=False)
+def post_instagram(data):
+    result = instagram.post_instagram_photo(
+        data.get('username'), data.get('password'), data['image_path'], data['caption'], data.get('source_hash')
+    )
+    return {'result': result}
+
+
+@channel.send('/api/post_instagram_batch', 'post_instagram_batch', validate=_check_batch, idempotent=False)
+def post_instagram_batch(data):
+    results = instagram.post_instagram_photos(
+        data.get('username'), data.get('password'), data['posts'], data.get('workers')
+    )
+    posted = sum(1 for r in results if r['result'].ok)
+    return {'result': f"Posted {posted} of {len(results)} images", 'results': results}
+
+
+@channel.route('/api/upload_instagram')
+def upload_instagram():
+    # multipart/form-data: 'image' file plus username, password, caption fields.
+    # The image is streamed to disk and hashed without being held in memory.
+    form, image_path, digest = save_upload(request.environ, field='image')
+    error = _check_login(form)
+    if error:
+        return jsonify({'error': error}), 400
+
+    data = {
+        'username': form['username'],
+        'password': form['password'],
+        'caption': form.get('caption', ''),
+        'image_path': image_path,
+        'source_hash': digest,
+    }
+    return dispatch('post_instagram', post_instagram, data)
@@ -0,0 +1,29 @@
+import os
+from flask import request, jsonify
+from credentials import get_credentials
+from channels import Channel, register_channel, ndjson_response
+
+channel = register_channel(Channel('sms', service='sms', credentials='twilio', title='SMS'))
+sms = channel.service
+
+
+@channel.send('/api/send_sms', 'send_sms')
+def send_sms(data):
+    result = sms.send_sms_twilio(*get_credentials().twilio, data['to_number'], data['message'])
+    return {'result': result}
+
+
+@channel.route('/api/send_sms_batch', idempotent=True)
+def send_sms_batch():
+    data = request.json
+    # Either {"messages": [{"to_number", "message"}, ...]} or {"recipients": [...], "message": "..."}
+    if 'messages' in data:
+        messages = [(m['to_number'], m['message']) for m in data['messages']]
+    else:
+        messages = [(to_number, data['message']) for to_number in data['recipients']]
+    if len(messages) > int(os.getenv('SMS_BATCH_MAX', 10000)):
+        return jsonify({'error': 'Too many recipients in one batch'}), 400
+
+    # Paced per sending number, so this stays a dedicated route rather than generic batch mode
+    results = sms.send_sms_batch(*get_credentials().twilio, messages, data.get('workers'))
+    return ndjson_response(results)
@@ -0,0 +1,50 @@
+import os
+import json
+from flask import Response, request
+from channels import Channel, register_channel
+
+channel = register_channel(Channel('ssh', service='ssh', title='SSH'))
+ssh = channel.service
+
+
+@channel.send('/api/remote_command', 'remote_command', idempotent=False)
+def remote_command(data):
+    out, err = ssh.run_command_on_linux(
+        data['ip'], data['username'], data['key_path'], data['password'], data['command']
+    )
+    return {'output': out, 'error': err}
+
+
+@channel.send('/api/remote_commands', 'remote_commands', idempotent=False)
+def remote_commands(data):
+    results = ssh.run_multiple_commands_on_linux(
+        data['ip'], data['username'], data['key_path'], data['password'], data['commands']
+    )
+    return {'results': results}
+
+
+def _check_hosts(data):
+    if not isinstance(data.get('hosts'), list) or not data['hosts']:
+        return 'hosts must be a non-empty list of {ip, username, password or key_path}'
+    if len(data['hosts']) > int(os.getenv('SSH_MAX_HOSTS', 200)):
+        return 'Too many hosts in one request'
+
+
+@channel.send('/api/remote_commands_multi', 'remote_commands_multi', validate=_check_hosts, idempotent=False)
+def remote_commands_multi(data):
+    results = ssh.run_commands_on_hosts(data['hosts'], data['commands'], data.get('max_workers'))
+    return {'hosts': results}
+
+
+@channel.route('/api/remote_command_stream')
+def remote_command_stream():
+    data = request.json
+    events = ssh.stream_command_on_linux(
+        data['ip'], data['username'], data['key_path'], data['password'], data['command']
+    )
+    # Server-sent events: one event per output chunk, then an 'exit' event
+    body = (f"event: {kind}\ndata: {json.dumps(payload)}\n\n" for kind, payload in events)
+    return Response(body, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -0,0 +1,44 @@
+from credentials import get_credentials
+from scheduler import parse_send_at
+from channels import Channel, register_channel
+
+channel = register_channel(Channel('whatsapp', service='whatsapp', title='WhatsApp'))
+whatsapp = channel.service
+
+
+def _check_transport(data):
+    # Sends are queued, so a transport without its credentials has to be
+    # reported now rather than when the send fails on the worker
+    try:
+        transport = whatsapp.get_transport(data.get('transport'))
+    except ValueError as e:
+        return str(e)
+    if transport.credentials:
+        return get_credentials().missing(transport.credentials)
+
+
+def _queued(message_id):
+    return {'result': 'WhatsApp message queued for delivery', 'id': message_id, 'status_url': f'/api/scheduled/{message_id}'}
+
+
+@channel.send('/api/send_whatsapp_instant', 'send_whatsapp_instant', validate=_check_transport)
+def send_whatsapp_instant(data):
+    # Delivered by a background worker; the request never waits on the browser
+    message_id = whatsapp.schedule_whatsapp(
+        data['to_number'], data['message'], parse_send_at(data.get('send_at')), data.get('transport')
+    )
+    return _queued(message_id)
+
+
+@channel.send('/api/send_whatsapp', 'send_whatsapp', credentials='whatsapp', validate=_check_transport)
+def send_whatsapp(data):
+    message_id = whatsapp.schedule_whatsapp(
+        get_credentials().whatsapp_number, data['message'], parse_send_at(data.get('send_at')), data.get('transport')
+    )
+    return _queued(message_id)
+
+
+@channel.send('/api/send_whatsapp_twilio', 'send_whatsapp_twilio', credentials='twilio')
+def send_whatsapp_twilio(data):
+    result = whatsapp.get_transport('twilio').send(data['to_number'], data['message'])
+    return {'result': result}
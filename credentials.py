@@ -0,0 +1,91 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+# Credential group -> (environment variables, error reported when any is missing)
+GROUPS = {
+    'twilio': (
+        ('TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_PHONE_NUMBER'),
+        'Twilio credentials not found in environment variables',
+    ),
+    'gmail': (
+        ('GMAIL_ADDRESS', 'GMAIL_APP_PASSWORD'),
+        'Gmail credentials not found in environment variables',
+    ),
+    'whatsapp': (
+        ('WHATSAPP_NUMBER',),
+        'WHATSAPP_NUMBER environment variable not set',
+    ),
+}
+
+
+class Credentials:
+    """
+    Provider credentials resolved from the environment once, instead of
+    os.getenv lookups on every request. Values are exposed as lower-case
+    attributes (e.g. `twilio_account_sid`) and per-group tuples (`twilio`,
+    `gmail`). Call reload_credentials() to pick up changes to .env.
+    """
+
+    def __init__(self, environ):
+        self.values = {}
+        for names, _ in GROUPS.values():
+            for name in names:
+                self.values[name] = environ.get(name)
+
+    def __getattr__(self, attr):
+        try:
+            return self.values[attr.upper()]
+        except KeyError:
+            raise AttributeError(attr)
+
+    def group(self, name):
+        return tuple(self.values[var] for var in GROUPS[name][0])
+
+    @property
+    def twilio(self):
+        return self.group('twilio')
+
+    @property
+    def gmail(self):
+        return self.group('gmail')
+
+    def missing(self, name):
+        """
+        Error message if any credential in group `name` is unset, else None.
+        """
+        names, error = GROUPS[name]
+        if all(self.values[var] for var in names):
+            return None
+        return error
+
+    def configured(self):
+        return {name: self.missing(name) is None for name in GROUPS}
+
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def get_credentials():
+    """
+    Return the process-wide credential bundle, loading it on first use.
+    """
+    global _current
+    if _current is None:
+        with _current_lock:
+            if _current is None:
+                _current = Credentials(os.environ)
+    return _current
+
+
+def reload_credentials():
+    """
+    Re-read .env (overriding the process environment) and swap in a fresh
+    bundle. Requests already running keep the bundle they started with.
+    """
+    global _current
+    load_dotenv(override=True)
+    with _current_lock:
+        _current = Credentials(os.environ)
+    return _current
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from delivery_store import get_delivery_store
+
+_STOP = object()
+
+
+class DeliveryLog:
+    """
+    Non-blocking JSONL log of outgoing messages for every channel.
+
+    log() only puts a record on an in-memory queue; a background thread
+    writes records in batches, flushes once per batch and rotates the file
+    when it grows past `max_bytes` (keeping `backup_count` old files, like
+    logging.handlers.RotatingFileHandler). If the queue is full the record
+    is dropped and counted rather than blocking the send path. close()
+    stops the writer after it has written everything queued before it.
+    Args:
+        path (str): Log file path
+        max_bytes (int): Rotate once the file reaches this size (0 disables)
+        backup_count (int): Number of rotated files to keep
+        flush_interval (float): Max seconds a record waits before being written
+        max_queue (int): Records buffered in memory before new ones are dropped
+    """
+
+    def __init__(self, path='delivery_log.jsonl', max_bytes=10 * 1024 * 1024, backup_count=5,
+                 flush_interval=1.0, max_queue=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._sinks = []
+        # Writes and rotation happen on the writer thread and, via flush() and
+        # after close(), on callers' threads; one lock keeps them from interleaving
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add_sink(self, sink):
+        """
+        Also hand every written batch (a list of record dicts) to `sink`,
+        one batch at a time.
+        """
+        self._sinks.append(sink)
+
+    def log(self, channel, recipient, status, **fields):
+        record = {'ts': time.time(), 'channel': channel, 'to': recipient, 'status': status}
+        record.update(fields)
+        if self._closed:
+            # Writer is gone (interpreter exit): write straight through
+            self._write([record])
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """
+        Synchronously write whatever is still queued.
+        """
+        batch = []
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is _STOP:
+                # Leave the stop marker for the writer thread
+                self._queue.put(record)
+                break
+            batch.append(record)
+        if batch:
+            self._write(batch)
+
+    def close(self, timeout=10):
+        """
+        Stop the writer thread once it has written every queued record,
+        including the batch it is holding (registered to run at exit).
+        """
+        if self._closed:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logging.error("Delivery log queue stayed full at shutdown; some records were not written")
+        self._thread.join(timeout)
+        self._closed = True
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            src, dst = f"{self.path}.{i}", f"{self.path}.{i + 1}"
+            if os.path.exists(src):
+                os.replace(src, dst)
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _write(self, batch):
+        lines = ''.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n' for r in batch)
+        with self._write_lock:
+            if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) + len(lines) > self.max_bytes:
+                self._rotate()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+            for sink in self._sinks:
+                try:
+                    sink(batch)
+                except Exception as e:
+                    logging.error(f"Delivery log sink error: {e}")
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            record = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while record is not _STOP:
+                batch.append(record)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= 1000 or remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            stopping = record is _STOP
+            if not batch:
+                continue
+            try:
+                self._write(batch)
+            except Exception as e:
+                logging.error(f"Delivery log write error: {e}")
+
+
+_default_log = None
+_default_log_lock = threading.Lock()
+
+
+def get_delivery_log():
+    """
+    Return the process-wide delivery log, configured from environment variables.
+    """
+    global _default_log
+    with _default_log_lock:
+        if _default_log is None:
+            _default_log = DeliveryLog(
+                path=os.getenv('DELIVERY_LOG_PATH', 'delivery_log.jsonl'),
+                max_bytes=int(os.getenv('DELIVERY_LOG_MAX_BYTES', 10 * 1024 * 1024)),
+                backup_count=int(os.getenv('DELIVERY_LOG_BACKUPS', 5)),
+            )
+            # Mirror the log into the indexed history store behind /api/history
+            _default_log.add_sink(get_delivery_store().insert_batch)
+            atexit.register(_default_log.close)
+        return _default_log
+
+
+def log_delivery(channel, recipient, status, **fields):
+    """
+    Record one outgoing message. Returns immediately.
+    Args:
+        channel (str): 'sms', 'call', 'email', 'whatsapp', 'instagram', ...
+        recipient (str): Destination number, address or account
+        status (str): 'sent' or 'failed'
+        **fields: Extra JSON-serializable details (provider id, error, ...)
+    """
+    get_delivery_log().log(channel, recipient, status, **fields)
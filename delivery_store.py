@@ -0,0 +1,133 @@
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    channel TEXT NOT NULL,
+    recipient TEXT,
+    status TEXT NOT NULL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_deliveries_ts ON deliveries (ts, id);
+CREATE INDEX IF NOT EXISTS idx_deliveries_recipient_ts ON deliveries (recipient, ts, id);
+CREATE INDEX IF NOT EXISTS idx_deliveries_channel_ts ON deliveries (channel, ts, id);
+CREATE INDEX IF NOT EXISTS idx_deliveries_status_ts ON deliveries (status, ts, id);
+'''
+
+
+class DeliveryStore:
+    """
+    Indexed SQLite history of sent messages, fed in batches by the delivery
+    log's writer thread. Queries page newest-first with keyset pagination on
+    (ts, id), so every page is an index range scan regardless of depth.
+    Args:
+        db_path (str): SQLite database file
+    """
+
+    def __init__(self, db_path='deliveries.db'):
+        self.db_path = db_path
+        with self._db() as db:
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _db(self):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.row_factory = sqlite3.Row
+            yield db
+            db.commit()
+        finally:
+            db.close()
+
+    def insert_batch(self, records):
+        """
+        Insert delivery log records (dicts with ts, channel, to, status, ...).
+        """
+        rows = []
+        for r in records:
+            details = {k: v for k, v in r.items() if k not in ('ts', 'channel', 'to', 'status')}
+            rows.append((r['ts'], r['channel'], r.get('to'), r['status'], json.dumps(details) if details else None))
+        with self._db() as db:
+            db.executemany(
+                'INSERT INTO deliveries (ts, channel, recipient, status, details) VALUES (?, ?, ?, ?, ?)', rows
+            )
+
+    def query(self, recipient=None, channel=None, status=None, since=None, until=None, cursor=None, limit=50):
+        """
+        Return one page of history, newest first.
+        Args:
+            recipient, channel, status (str): Optional exact-match filters
+            since, until (float): Optional Unix timestamp bounds
+            cursor (str): 'next_cursor' from the previous page
+            limit (int): Page size (max 500)
+        Returns:
+            dict: {'items': [...], 'next_cursor': str or None}
+        """
+        limit = max(1, min(int(limit), 500))
+        clauses, params = [], []
+        for column, value in (('recipient', recipient), ('channel', channel), ('status', status)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if since is not None:
+            clauses.append('ts >= ?')
+            params.append(float(since))
+        if until is not None:
+            clauses.append('ts < ?')
+            params.append(float(until))
+        if cursor:
+            cursor_ts, cursor_id = cursor.split(':')
+            clauses.append('(ts < ? OR (ts = ? AND id < ?))')
+            params.extend([float(cursor_ts), float(cursor_ts), int(cursor_id)])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._db() as db:
+            rows = db.execute(
+                f'SELECT * FROM deliveries {where} ORDER BY ts DESC, id DESC LIMIT ?', (*params, limit + 1)
+            ).fetchall()
+
+        items = []
+        for row in rows[:limit]:
+            item = dict(row)
+            item['details'] = json.loads(item['details']) if item['details'] else {}
+            items.append(item)
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = f"{last['ts']!r}:{last['id']}"
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def has_messaged(self, recipient, channel=None, since=None):
+        """
+        Whether a successful send to `recipient` is on record.
+        """
+        sql = "SELECT 1 FROM deliveries WHERE recipient = ? AND status = 'sent'"
+        params = [recipient]
+        if channel is not None:
+            sql += ' AND channel = ?'
+            params.append(channel)
+        if since is not None:
+            sql += ' AND ts >= ?'
+            params.append(float(since))
+        with self._db() as db:
+            return db.execute(sql + ' LIMIT 1', params).fetchone() is not None
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_delivery_store():
+    """
+    Return the process-wide delivery store (DELIVERY_DB_PATH).
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = DeliveryStore(os.getenv('DELIVERY_DB_PATH', 'deliveries.db'))
+        return _default_store
@@ -0,0 +1,221 @@
+import os
+import string
+import threading
+
+_formatter = string.Formatter()
+
+# Built-in email templates
+BUILTIN_TEMPLATES = {
+    'welcome': {
+        'subject': 'Welcome to Our Service!',
+        'html': '''
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <div style="background-color: #f8f9fa; padding: 20px; border-radius: 10px;">
+                <h2 style="color: #007bff;">Welcome, {name}!</h2>
+                <p>Thank you for joining our service. We're excited to have you on board!</p>
+                <p>Your account details:</p>
+                <ul>
+                    <li><strong>Email:</strong> {email}</li>
+                    <li><strong>Account ID:</strong> {account_id}</li>
+                    <li><strong>Join Date:</strong> {join_date}</li>
+                </ul>
+                <p>If you have any questions, feel free to contact us.</p>
+                <p>Best regards,<br>The Team</p>
+            </div>
+        </body>
+        </html>
+        '''
+    },
+    'notification': {
+        'subject': 'Important Notification',
+        'html': '''
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <div style="background-color: #fff3cd; padding: 20px; border-radius: 10px; border-left: 5px solid #ffc107;">
+                <h3 style="color: #856404;">{title}</h3>
+                <p>{message}</p>
+                <p><strong>Date:</strong> {date}</p>
+                <p><strong>Priority:</strong> {priority}</p>
+                <p>Please take necessary action if required.</p>
+            </div>
+        </body>
+        </html>
+        '''
+    },
+    'report': {
+        'subject': 'Monthly Report - {month}',
+        'html': '''
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <div style="background-color: #d1ecf1; padding: 20px; border-radius: 10px;">
+                <h2 style="color: #0c5460;">Monthly Report</h2>
+                <table style="width: 100%; border-collapse: collapse; margin: 20px 0;">
+                    <tr style="background-color: #e2e3e5;">
+                        <th style="padding: 10px; border: 1px solid #dee2e6; text-align: left;">Metric</th>
+                        <th style="padding: 10px; border: 1px solid #dee2e6; text-align: left;">Value</th>
+                    </tr>
+                    <tr>
+                        <td style="padding: 10px; border: 1px solid #dee2e6;">Total Users</td>
+                        <td style="padding: 10px; border: 1px solid #dee2e6;">{total_users}</td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 10px; border: 1px solid #dee2e6;">Revenue</td>
+                        <td style="padding: 10px; border: 1px solid #dee2e6;">${revenue}</td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 10px; border: 1px solid #dee2e6;">Growth Rate</td>
+                        <td style="padding: 10px; border: 1px solid #dee2e6;">{growth_rate}%</td>
+                    </tr>
+                </table>
+                <p><strong>Summary:</strong> {summary}</p>
+            </div>
+        </body>
+        </html>
+        '''
+    },
+    'custom': {
+        'subject': '{subject}',
+        'html': '{html_content}'
+    }
+}
+
+
+class CompiledTemplate:
+    """
+    A str.format-style template parsed once into literal and field segments,
+    so rendering is a single pass with no re-parsing.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._segments = list(_formatter.parse(source))
+        # Nested replacement fields inside a format spec need full str.format
+        self._simple = all(not spec or '{' not in spec for _, _, spec, _ in self._segments)
+
+    def render(self, data):
+        if not self._simple:
+            return self.source.format(**data)
+        parts = []
+        for literal, field_name, spec, conversion in self._segments:
+            parts.append(literal)
+            if field_name is None:
+                continue
+            value, _ = _formatter.get_field(field_name, (), data)
+            if conversion:
+                value = _formatter.convert_field(value, conversion)
+            parts.append(format(value, spec or ''))
+        return ''.join(parts)
+
+
+class EmailTemplate:
+    """
+    A compiled subject + HTML body pair.
+    """
+
+    def __init__(self, name, subject, html, mtime=None):
+        self.name = name
+        self.subject = CompiledTemplate(subject)
+        self.html = CompiledTemplate(html)
+        self.mtime = mtime
+
+    def render(self, data):
+        """
+        Returns:
+            tuple: (subject, html)
+        Raises:
+            KeyError: If `data` is missing a field the template uses
+        """
+        return self.subject.render(data), self.html.render(data)
+
+    def render_many(self, rows):
+        """
+        Render one (subject, html) pair per dict in `rows`, lazily.
+        """
+        render_subject = self.subject.render
+        render_html = self.html.render
+        for data in rows:
+            yield render_subject(data), render_html(data)
+
+
+class TemplateRegistry:
+    """
+    Compiled email templates: the built-ins plus `<name>.html` files in
+    `template_dir`. A file template may start with a `Subject: ...` line
+    followed by a blank line; otherwise its subject is its name. File
+    templates override built-ins and are recompiled when their mtime changes.
+    """
+
+    def __init__(self, template_dir=None):
+        self.template_dir = template_dir
+        self._lock = threading.Lock()
+        self._builtins = {
+            name: EmailTemplate(name, t['subject'], t['html'])
+            for name, t in BUILTIN_TEMPLATES.items()
+        }
+        self._files = {}
+
+    def _file_path(self, name):
+        if not self.template_dir or os.sep in name or name.startswith('.'):
+            return None
+        return os.path.join(self.template_dir, f"{name}.html")
+
+    def _load_file(self, name, path, mtime):
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        subject = name
+        if source.startswith('Subject:'):
+            header, _, source = source.partition('\n\n')
+            subject = header[len('Subject:'):].strip()
+        return EmailTemplate(name, subject, source, mtime)
+
+    def get(self, name):
+        """
+        Return the compiled template called `name`, or None.
+        """
+        path = self._file_path(name)
+        if path:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime is not None:
+                with self._lock:
+                    cached = self._files.get(name)
+                if cached is not None and cached.mtime == mtime:
+                    return cached
+                template = self._load_file(name, path, mtime)
+                with self._lock:
+                    self._files[name] = template
+                return template
+        return self._builtins.get(name)
+
+    def names(self):
+        names = set(self._builtins)
+        if self.template_dir and os.path.isdir(self.template_dir):
+            names.update(f[:-len('.html')] for f in os.listdir(self.template_dir) if f.endswith('.html'))
+        return sorted(names)
+
+    def render_many(self, name, rows):
+        """
+        Render `name` once per dict in `rows`. Raises KeyError for an unknown template.
+        """
+        template = self.get(name)
+        if template is None:
+            raise KeyError(name)
+        return template.render_many(rows)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry():
+    """
+    Return the process-wide template registry (file templates from EMAIL_TEMPLATE_DIR).
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TemplateRegistry(os.getenv('EMAIL_TEMPLATE_DIR', os.path.join('templates', 'email')))
+        return _registry
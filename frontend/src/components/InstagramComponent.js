@@ -32,6 +32,7 @@ const InstagramComponent = () => {
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState('');
   const [error, setError] = useState('');
+  const [imageFile, setImageFile] = useState(null);
   
   const [formData, setFormData] = useState({
     username: '',
@@ -54,7 +55,18 @@ const InstagramComponent = () => {
     setResult('');
 
     try {
-      const response = await axios.post('/api/post_instagram', formData);
+      let response;
+      if (imageFile) {
+        // Upload the image itself; the server streams it to disk
+        const upload = new FormData();
+        upload.append('username', formData.username);
+        upload.append('password', formData.password);
+        upload.append('caption', formData.caption);
+        upload.append('image', imageFile);
+        response = await axios.post('/api/upload_instagram', upload);
+      } else {
+        response = await axios.post('/api/post_instagram', formData);
+      }
       setResult(response.data.result);
     } catch (err) {
       setError(err.response?.data?.error || 'An error occurred');
@@ -130,7 +142,8 @@ const InstagramComponent = () => {
                 name="image_path"
                 value={formData.image_path}
                 onChange={handleChange}
-                required
+                required={!imageFile}
+                disabled={Boolean(imageFile)}
                 placeholder="C:\\path\\to\\image.jpg"
                 size="small"
                 InputProps={{
@@ -138,6 +151,16 @@ const InstagramComponent = () => {
                 }}
               />
               
+              <Button variant="outlined" component="label" startIcon={<PhotoCamera />} size="small">
+                {imageFile ? imageFile.name : 'Or upload an image'}
+                <input
+                  hidden
+                  type="file"
+                  accept="image/*"
+                  onChange={(e) => setImageFile(e.target.files[0] || null)}
+                />
+              </Button>
+              
               <TextField
                 fullWidth
                 label="Caption"
@@ -1,15 +1,113 @@
-import smtplib
 import os
 import logging
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
+from email import encoders, policy
+from email.headerregistry import Address
 from dotenv import load_dotenv
 from datetime import datetime
+from smtp_pool import get_smtp_pool
+from rate_limiter import throttle
+from resilience import SendResult, before_send, call_with_retry, get_breaker
+from bulk_mailer import BulkMailer
+from email_templates import get_template_registry
+from delivery_log import log_delivery
 
 load_dotenv(dotenv_path=os.path.join('config', '.env'))
 
+def _build_message(sender_email, to_email, subject, message, is_html=False, attachments=None):
+    """
+    Build the MIME message used by the send_gmail* functions.
+    """
+    msg = MIMEMultipart()
+    msg['From'] = sender_email
+    msg['Subject'] = subject
+    
+    # Handle multiple recipients
+    if isinstance(to_email, list):
+        msg['To'] = ', '.join(to_email)
+    else:
+        msg['To'] = to_email
+    
+    # Add body
+    if is_html:
+        msg.attach(MIMEText(message, 'html'))
+    else:
+        msg.attach(MIMEText(message, 'plain'))
+    
+    # Add attachments
+    if attachments:
+        for file_path in attachments:
+            if os.path.exists(file_path):
+                with open(file_path, "rb") as attachment:
+                    part = MIMEBase('application', 'octet-stream')
+                    part.set_payload(attachment.read())
+                
+                encoders.encode_base64(part)
+                part.add_header(
+                    'Content-Disposition',
+                    f'attachment; filename= {os.path.basename(file_path)}'
+                )
+                msg.attach(part)
+            else:
+                logging.warning(f"Attachment not found: {file_path}")
+    
+    return msg
+
+class PreparedMessage:
+    """
+    A message that is built and serialized once and then fanned out to many
+    recipients. Attachments are read and base64-encoded a single time; only
+    the To header differs per recipient.
+    """
+
+    def __init__(self, sender_email, subject, message, is_html=False, attachments=None):
+        msg = _build_message(sender_email, [], subject, message, is_html, attachments)
+        del msg['To']
+        self._serialized = msg.as_string()
+
+    def for_recipient(self, recipient):
+        """
+        The serialized message with a To header for `recipient`.
+        Raises:
+            ValueError: If `recipient` is not a single valid address
+        """
+        return _to_header(recipient) + self._serialized
+
+    def messages(self, recipients):
+        """
+        Yield (recipient, message) pairs for BulkMailer; an invalid recipient
+        is paired with its ValueError so only that one fails.
+        """
+        for recipient in recipients:
+            try:
+                yield recipient, self.for_recipient(recipient)
+            except ValueError as e:
+                yield recipient, e
+
+def _to_header(recipient):
+    """
+    Build a folded `To:` header line for one address. CR/LF and anything that
+    doesn't parse as exactly one address are rejected, so a recipient can't
+    add headers of its own; names are RFC 2047 encoded and domains IDNA encoded.
+    """
+    if not isinstance(recipient, str) or '\r' in recipient or '\n' in recipient:
+        raise ValueError(f"Invalid recipient address: {recipient!r}")
+    header = policy.default.header_factory('To', recipient)
+    if header.defects or len(header.addresses) != 1:
+        raise ValueError(f"Invalid recipient address: {recipient!r}")
+    address = header.addresses[0]
+    if not address.username or not address.domain or not address.username.isascii():
+        raise ValueError(f"Invalid recipient address: {recipient!r}")
+    try:
+        domain = address.domain.encode('idna').decode('ascii')
+    except UnicodeError:
+        raise ValueError(f"Invalid recipient address: {recipient!r}")
+    address = Address(address.display_name, address.username, domain)
+    return policy.default.fold('To', policy.default.header_factory('To', [address]))
+
 def send_gmail(sender_email, sender_password, to_email, subject, message, is_html=False, attachments=None):
     """
     Send email using Gmail SMTP.
@@ -22,58 +120,29 @@ def send_gmail(sender_email, sender_password, to_email, subject, message, is_htm
         is_html (bool): Whether message is HTML format
         attachments (list): List of file paths to attach
     Returns:
-        str: Success or error message
+        SendResult: Success or error message, with ok/error/retryable attributes
     """
     try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['Subject'] = subject
+        msg = _build_message(sender_email, to_email, subject, message, is_html, attachments)
         
-        # Handle multiple recipients
-        if isinstance(to_email, list):
-            msg['To'] = ', '.join(to_email)
-        else:
-            msg['To'] = to_email
-        
-        # Add body
-        if is_html:
-            msg.attach(MIMEText(message, 'html'))
-        else:
-            msg.attach(MIMEText(message, 'plain'))
-        
-        # Add attachments
-        if attachments:
-            for file_path in attachments:
-                if os.path.exists(file_path):
-                    with open(file_path, "rb") as attachment:
-                        part = MIMEBase('application', 'octet-stream')
-                        part.set_payload(attachment.read())
-                    
-                    encoders.encode_base64(part)
-                    part.add_header(
-                        'Content-Disposition',
-                        f'attachment; filename= {os.path.basename(file_path)}'
-                    )
-                    msg.attach(part)
-                else:
-                    logging.warning(f"Attachment not found: {file_path}")
-        
-        # Send email
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        
-        # Convert to_email to list for sending
+        # Send email over a pooled, already authenticated connection
         recipients = to_email if isinstance(to_email, list) else [to_email]
-        server.sendmail(sender_email, recipients, msg.as_string())
-        server.quit()
+        throttle('email', sender_email, recipients)
+        pool = get_smtp_pool()
+        serialized = msg.as_string()
+        call_with_retry(
+            lambda: pool.sendmail(sender_email, sender_password, recipients, serialized),
+            breaker=get_breaker(('smtp', pool.host)), retry_if=before_send
+        )
+        for recipient in recipients:
+            log_delivery('email', recipient, 'sent', sender=sender_email)
         
-        return f"✅ Email sent successfully to {', '.join(recipients)}"
+        return SendResult.success(f"✅ Email sent successfully to {', '.join(recipients)}")
         
     except Exception as e:
         logging.error(f"Gmail error: {e}")
-        return f"Error sending email: {e}"
+        log_delivery('email', to_email if isinstance(to_email, str) else ', '.join(to_email), 'failed', sender=sender_email, error=str(e))
+        return SendResult.failure(f"Error sending email: {e}", e)
 
 def send_gmail_html(sender_email, sender_password, to_email, subject, html_content, attachments=None):
     """
@@ -81,7 +150,7 @@ def send_gmail_html(sender_email, sender_password, to_email, subject, html_conte
     """
     return send_gmail(sender_email, sender_password, to_email, subject, html_content, is_html=True, attachments=attachments)
 
-def send_gmail_bulk(sender_email, sender_password, recipients_list, subject, message, is_html=False):
+def send_gmail_bulk(sender_email, sender_password, recipients_list, subject, message, is_html=False, workers=None):
     """
     Send bulk emails to multiple recipients.
     Args:
@@ -89,26 +158,20 @@ def send_gmail_bulk(sender_email, sender_password, recipients_list, subject, mes
         subject (str): Email subject
         message (str): Email body
         is_html (bool): Whether message is HTML format
+        workers (int): Number of concurrent SMTP connections (default: BULK_EMAIL_WORKERS)
     Returns:
-        str: Success or error message
+        dict: 'message' summary string, 'sent'/'failed' counts and per-recipient 'results'
     """
     try:
-        success_count = 0
-        failed_count = 0
-        
-        for recipient in recipients_list:
-            result = send_gmail(sender_email, sender_password, recipient, subject, message, is_html)
-            if "successfully" in result:
-                success_count += 1
-            else:
-                failed_count += 1
-                logging.error(f"Failed to send to {recipient}: {result}")
-        
-        return f"✅ Bulk email completed: {success_count} sent, {failed_count} failed"
+        prepared = PreparedMessage(sender_email, subject, message, is_html)
+        messages = prepared.messages(recipients_list)
+        report = BulkMailer(sender_email, sender_password, workers=workers).send(messages)
+        report['message'] = f"✅ Bulk email completed: {report['sent']} sent, {report['failed']} failed"
+        return report
         
     except Exception as e:
         logging.error(f"Bulk email error: {e}")
-        return f"Error in bulk email: {e}" 
+        return {'message': f"Error in bulk email: {e}", 'sent': 0, 'failed': 0, 'results': []}
 
 def send_gmail_template(sender_email, sender_password, to_email, template_name, template_data, attachments=None):
     """
@@ -121,104 +184,26 @@ def send_gmail_template(sender_email, sender_password, to_email, template_name,
         template_data (dict): Data to fill in the template
         attachments (list): List of file paths to attach
     Returns:
-        str: Success or error message
+        SendResult: Success or error message, with ok/error/retryable attributes
     """
-    # Email templates
-    templates = {
-        'welcome': {
-            'subject': 'Welcome to Our Service!',
-            'html': '''
-            <html>
-            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                <div style="background-color: #f8f9fa; padding: 20px; border-radius: 10px;">
-                    <h2 style="color: #007bff;">Welcome, {name}!</h2>
-                    <p>Thank you for joining our service. We're excited to have you on board!</p>
-                    <p>Your account details:</p>
-                    <ul>
-                        <li><strong>Email:</strong> {email}</li>
-                        <li><strong>Account ID:</strong> {account_id}</li>
-                        <li><strong>Join Date:</strong> {join_date}</li>
-                    </ul>
-                    <p>If you have any questions, feel free to contact us.</p>
-                    <p>Best regards,<br>The Team</p>
-                </div>
-            </body>
-            </html>
-            '''
-        },
-        'notification': {
-            'subject': 'Important Notification',
-            'html': '''
-            <html>
-            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                <div style="background-color: #fff3cd; padding: 20px; border-radius: 10px; border-left: 5px solid #ffc107;">
-                    <h3 style="color: #856404;">{title}</h3>
-                    <p>{message}</p>
-                    <p><strong>Date:</strong> {date}</p>
-                    <p><strong>Priority:</strong> {priority}</p>
-                    <p>Please take necessary action if required.</p>
-                </div>
-            </body>
-            </html>
-            '''
-        },
-        'report': {
-            'subject': 'Monthly Report - {month}',
-            'html': '''
-            <html>
-            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                <div style="background-color: #d1ecf1; padding: 20px; border-radius: 10px;">
-                    <h2 style="color: #0c5460;">Monthly Report</h2>
-                    <table style="width: 100%; border-collapse: collapse; margin: 20px 0;">
-                        <tr style="background-color: #e2e3e5;">
-                            <th style="padding: 10px; border: 1px solid #dee2e6; text-align: left;">Metric</th>
-                            <th style="padding: 10px; border: 1px solid #dee2e6; text-align: left;">Value</th>
-                        </tr>
-                        <tr>
-                            <td style="padding: 10px; border: 1px solid #dee2e6;">Total Users</td>
-                            <td style="padding: 10px; border: 1px solid #dee2e6;">{total_users}</td>
-                        </tr>
-                        <tr>
-                            <td style="padding: 10px; border: 1px solid #dee2e6;">Revenue</td>
-                            <td style="padding: 10px; border: 1px solid #dee2e6;">${revenue}</td>
-                        </tr>
-                        <tr>
-                            <td style="padding: 10px; border: 1px solid #dee2e6;">Growth Rate</td>
-                            <td style="padding: 10px; border: 1px solid #dee2e6;">{growth_rate}%</td>
-                        </tr>
-                    </table>
-                    <p><strong>Summary:</strong> {summary}</p>
-                </div>
-            </body>
-            </html>
-            '''
-        },
-        'custom': {
-            'subject': '{subject}',
-            'html': '{html_content}'
-        }
-    }
-    
     try:
-        if template_name not in templates:
-            return f"Error: Template '{template_name}' not found. Available templates: {', '.join(templates.keys())}"
-        
-        template = templates[template_name]
+        template = get_template_registry().get(template_name)
+        if template is None:
+            return SendResult.failure(f"Error: Template '{template_name}' not found. Available templates: {', '.join(get_template_registry().names())}")
         
         # Fill template with data
-        subject = template['subject'].format(**template_data)
-        html_content = template['html'].format(**template_data)
+        subject, html_content = template.render(template_data)
         
         # Send email using existing function
         return send_gmail(sender_email, sender_password, to_email, subject, html_content, is_html=True, attachments=attachments)
         
     except KeyError as e:
-        return f"Error: Missing required template data: {e}"
+        return SendResult.failure(f"Error: Missing required template data: {e}")
     except Exception as e:
         logging.error(f"Template email error: {e}")
-        return f"Error sending template email: {e}"
+        return SendResult.failure(f"Error sending template email: {e}", e)
 
-def send_gmail_newsletter(sender_email, sender_password, subscribers_list, newsletter_title, newsletter_content, attachments=None):
+def send_gmail_newsletter(sender_email, sender_password, subscribers_list, newsletter_title, newsletter_content, attachments=None, workers=None):
     """
     Send newsletter to subscribers with professional formatting.
     Args:
@@ -228,8 +213,9 @@ def send_gmail_newsletter(sender_email, sender_password, subscribers_list, newsl
         newsletter_title (str): Newsletter title
         newsletter_content (str): Newsletter content (can be HTML)
         attachments (list): List of file paths to attach
+        workers (int): Number of concurrent SMTP connections (default: BULK_EMAIL_WORKERS)
     Returns:
-        str: Success or error message
+        dict: 'message' summary string, 'sent'/'failed' counts and per-recipient 'results'
     """
     try:
         # Newsletter template
@@ -257,19 +243,99 @@ def send_gmail_newsletter(sender_email, sender_password, subscribers_list, newsl
         </html>
         '''
         
-        success_count = 0
-        failed_count = 0
+        prepared = PreparedMessage(sender_email, newsletter_title, newsletter_html, True, attachments)
+        messages = prepared.messages(subscribers_list)
+        report = BulkMailer(sender_email, sender_password, workers=workers).send(messages)
+        report['message'] = f"✅ Newsletter sent: {report['sent']} delivered, {report['failed']} failed"
+        return report
         
-        for subscriber in subscribers_list:
-            result = send_gmail(sender_email, sender_password, subscriber, newsletter_title, newsletter_html, is_html=True, attachments=attachments)
-            if "successfully" in result:
-                success_count += 1
-            else:
-                failed_count += 1
-                logging.error(f"Failed to send newsletter to {subscriber}: {result}")
+    except Exception as e:
+        logging.error(f"Newsletter error: {e}")
+        return {'message': f"Error sending newsletter: {e}", 'sent': 0, 'failed': 0, 'results': []}
+
+def send_gmail_merge(sender_email, sender_password, rows, template_name, workers=None, max_failures_reported=100):
+    """
+    Send a personalized template email to every row of a (possibly very long)
+    recipient stream. Rows are consumed lazily and only failures are kept, so
+    memory stays bounded however many rows there are.
+    Args:
+        sender_email (str): Gmail address
+        sender_password (str): Gmail app password
+        rows (iterable): Dicts of template data; each needs an 'email' (or 'to_email') key.
+            An exception in place of a row fails that row only
+        template_name (str): Name of the template to use
+        workers (int): Number of concurrent SMTP connections (default: BULK_EMAIL_WORKERS)
+        max_failures_reported (int): Cap on how many failed rows are returned
+    Returns:
+        dict: 'message' summary string, 'sent'/'failed' counts and the first 'failures'
+    """
+    try:
+        template = get_template_registry().get(template_name)
+        if template is None:
+            return {'message': f"Error: Template '{template_name}' not found", 'sent': 0, 'failed': 0, 'failures': []}
+        
+        failures = []
+        skipped = [0]
+        stopped = []
+        lock = threading.Lock()
         
-        return f"✅ Newsletter sent: {success_count} delivered, {failed_count} failed"
+        def record_failure(result):
+            with lock:
+                if len(failures) < max_failures_reported:
+                    failures.append(result)
+        
+        def on_result(index, result):
+            if result['status'] == 'failed':
+                record_failure(result)
+        
+        def skip(recipient, error):
+            skipped[0] += 1
+            record_failure({'recipient': recipient, 'status': 'failed', 'error': error})
+        
+        def messages():
+            # Never raises: rows already handed to the mailer have been sent,
+            # so a bad row (or a broken upload) must not lose their counts
+            rows_iter = iter(rows)
+            while True:
+                try:
+                    row = next(rows_iter)
+                except StopIteration:
+                    return
+                except Exception as e:
+                    logging.error(f"Mail merge input error: {e}")
+                    stopped.append(str(e))
+                    return
+                if isinstance(row, Exception):
+                    skip(None, str(row))
+                    continue
+                if not isinstance(row, dict):
+                    skip(None, 'Each row must be an object of template data')
+                    continue
+                recipient = row.get('email') or row.get('to_email')
+                try:
+                    if not recipient:
+                        raise KeyError('email')
+                    subject, html_content = template.render(row)
+                    msg = PreparedMessage(sender_email, subject, html_content, is_html=True).for_recipient(recipient)
+                except KeyError as e:
+                    skip(recipient, f"Missing required template data: {e}")
+                    continue
+                except Exception as e:
+                    skip(recipient, str(e))
+                    continue
+                yield recipient, msg
+        
+        report = BulkMailer(sender_email, sender_password, workers=workers).send(messages(), on_result=on_result)
+        report['failed'] += skipped[0]
+        del report['results']
+        report['failures'] = failures
+        if stopped:
+            report['message'] = (f"Mail merge stopped early ({stopped[0]}): "
+                                 f"{report['sent']} sent, {report['failed']} failed")
+        else:
+            report['message'] = f"✅ Mail merge completed: {report['sent']} sent, {report['failed']} failed"
+        return report
         
     except Exception as e:
-        logging.error(f"Newsletter error: {e}")
-        return f"Error sending newsletter: {e}" 
\ No newline at end of file
+        logging.error(f"Mail merge error: {e}")
+        return {'message': f"Error in mail merge: {e}", 'sent': 0, 'failed': 0, 'failures': []}
@@ -0,0 +1,148 @@
+import os
+import time
+import hashlib
+import threading
+from functools import wraps
+from collections import OrderedDict
+from flask import request, jsonify, make_response, g
+
+
+class _Entry:
+    def __init__(self, fingerprint, expires_at):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.done = threading.Event()
+        self.response = None
+        self.streamed = False
+
+
+class IdempotencyCache:
+    """
+    Bounded, TTL-expiring store of responses keyed by Idempotency-Key.
+    The first request for a key runs the handler; repeats get the stored
+    response, and repeats that arrive while the first is still running wait
+    for it instead of sending again.
+    Args:
+        max_entries (int): Oldest keys are evicted beyond this many
+        ttl (float): Seconds a stored response is replayed for
+        wait_timeout (float): How long a concurrent duplicate waits for the original
+    """
+
+    def __init__(self, max_entries=10000, ttl=24 * 3600, wait_timeout=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and entry.expires_at > now:
+                break
+            self._entries.popitem(last=False)
+
+    def begin(self, key, fingerprint):
+        """
+        Returns (entry, is_owner). The owner must call finish() or abandon().
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                return entry, False
+            entry = _Entry(fingerprint, now + self.ttl)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict(now)
+            return entry, True
+
+    def finish(self, entry, response):
+        entry.response = response
+        entry.done.set()
+
+    def abandon(self, key, entry):
+        """
+        Forget a key whose request failed, so a retry runs it again.
+        """
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        entry.done.set()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_idempotency_cache():
+    """
+    Return the process-wide idempotency cache, configured from environment variables.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = IdempotencyCache(
+                max_entries=int(os.getenv('IDEMPOTENCY_MAX_KEYS', 10000)),
+                ttl=float(os.getenv('IDEMPOTENCY_TTL', 24 * 3600)),
+                wait_timeout=float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', 300)),
+            )
+        return _default_cache
+
+
+def _fingerprint():
+    # JSON bodies are small and already parsed; streamed uploads are
+    # identified by URL and length so they are never buffered here
+    body = request.get_data(cache=True) if request.is_json else str(request.content_length).encode()
+    return hashlib.sha256(request.full_path.encode() + b'\0' + body).hexdigest()
+
+
+def idempotent(view):
+    """
+    Route decorator honouring an `Idempotency-Key` request header. Requests
+    without the header are handled normally. Keys are scoped per route and
+    only held in this process, so multi-worker deployments should route
+    retries to the same worker or accept per-worker deduplication.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        cache = get_idempotency_cache()
+        key = f"{request.path}:{key}"
+        fingerprint = _fingerprint()
+        entry, is_owner = cache.begin(key, fingerprint)
+
+        if not is_owner:
+            if entry.fingerprint != fingerprint:
+                return jsonify({'error': 'Idempotency-Key was already used with a different request'}), 422
+            if not entry.done.wait(timeout=cache.wait_timeout):
+                return jsonify({'error': 'Original request with this Idempotency-Key is still in progress'}), 409
+            if entry.response is None:
+                return jsonify({'error': 'Original request with this Idempotency-Key failed; retry it'}), 409
+            if entry.streamed:
+                return jsonify({'error': 'Request with this Idempotency-Key was already processed'}), 409
+            body, status, headers = entry.response
+            response = make_response(body, status, headers)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            cache.abandon(key, entry)
+            raise
+        if response.status_code >= 400 or g.get('send_failed'):
+            # Errors and failed sends (reported with 200 and a failed
+            # SendResult) aren't stored, so the client can retry the request
+            cache.abandon(key, entry)
+            return response
+        if response.is_streamed:
+            # Streamed bodies can't be replayed, but duplicates must still not resend
+            entry.streamed = True
+            cache.finish(entry, (b'', response.status_code, {}))
+            return response
+        cache.finish(entry, (response.get_data(), response.status_code, {'Content-Type': response.content_type}))
+        return response
+    return wrapper
@@ -0,0 +1,183 @@
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from batching import clamp_workers
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Instagram feed photos: 1080px wide, aspect ratio between 4:5 portrait and 1.91:1 landscape
+TARGET_WIDTH = 1080
+MIN_ASPECT = 4 / 5
+MAX_ASPECT = 1.91
+
+
+def _file_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fit(img):
+    """
+    Center-crop to Instagram's allowed aspect range, then downscale to the
+    target width (never upscale).
+    """
+    width, height = img.size
+    aspect = width / height
+    if aspect < MIN_ASPECT:
+        new_height = round(width / MIN_ASPECT)
+        top = (height - new_height) // 2
+        img = img.crop((0, top, width, top + new_height))
+    elif aspect > MAX_ASPECT:
+        new_width = round(height * MAX_ASPECT)
+        left = (width - new_width) // 2
+        img = img.crop((left, 0, left + new_width, height))
+    if img.width > TARGET_WIDTH:
+        img = img.resize((TARGET_WIDTH, round(img.height * TARGET_WIDTH / img.width)), Image.LANCZOS)
+    return img
+
+
+def prepare_instagram_image(image_path, cache_dir=None, quality=None, source_hash=None):
+    """
+    Resize and re-encode an image for Instagram, stripping its metadata.
+    Output is cached under the SHA-256 of the source file, so posting the
+    same image again reuses the encoded file.
+    Args:
+        image_path (str): Source image
+        cache_dir (str): Output directory (INSTAGRAM_IMAGE_CACHE_DIR)
+        quality (int): JPEG quality (INSTAGRAM_JPEG_QUALITY, default 85)
+        source_hash (str): SHA-256 of the source if the caller already has it
+    Returns:
+        str: Path of the prepared JPEG, or `image_path` unchanged if Pillow isn't installed
+    """
+    if not PIL_AVAILABLE:
+        return image_path
+    cache_dir = cache_dir or os.getenv('INSTAGRAM_IMAGE_CACHE_DIR', 'instagram_cache')
+    quality = int(quality or os.getenv('INSTAGRAM_JPEG_QUALITY', 85))
+    # The settings are part of the key so changing them doesn't serve stale output
+    out_path = os.path.join(cache_dir, f"{source_hash or _file_hash(image_path)}-{TARGET_WIDTH}-q{quality}.jpg")
+    if os.path.exists(out_path):
+        return out_path
+
+    with Image.open(image_path) as src:
+        # Apply the EXIF rotation before the EXIF block is dropped
+        img = ImageOps.exif_transpose(src)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        img = _fit(img)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # No exif/icc arguments: the output carries no metadata
+                img.save(f, 'JPEG', quality=quality, optimize=True, progressive=True)
+            os.replace(tmp_path, out_path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+    return out_path
+
+
+def preprocess_workers():
+    """
+    Size of the preprocessing pool: INSTAGRAM_PREPROCESS_WORKERS, default
+    and at most the CPU count.
+    """
+    cpus = os.cpu_count() or 1
+    return min(int(os.getenv('INSTAGRAM_PREPROCESS_WORKERS', cpus)), cpus)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """
+    The shared preprocessing pool, created on first use so that starting the
+    app never pays for worker processes (or for importing Pillow). None when
+    Pillow isn't installed or the pool is disabled (INSTAGRAM_PREPROCESS_WORKERS=0).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None and PIL_AVAILABLE and preprocess_workers() > 0:
+            # 'spawn' would re-run the app's entry module (and so create_app())
+            # in every worker; forked workers only ever run prepare_instagram_image
+            method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=preprocess_workers(),
+                                        mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def prepare_instagram_images(image_paths, workers=None):
+    """
+    Prepare several images in parallel on the shared process pool (image
+    encoding is CPU-bound, so threads wouldn't help), started on the first
+    call. Without Pillow, or with the pool disabled, they are prepared one by
+    one in this process.
+    Args:
+        image_paths (list): Source images
+        workers (int): Images prepared at once, capped at the pool size (the default)
+    Returns:
+        list: (prepared_path, error) per input, in order; prepared_path is None on error
+    Raises:
+        ValueError: If workers is not a positive integer
+    """
+    workers = clamp_workers(workers, max(1, preprocess_workers()))
+    pool = _get_pool()
+    results = [None] * len(image_paths)
+    pending = {}
+
+    def collect(futures):
+        for future in futures:
+            index = pending.pop(future)
+            try:
+                results[index] = (future.result(), None)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died; the next call starts a fresh pool
+                    _discard_pool(pool)
+                logging.error(f"Image preprocessing failed for {image_paths[index]}: {e}")
+                results[index] = (None, str(e))
+
+    for index, path in enumerate(image_paths):
+        if pool is None:
+            try:
+                results[index] = (prepare_instagram_image(path), None)
+            except Exception as e:
+                logging.error(f"Image preprocessing failed for {path}: {e}")
+                results[index] = (None, str(e))
+            continue
+        if len(pending) >= workers:
+            collect(wait(pending, return_when=FIRST_COMPLETED).done)
+        try:
+            pending[pool.submit(prepare_instagram_image, path)] = index
+        except (BrokenProcessPool, RuntimeError) as e:
+            logging.error(f"Image preprocessing failed for {path}: {e}")
+            results[index] = (None, str(e))
+    collect(wait(pending).done)
+    return results
@@ -0,0 +1,115 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+from instagrapi import Client
+from instagrapi.exceptions import LoginRequired
+
+
+class InstagramSessionCache:
+    """
+    Logged-in instagrapi clients, one per username, reused across posts.
+
+    Each client's settings (device uuids, cookies, auth headers) are saved to
+    `<session_dir>/<username>.json` after login, so a restarted process
+    resumes the session instead of going through the login flow again. A
+    full relogin only happens when Instagram rejects the session or the
+    password changes. instagrapi clients aren't thread-safe, so calls for
+    the same username are serialized.
+    Args:
+        session_dir (str): Directory for the per-username settings files
+    """
+
+    def __init__(self, session_dir='instagram_sessions'):
+        self.session_dir = session_dir
+        self._clients = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _path(self, username):
+        return os.path.join(self.session_dir, re.sub(r'[^A-Za-z0-9._-]', '_', username) + '.json')
+
+    def _user_lock(self, username):
+        with self._lock:
+            return self._locks.setdefault(username, threading.Lock())
+
+    def _save(self, username, client):
+        os.makedirs(self.session_dir, exist_ok=True)
+        path = self._path(username)
+        client.dump_settings(path)
+        # The file holds live session cookies
+        os.chmod(path, 0o600)
+
+    def _login(self, username, password):
+        client = Client()
+        path = self._path(username)
+        if os.path.exists(path):
+            try:
+                client.load_settings(path)
+            except Exception as e:
+                logging.error(f"Ignoring unreadable Instagram session for {username}: {e}")
+        try:
+            # With saved settings this reuses the session rather than logging in afresh
+            client.login(username, password)
+            self._save(username, client)
+        except LoginRequired:
+            self._relogin(username, password, client)
+        return client
+
+    def _relogin(self, username, password, client):
+        # Keep the device identity so Instagram sees the same phone logging back in
+        uuids = client.get_settings().get('uuids')
+        client.set_settings({})
+        if uuids:
+            client.set_uuids(uuids)
+        client.login(username, password)
+        self._save(username, client)
+
+    def call(self, username, password, action):
+        """
+        Run `action(client)` with a logged-in client for `username`, logging
+        in again once if the session turns out to be invalid.
+        """
+        password_hash = hashlib.sha256(password.encode()).hexdigest()
+        with self._user_lock(username):
+            cached = self._clients.get(username)
+            if cached is None or cached[0] != password_hash:
+                cached = (password_hash, self._login(username, password))
+                self._clients[username] = cached
+            client = cached[1]
+            try:
+                return action(client)
+            except LoginRequired:
+                logging.info(f"Instagram session for {username} expired, logging in again")
+                try:
+                    self._relogin(username, password, client)
+                except Exception:
+                    self.invalidate(username)
+                    raise
+                return action(client)
+
+    def invalidate(self, username):
+        """
+        Drop the cached client and saved session for `username`.
+        """
+        self._clients.pop(username, None)
+        try:
+            os.remove(self._path(username))
+        except FileNotFoundError:
+            pass
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_instagram_sessions():
+    """
+    Return the process-wide Instagram session cache (INSTAGRAM_SESSION_DIR).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = InstagramSessionCache(os.getenv('INSTAGRAM_SESSION_DIR', 'instagram_sessions'))
+        return _default_cache
@@ -1,25 +1,71 @@
-from instagrapi import Client
 import os
 import logging
+from delivery_log import log_delivery
+from resilience import SendResult, call_with_retry, get_breaker
+from instagram_session import get_instagram_sessions
+from image_pipeline import prepare_instagram_image, prepare_instagram_images
 
-def post_instagram_photo(username, password, image_path, caption):
+def post_instagram_photo(username, password, image_path, caption, source_hash=None):
     """
-    Posts a photo to Instagram using instagrapi.
+    Posts a photo to Instagram using instagrapi, reusing a cached session.
     Args:
         username (str): Instagram username
         password (str): Instagram password
         image_path (str): Path to the image file
         caption (str): Caption for the post
+        source_hash (str): SHA-256 of the image, if already known (skips rehashing)
     Returns:
-        str: Success message or error message
+        SendResult: Success message or error message
     """
     if not os.path.exists(image_path):
-        return f"Error: Image not found at path: {image_path}"
+        return SendResult.failure(f"Error: Image not found at path: {image_path}")
     try:
-        cl = Client()
-        cl.login(username, password)
-        cl.photo_upload(path=image_path, caption=caption)
-        return "✅ Image posted successfully!"
+        upload_path = prepare_instagram_image(image_path, source_hash=source_hash)
+    except Exception as e:
+        logging.error(f"Image preprocessing failed for {image_path}, uploading original: {e}")
+        upload_path = image_path
+    return _upload(username, password, image_path, upload_path, caption)
+
+
+def _upload(username, password, image_path, upload_path, caption):
+    try:
+        # Reuses the account's logged-in session; logs in only when it has expired.
+        # Not retried: an upload that timed out may still have been posted.
+        call_with_retry(lambda: get_instagram_sessions().call(
+            username, password, lambda cl: cl.photo_upload(path=upload_path, caption=caption)
+        ), breaker=get_breaker(('instagram',)), attempts=1)
+        log_delivery('instagram', username, 'sent', image=os.path.basename(image_path))
+        return SendResult.success("✅ Image posted successfully!")
     except Exception as e:
         logging.error(f"Instagram post error: {e}")
-        return f"Error posting image: {e}" 
\ No newline at end of file
+        log_delivery('instagram', username, 'failed', image=os.path.basename(image_path), error=str(e))
+        return SendResult.failure(f"Error posting image: {e}", e)
+
+
+def post_instagram_photos(username, password, posts, workers=None):
+    """
+    Posts several photos from one account. All images are preprocessed in
+    parallel on the shared process pool first, then uploaded one after another over
+    the account's session.
+    Args:
+        username (str): Instagram username
+        password (str): Instagram password
+        posts (list): Dicts with 'image_path' and 'caption'
+        workers (int): Images preprocessed at once, capped at INSTAGRAM_PREPROCESS_WORKERS
+    Returns:
+        list: {'image_path', 'result'} per post, in order
+    """
+    results = []
+    existing = [p for p in posts if os.path.exists(p['image_path'])]
+    prepared = iter(prepare_instagram_images([p['image_path'] for p in existing], workers))
+    for post in posts:
+        image_path = post['image_path']
+        if not os.path.exists(image_path):
+            result = SendResult.failure(f"Error: Image not found at path: {image_path}")
+        else:
+            upload_path, error = next(prepared)
+            if error:
+                logging.error(f"Image preprocessing failed for {image_path}, uploading original: {error}")
+            result = _upload(username, password, image_path, upload_path or image_path, post.get('caption', ''))
+        results.append({'image_path': image_path, 'result': result})
+    return results
@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from flask import request, jsonify, g
+from resilience import send_failed
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    run_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    claim_token TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    secrets_owner TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_run_at ON jobs (status, run_at);
+CREATE TABLE IF NOT EXISTS job_owners (
+    instance TEXT PRIMARY KEY,
+    seen_at REAL NOT NULL
+);
+'''
+# Columns added after the first release, for databases created before them
+_MIGRATIONS = {
+    'claim_token': 'ALTER TABLE jobs ADD COLUMN claim_token TEXT',
+    'attempts': 'ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0',
+    'secrets_owner': 'ALTER TABLE jobs ADD COLUMN secrets_owner TEXT',
+}
+
+# Request fields that are never written to the database
+SECRET_FIELDS = ('password', 'sender_password', 'auth_token', 'passphrase', 'key_passphrase')
+# A job whose lease expires (its worker died) is run again at most once
+MAX_ATTEMPTS = 2
+
+
+def _strip_secrets(value, secrets):
+    """
+    Copy of `value` with every SECRET_FIELDS entry replaced by a reference
+    into `secrets`, at any depth (e.g. the hosts list of a multi-host SSH job).
+    """
+    if isinstance(value, dict):
+        stripped = {}
+        for key, item in value.items():
+            if key in SECRET_FIELDS and isinstance(item, str) and item:
+                secrets.append(item)
+                stripped[key] = {'$secret': len(secrets) - 1}
+            else:
+                stripped[key] = _strip_secrets(item, secrets)
+        return stripped
+    if isinstance(value, list):
+        return [_strip_secrets(item, secrets) for item in value]
+    return value
+
+
+def _restore_secrets(value, secrets):
+    if isinstance(value, dict):
+        if set(value) == {'$secret'}:
+            return secrets[value['$secret']]
+        return {key: _restore_secrets(item, secrets) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_restore_secrets(item, secrets) for item in value]
+    return value
+
+
+class JobQueue:
+    """
+    Durable SQLite-backed job queue drained by a pool of worker threads.
+    Jobs survive process restarts. While a job runs, its worker renews the
+    lease every `lease_seconds / 3`; a job whose lease runs out (because its
+    process died) is picked up again, at most once.
+
+    Secret request fields (SECRET_FIELDS) are kept in this process's memory
+    and only a reference is stored, so jobs carrying them can only be run by
+    the process that queued them. Each process records that it is alive in
+    job_owners on every heartbeat; once a process has missed a lease's worth
+    of heartbeats its queued and running secret jobs are failed, and have to
+    be submitted again.
+    Args:
+        db_path (str): SQLite database file
+        workers (int): Number of worker threads
+        lease_seconds (float): How long a running job may go without a heartbeat before it is retried
+        retention_seconds (float): Finished jobs older than this are purged on start
+    """
+
+    def __init__(self, db_path='jobs.db', workers=4, lease_seconds=600, retention_seconds=7 * 24 * 3600):
+        self.db_path = db_path
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self._handlers = {}
+        self._instance = uuid.uuid4().hex
+        self._secrets = {}
+        self._running = {}
+        self._running_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._started = False
+        self._start_lock = threading.Lock()
+        with self._db() as db:
+            db.executescript(_SCHEMA)
+            columns = {row['name'] for row in db.execute('PRAGMA table_info(jobs)')}
+            for column, sql in _MIGRATIONS.items():
+                if column not in columns:
+                    db.execute(sql)
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.row_factory = sqlite3.Row
+        return db
+
+    @contextmanager
+    def _db(self):
+        db = self._connect()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def register(self, kind, handler):
+        """
+        Register `handler(payload)` for jobs of type `kind`. Its return value
+        must be JSON-serializable and is stored as the job result.
+        """
+        self._handlers[kind] = handler
+
+    def enqueue(self, kind, payload, run_at=None):
+        """
+        Persist a job and wake a worker. Returns the job id.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job type: {kind}")
+        # Registers this process as a live job owner before its job is visible
+        self.start()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        secrets = []
+        stored = _strip_secrets(payload, secrets)
+        if secrets:
+            self._secrets[job_id] = secrets
+        with self._db() as db:
+            db.execute(
+                'INSERT INTO jobs (id, kind, payload, status, created_at, run_at, secrets_owner) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(stored), 'queued', now, run_at or now,
+                 self._instance if secrets else None)
+            )
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        """
+        Return the job as a dict, or None if it does not exist.
+        """
+        with self._db() as db:
+            row = db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for column in ('payload', 'claim_token', 'secrets_owner'):
+            del job[column]
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def _claim(self):
+        now = time.time()
+        kinds = list(self._handlers)
+        if not kinds:
+            return None, None
+        # Only claim job types this process can run; another app sharing
+        # the database may have registered a different set
+        placeholders = ', '.join('?' * len(kinds))
+        expired = now - self.lease_seconds
+        db = self._connect()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            # Give up on jobs that already used their retry, and on jobs whose
+            # secrets were held by a process that has stopped heartbeating
+            db.execute(
+                '''UPDATE jobs SET status = 'failed', finished_at = ?, payload = '{}', claim_token = NULL,
+                       error = CASE WHEN attempts >= ? THEN 'Worker stopped while running the job'
+                                    ELSE 'Job credentials were held by a process that is gone; submit it again' END
+                   WHERE (status = 'running' AND started_at < ? AND attempts >= ?)
+                      OR (secrets_owner IS NOT NULL AND secrets_owner != ?
+                          AND status IN ('queued', 'running')
+                          AND secrets_owner NOT IN (SELECT instance FROM job_owners WHERE seen_at >= ?))''',
+                (now, MAX_ATTEMPTS, expired, MAX_ATTEMPTS, self._instance, expired)
+            )
+            row = db.execute(
+                f'''SELECT * FROM jobs
+                    WHERE kind IN ({placeholders})
+                      AND (secrets_owner IS NULL OR secrets_owner = ?)
+                      AND ((status = 'queued' AND run_at <= ?)
+                           OR (status = 'running' AND started_at < ?))
+                    ORDER BY run_at LIMIT 1''',
+                (*kinds, self._instance, now, expired)
+            ).fetchone()
+            token = None
+            if row is not None:
+                token = uuid.uuid4().hex
+                db.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, claim_token = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (now, token, row['id'])
+                )
+            db.execute('COMMIT')
+            return row, token
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        finally:
+            db.close()
+
+    def _finish(self, job_id, token, status, result=None, error=None):
+        # The payload is dropped once the job is finished so request data
+        # does not linger on disk
+        self._secrets.pop(job_id, None)
+        with self._db() as db:
+            cur = db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, payload = '{}', claim_token = NULL "
+                "WHERE id = ? AND claim_token = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, token)
+            )
+        if cur.rowcount == 0:
+            logging.error(f"Job {job_id} lost its lease before finishing; its result was discarded")
+
+    def _mark_alive(self, db):
+        db.execute(
+            'INSERT OR REPLACE INTO job_owners (instance, seen_at) VALUES (?, ?)', (self._instance, time.time())
+        )
+
+    def _heartbeat(self):
+        # Record that this process (and the secrets it holds) is still around,
+        # and renew the lease of every job it is running
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            with self._running_lock:
+                running = list(self._running.items())
+            try:
+                with self._db() as db:
+                    self._mark_alive(db)
+                    for job_id, token in running:
+                        db.execute(
+                            'UPDATE jobs SET started_at = ? WHERE id = ? AND claim_token = ?',
+                            (time.time(), job_id, token)
+                        )
+            except sqlite3.Error as e:
+                logging.error(f"Job heartbeat error: {e}")
+
+    def _run(self, row, token):
+        handler = self._handlers.get(row['kind'])
+        if handler is None:
+            self._finish(row['id'], token, 'failed', error=f"No handler registered for {row['kind']}")
+            return
+        payload = json.loads(row['payload'])
+        if row['secrets_owner'] is not None:
+            payload = _restore_secrets(payload, self._secrets.get(row['id'], []))
+        with self._running_lock:
+            self._running[row['id']] = token
+        try:
+            result = handler(payload)
+            # Handlers report a failed send as a SendResult rather than raising
+            if not send_failed(result):
+                self._finish(row['id'], token, 'done', result=result)
+            else:
+                outcome = result.get('result') if isinstance(result, dict) else result
+                self._finish(row['id'], token, 'failed', result=result, error=outcome.error)
+        except Exception as e:
+            logging.error(f"Job {row['id']} ({row['kind']}) failed: {e}")
+            self._finish(row['id'], token, 'failed', error=str(e))
+        finally:
+            with self._running_lock:
+                self._running.pop(row['id'], None)
+
+    def _worker(self):
+        while True:
+            try:
+                row, token = self._claim()
+            except sqlite3.Error as e:
+                logging.error(f"Job queue error: {e}")
+                row = None
+            if row is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+            self._run(row, token)
+
+    def start(self):
+        """
+        Start the worker threads (idempotent).
+        """
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            with self._db() as db:
+                db.execute(
+                    "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                    (time.time() - self.retention_seconds,)
+                )
+                db.execute('DELETE FROM job_owners WHERE seen_at < ?', (time.time() - self.retention_seconds,))
+                self._mark_alive(db)
+            for target in [self._worker] * self.workers + [self._heartbeat]:
+                t = threading.Thread(target=target, daemon=True)
+                t.start()
+                self._threads.append(t)
+
+
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """
+    Return the process-wide job queue, configured from environment variables.
+    """
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue(
+                db_path=os.getenv('JOBS_DB_PATH', 'jobs.db'),
+                workers=int(os.getenv('JOB_WORKERS', 4)),
+                lease_seconds=float(os.getenv('JOB_LEASE_SECONDS', 600)),
+            )
+        return _default_queue
+
+
+def wants_async(data):
+    """
+    Whether a request asked to be queued: `"async": true` in the JSON body,
+    `?async=1` on the URL, or ASYNC_JOBS=1 as the server-wide default.
+    """
+    flag = request.args.get('async')
+    if flag is None and isinstance(data, dict):
+        flag = data.get('async')
+    if flag is None:
+        flag = os.getenv('ASYNC_JOBS', '0')
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
+def dispatch(kind, handler, data):
+    """
+    Run `handler(data)` inline and return its JSON response, or, for async
+    requests, enqueue it as a `kind` job and return 202 with the job id.
+    """
+    if wants_async(data):
+        job_id = get_job_queue().enqueue(kind, data)
+        return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f'/api/jobs/{job_id}'}), 202
+    result = handler(data)
+    # Lets @idempotent release the key so a retry actually sends again
+    g.send_failed = send_failed(result)
+    return jsonify(result)
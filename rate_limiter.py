@@ -0,0 +1,234 @@
+import os
+import threading
+import time
+
+# ITU-T E.164 country calling codes of one and two digits; every other code has three
+_SHORT_COUNTRY_CODES = {'1', '7'} | set(
+    '20 27 30 31 32 33 34 36 39 40 41 43 44 45 46 47 48 49 51 52 53 54 55 56 57 58 '
+    '60 61 62 63 64 65 66 81 82 84 86 90 91 92 93 94 95 98'.split()
+)
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a send could not get its tokens within the allowed wait.
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    Args:
+        rate (float): Tokens added per second
+        capacity (float): Maximum burst size
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Take `tokens` tokens if they are available right now, without waiting.
+        Returns:
+            bool: Whether the tokens were taken
+        """
+        return _take_all([self], tokens) == 0
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Block until `tokens` tokens are available, then take them.
+        Returns:
+            bool: False if they would not be available within `timeout` seconds
+        """
+        return _acquire_all([self], tokens, timeout)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+# Guards the token counts of every bucket, so a send can take from several
+# buckets at once or from none of them
+_tokens_lock = threading.Lock()
+
+
+def _take_all(buckets, tokens):
+    """
+    Take `tokens` from every bucket if all of them have enough.
+    Returns:
+        float: 0 if the tokens were taken, otherwise seconds until they would be
+    """
+    with _tokens_lock:
+        wait = 0.0
+        for bucket in buckets:
+            bucket._refill()
+            if bucket._tokens < tokens:
+                wait = max(wait, (tokens - bucket._tokens) / bucket.rate)
+        if wait == 0:
+            for bucket in buckets:
+                bucket._tokens -= tokens
+        return wait
+
+
+def _acquire_all(buckets, tokens, timeout):
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wait = _take_all(buckets, tokens)
+        if wait == 0:
+            return True
+        # Give up straight away rather than sleep past the deadline
+        if deadline is not None and time.monotonic() + wait > deadline:
+            return False
+        time.sleep(wait)
+
+
+async def _acquire_all_async(buckets, tokens, timeout):
+    import asyncio
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wait = _take_all(buckets, tokens)
+        if wait == 0:
+            return True
+        if deadline is not None and time.monotonic() + wait > deadline:
+            return False
+        await asyncio.sleep(wait)
+
+
+def get_bucket(key, rate, capacity=None):
+    """
+    Return the shared bucket for `key`, creating it on first use.
+    """
+    with _buckets_lock:
+        if key not in _buckets:
+            _buckets[key] = TokenBucket(rate, capacity)
+        return _buckets[key]
+
+
+def destination(recipient):
+    """
+    Return the part of a recipient that receiving-side limits apply to: the
+    domain of an email address, or the country calling code of an E.164
+    phone number (a 'whatsapp:' prefix is ignored).
+    """
+    recipient = recipient.strip().lower()
+    if '@' in recipient:
+        return recipient.rsplit('@', 1)[1]
+    digits = ''.join(c for c in recipient if c.isdigit())
+    for length in (1, 2):
+        if digits[:length] in _SHORT_COUNTRY_CODES:
+            return '+' + digits[:length]
+    return '+' + digits[:3]
+
+
+class RateLimiter:
+    """
+    Paces sends per channel on two levels: the sender account (a Gmail
+    address or Twilio number) and the destination (recipient email domain or
+    phone country code). A send takes one token from the account bucket and
+    one from each destination bucket, all at once or not at all, so waiting
+    on a busy destination does not burn the account's budget.
+    Args:
+        limits (dict): channel -> {'account': rate, 'destination': rate}, in
+            tokens per second; a missing or zero rate is not limited
+        max_wait (float): Default seconds acquire() may block before giving up
+    """
+
+    def __init__(self, limits, max_wait=60):
+        self.limits = limits
+        self.max_wait = max_wait
+
+    def buckets(self, channel, account, recipients=None):
+        limits = self.limits.get(channel, {})
+        buckets = []
+        if limits.get('account'):
+            buckets.append(get_bucket((channel, 'account', account), limits['account']))
+        if limits.get('destination') and recipients:
+            if isinstance(recipients, str):
+                recipients = [recipients]
+            for dest in sorted({destination(r) for r in recipients}):
+                buckets.append(get_bucket((channel, 'destination', dest), limits['destination']))
+        return buckets
+
+    def try_acquire(self, channel, account, recipients=None):
+        """
+        Take a send slot if one is free right now, without waiting.
+        Returns:
+            bool: Whether the send may go ahead
+        """
+        return _take_all(self.buckets(channel, account, recipients), 1) == 0
+
+    def acquire(self, channel, account, recipients=None, timeout=None):
+        """
+        Block until a send slot is free.
+        Args:
+            channel (str): 'email', 'sms', 'call' or 'whatsapp'
+            account (str): Sending account
+            recipients (str or list): Recipient(s) of the message
+            timeout (float): Seconds to wait at most (default: max_wait)
+        Returns:
+            bool: False if no slot would be free within the timeout
+        """
+        timeout = self.max_wait if timeout is None else timeout
+        return _acquire_all(self.buckets(channel, account, recipients), 1, timeout)
+
+    async def acquire_async(self, channel, account, recipients=None, timeout=None):
+        """
+        Like acquire(), but waits with asyncio.sleep instead of blocking the thread.
+        """
+        timeout = self.max_wait if timeout is None else timeout
+        return await _acquire_all_async(self.buckets(channel, account, recipients), 1, timeout)
+
+
+_default_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Return the process-wide rate limiter, configured from the environment.
+    """
+    global _default_limiter
+    with _limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter({
+                'email': {
+                    'account': float(os.getenv('GMAIL_RATE_PER_MINUTE', 60)) / 60.0,
+                    'destination': float(os.getenv('EMAIL_DOMAIN_RATE_PER_MINUTE', 0)) / 60.0,
+                },
+                'sms': {
+                    'account': float(os.getenv('TWILIO_MESSAGES_PER_SECOND', 1)),
+                    'destination': float(os.getenv('SMS_COUNTRY_RATE_PER_SECOND', 0)),
+                },
+                'call': {
+                    'account': float(os.getenv('TWILIO_CALLS_PER_SECOND', 1)),
+                },
+                'whatsapp': {
+                    'account': float(os.getenv('WHATSAPP_MESSAGES_PER_SECOND', 10)),
+                    'destination': float(os.getenv('WHATSAPP_COUNTRY_RATE_PER_SECOND', 0)),
+                },
+            }, max_wait=float(os.getenv('RATE_LIMIT_MAX_WAIT', 60)))
+        return _default_limiter
+
+
+def throttle(channel, account, recipients=None):
+    """
+    Wait for a send slot on the shared limiter.
+    Raises:
+        RateLimitExceeded: If none was free within RATE_LIMIT_MAX_WAIT
+    """
+    if not get_rate_limiter().acquire(channel, account, recipients):
+        raise RateLimitExceeded(f"Rate limit for {account} exceeded, try again later")
+
+
+async def throttle_async(channel, account, recipients=None):
+    """
+    asyncio version of throttle().
+    """
+    if not await get_rate_limiter().acquire_async(channel, account, recipients):
+        raise RateLimitExceeded(f"Rate limit for {account} exceeded, try again later")
@@ -0,0 +1,316 @@
+import os
+import time
+import random
+import socket
+import smtplib
+import logging
+import threading
+from rate_limiter import RateLimitExceeded
+
+# Transport errors of optional libraries, matched by (module, name) so they
+# don't have to be imported here
+_TRANSIENT_ERRORS = {
+    ('requests.exceptions', 'ConnectionError'),
+    ('requests.exceptions', 'ConnectTimeout'),
+    ('paramiko.ssh_exception', 'NoValidConnectionsError'),
+    ('asyncssh.misc', 'ConnectionLost'),
+    ('asyncio.exceptions', 'TimeoutError'),
+}
+
+# Errors raised before a request left this process: the connection could not
+# be opened, so the provider cannot have acted on it
+_NOT_SENT_ERRORS = {
+    ('requests.exceptions', 'ConnectTimeout'),
+    ('urllib3.exceptions', 'NewConnectionError'),
+    ('aiohttp.client_exceptions', 'ClientConnectorError'),
+    ('paramiko.ssh_exception', 'NoValidConnectionsError'),
+    ('aiosmtplib.errors', 'SMTPConnectError'),
+}
+
+
+class CircuitOpen(Exception):
+    """
+    Raised instead of calling a provider whose circuit breaker is open.
+    """
+
+
+def is_transient(exc):
+    """
+    Whether `exc` is a temporary provider failure worth retrying: SMTP 4xx
+    replies and dropped connections, HTTP 429/5xx from Twilio, network
+    errors and timeouts.
+    """
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return bool(exc.recipients) and all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if type(exc).__module__.startswith('aiosmtplib') and isinstance(getattr(exc, 'code', None), int):
+        return 400 <= exc.code < 500
+    # TwilioRestException and aiohttp errors carry the HTTP status
+    status = getattr(exc, 'status', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(exc, (ConnectionError, TimeoutError, socket.timeout, smtplib.SMTPServerDisconnected)):
+        return True
+    return any((cls.__module__, cls.__name__) in _TRANSIENT_ERRORS for cls in type(exc).__mro__)
+
+
+def is_recipient_error(exc):
+    """
+    Whether `exc` was refused for particular recipients (bad mailbox,
+    greylisting) rather than because the provider itself is failing.
+    """
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return True
+    return type(exc).__module__.startswith('aiosmtplib') and type(exc).__name__ in (
+        'SMTPRecipientRefused', 'SMTPRecipientsRefused')
+
+
+def _not_sent(exc):
+    if isinstance(exc, (ConnectionRefusedError, socket.gaierror, smtplib.SMTPConnectError)):
+        return True
+    return any((cls.__module__, cls.__name__) in _NOT_SENT_ERRORS for cls in type(exc).__mro__)
+
+
+def before_send(exc):
+    """
+    Whether `exc` shows the provider never accepted the request, so sending
+    it again cannot deliver a duplicate: the connection could not be opened,
+    or the provider answered with an explicit refusal (an SMTP error reply,
+    HTTP 429). Dropped connections and timeouts are excluded, since the
+    request may already have been acted on. Pass as `retry_if` for sends
+    that aren't idempotent.
+    """
+    if isinstance(exc, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+        return True
+    if type(exc).__module__.startswith('aiosmtplib') and (
+            isinstance(getattr(exc, 'code', None), int) or type(exc).__name__ == 'SMTPRecipientsRefused'):
+        return True
+    status = getattr(exc, 'status', None)
+    if isinstance(status, int):
+        return status == 429
+    # requests wraps urllib3's connect error: ConnectionError(MaxRetryError(reason=...))
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if _not_sent(exc):
+            return True
+        reason = getattr(exc, 'reason', None)
+        if not isinstance(reason, BaseException) and exc.args and isinstance(exc.args[0], BaseException):
+            reason = exc.args[0]
+        exc = reason if isinstance(reason, BaseException) else exc.__cause__
+    return False
+
+
+class SendResult(str):
+    """
+    Outcome of a send. The value is the status message shown to the user,
+    so code and JSON responses that treat results as strings keep working;
+    the outcome itself is on the attributes.
+    Attributes:
+        ok (bool): Whether the message was accepted by the provider
+        error (str): What went wrong, for failures
+        retryable (bool): Whether sending again later may succeed
+        sid (str): Provider message/call ID, if any
+    """
+
+    def __new__(cls, text, ok=True, error=None, retryable=False, sid=None):
+        result = super().__new__(cls, text)
+        result.ok = ok
+        result.error = error
+        result.retryable = retryable
+        result.sid = sid
+        return result
+
+    @classmethod
+    def success(cls, text, sid=None):
+        return cls(text, sid=sid)
+
+    @classmethod
+    def failure(cls, text, error=None):
+        """
+        Failed result. `error` is the exception that caused it, if any.
+        """
+        if not isinstance(error, Exception):
+            return cls(text, ok=False, error=error or text)
+        retryable = is_transient(error) or isinstance(error, (CircuitOpen, RateLimitExceeded))
+        return cls(text, ok=False, error=str(error), retryable=retryable)
+
+
+def send_failed(result):
+    """
+    Whether a handler's return value reports a failed send: a failed
+    SendResult, on its own or as the 'result' of a response dict.
+    """
+    outcome = result.get('result') if isinstance(result, dict) else result
+    return getattr(outcome, 'ok', True) is False
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a provider after `failure_threshold` transient failures
+    in a row. While open, calls fail at once with CircuitOpen; after
+    `reset_timeout` seconds a single trial call is let through, which closes
+    the circuit again if it succeeds and reopens it if it fails.
+    Args:
+        name (str): Provider name used in errors and logs
+        failure_threshold (int): Consecutive transient failures that open the circuit
+        reset_timeout (float): Seconds to stay open before the trial call
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._trial or time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self):
+        """
+        Whether a call may go ahead now.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logging.info(f"Circuit for {self.name} closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or (self._opened_at is None and self._failures >= self.failure_threshold):
+                logging.warning(f"Circuit for {self.name} opened after {self._failures} failures")
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(key):
+    """
+    Return the shared circuit breaker for `key`, e.g. ('twilio', account_sid),
+    creating it on first use.
+    """
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(
+                ':'.join(str(part) for part in key) if isinstance(key, tuple) else str(key),
+                failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5)),
+                reset_timeout=float(os.getenv('CIRCUIT_RESET_TIMEOUT', 30)),
+            )
+        return _breakers[key]
+
+
+def backoff(attempt, base_delay, max_delay):
+    """
+    Delay before retry number `attempt`: exponential, with full jitter so
+    concurrent senders don't retry in lockstep.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def _settings(attempts):
+    if attempts is None:
+        attempts = int(os.getenv('RETRY_ATTEMPTS', 3))
+    return max(1, attempts), float(os.getenv('RETRY_BASE_DELAY', 0.5)), float(os.getenv('RETRY_MAX_DELAY', 8))
+
+
+def _should_retry(exc, breaker, retry_if):
+    transient = is_transient(exc)
+    if breaker:
+        # Any non-transient error (a bad number, wrong password) still means
+        # the provider answered, so it counts as a success for the breaker;
+        # so does a recipient-level refusal such as greylisting, or a run of
+        # them would open the circuit for every account on the host
+        if transient and not is_recipient_error(exc):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    return transient and (retry_if is None or retry_if(exc))
+
+
+def call_with_retry(func, breaker=None, attempts=None, retry_if=None):
+    """
+    Call `func()` and return its result, retrying transient failures with
+    jittered exponential backoff (RETRY_ATTEMPTS, RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY).
+    Args:
+        func (callable): The provider call, taking no arguments
+        breaker (CircuitBreaker): Breaker guarding the provider
+        attempts (int): Total attempts including the first
+        retry_if (callable): Extra check on a transient error before retrying it
+    Raises:
+        CircuitOpen: If the breaker is open
+        Exception: The first non-transient error, or the last one once attempts run out
+    """
+    attempts, base_delay, max_delay = _settings(attempts)
+    error = None
+    for attempt in range(1, attempts + 1):
+        if breaker and not breaker.allow():
+            # Opened while we were retrying: report the actual error
+            if attempt > 1:
+                raise error
+            raise CircuitOpen(f"{breaker.name} is unavailable after repeated failures, try again later")
+        try:
+            result = func()
+        except Exception as e:
+            if not _should_retry(e, breaker, retry_if) or attempt == attempts:
+                raise
+            error = e
+            delay = backoff(attempt, base_delay, max_delay)
+            logging.info(f"Transient error ({e}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+        else:
+            if breaker:
+                breaker.record_success()
+            return result
+
+
+async def call_with_retry_async(func, breaker=None, attempts=None, retry_if=None):
+    """
+    asyncio version of call_with_retry(); `func` returns an awaitable.
+    """
+    import asyncio
+    attempts, base_delay, max_delay = _settings(attempts)
+    error = None
+    for attempt in range(1, attempts + 1):
+        if breaker and not breaker.allow():
+            if attempt > 1:
+                raise error
+            raise CircuitOpen(f"{breaker.name} is unavailable after repeated failures, try again later")
+        try:
+            result = await func()
+        except Exception as e:
+            if not _should_retry(e, breaker, retry_if) or attempt == attempts:
+                raise
+            error = e
+            delay = backoff(attempt, base_delay, max_delay)
+            logging.info(f"Transient error ({e}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        else:
+            if breaker:
+                breaker.record_success()
+            return result
@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import heapq
+import uuid
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from credentials import get_credentials
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS scheduled_messages (
+    id TEXT PRIMARY KEY,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    send_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    fired_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_scheduled_status_send_at ON scheduled_messages (status, send_at);
+'''
+# Columns added after the first release, for databases created before them
+_MIGRATIONS = {
+    'heartbeat_at': 'ALTER TABLE scheduled_messages ADD COLUMN heartbeat_at REAL',
+}
+
+
+def _send_sms(payload):
+    from sms_call_utils import send_sms_twilio
+    return send_sms_twilio(*get_credentials().twilio, payload['to_number'], payload['message'])
+
+
+def _make_call(payload):
+    from sms_call_utils import make_call_twilio
+    return make_call_twilio(*get_credentials().twilio, payload['to_number'])
+
+
+def _send_email(payload):
+    from gmail_utils import send_gmail
+    return send_gmail(
+        *get_credentials().gmail,
+        payload['to_email'], payload['subject'], payload['message'], payload.get('is_html', False)
+    )
+
+
+def _send_whatsapp(payload):
+    from whatsapp_transport import get_transport
+    return get_transport(payload.get('transport')).send(payload['to_number'], payload['message'])
+
+
+# Channel name -> function(payload) performing the send. Provider modules are
+# imported on first dispatch so scheduling doesn't load every SDK. Credentials
+# come from the credential bundle at send time and are never persisted.
+CHANNELS = {
+    'sms': _send_sms,
+    'call': _make_call,
+    'email': _send_email,
+    'whatsapp': _send_whatsapp,
+}
+
+# Channel name -> payload fields its send function needs
+REQUIRED_FIELDS = {
+    'sms': ('to_number', 'message'),
+    'call': ('to_number',),
+    'email': ('to_email', 'subject', 'message'),
+    'whatsapp': ('to_number', 'message'),
+}
+
+
+def validate_payload(channel, payload):
+    """
+    Raise ValueError if `payload` can't be sent on `channel`, so a bad
+    request is rejected when it is scheduled rather than when it fires.
+    """
+    if channel not in CHANNELS:
+        raise ValueError(f"Unknown channel: {channel}. Available: {', '.join(CHANNELS)}")
+    if not isinstance(payload, dict):
+        raise ValueError("payload must be an object")
+    missing = [field for field in REQUIRED_FIELDS[channel] if not payload.get(field)]
+    if missing:
+        raise ValueError(f"Missing required fields for {channel}: {', '.join(missing)}")
+    if channel == 'whatsapp':
+        from whatsapp_transport import get_transport
+        get_transport(payload.get('transport'))
+
+
+def parse_send_at(value):
+    """
+    Parse a requested send time (ISO 8601 string or Unix timestamp) into a
+    Unix timestamp. Returns None for "as soon as possible". A trailing 'Z',
+    as produced by JavaScript's toISOString(), means UTC; so does a time
+    given without an offset, whatever the server's local timezone.
+    Raises:
+        ValueError: If the value is not a valid time
+    """
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid send_at: {value!r}")
+    text = value.strip()
+    # datetime.fromisoformat() only accepts 'Z' from Python 3.11
+    if text[-1:] in ('Z', 'z'):
+        text = text[:-1] + '+00:00'
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(
+            f"Invalid send_at: {value!r}; use ISO 8601 (e.g. 2024-05-01T09:00:00Z) or a Unix timestamp"
+        )
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class MessageScheduler:
+    """
+    Persistent scheduler for future sends.
+
+    Every scheduled message is stored in SQLite (indexed on status, send_at),
+    so pending sends survive restarts. Only messages due within `horizon`
+    seconds are held in an in-memory min-heap, which keeps memory flat with
+    millions pending while insert and fire stay O(log n). A timer thread pops
+    due entries and hands them to a worker pool. Each entry is claimed with a
+    conditional UPDATE before sending, so several processes can share one
+    database without double-sending. While a send runs (including while it
+    waits for the WhatsApp browser), a heartbeat renews its lease every
+    `lease_seconds / 3`.
+    Args:
+        db_path (str): SQLite database file
+        workers (int): Number of dispatch threads
+        horizon (float): How far ahead (seconds) entries are loaded into the heap
+        lease_seconds (float): A send whose lease went this long without a heartbeat is assumed lost and retried
+    """
+
+    def __init__(self, db_path='scheduler.db', workers=4, horizon=300, lease_seconds=600):
+        self.db_path = db_path
+        self.horizon = horizon
+        self.lease_seconds = lease_seconds
+        self._heap = []
+        self._cond = threading.Condition()
+        self._loaded_until = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._running = set()
+        self._running_lock = threading.Lock()
+        with self._db() as db:
+            db.executescript(_SCHEMA)
+            columns = {row['name'] for row in db.execute('PRAGMA table_info(scheduled_messages)')}
+            for column, sql in _MIGRATIONS.items():
+                if column not in columns:
+                    db.execute(sql)
+
+    @contextmanager
+    def _db(self):
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.row_factory = sqlite3.Row
+            yield db
+        finally:
+            db.close()
+
+    def schedule(self, channel, payload, send_at=None):
+        """
+        Persist a send for `channel` at `send_at` (Unix timestamp, default now).
+        Returns the scheduled message id.
+        Raises:
+            ValueError: If the payload is missing fields the channel needs
+        """
+        validate_payload(channel, payload)
+        message_id = uuid.uuid4().hex
+        now = time.time()
+        send_at = send_at or now
+        with self._db() as db:
+            db.execute(
+                'INSERT INTO scheduled_messages (id, channel, payload, send_at, status, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (message_id, channel, json.dumps(payload), send_at, 'pending', now)
+            )
+        self.start()
+        with self._cond:
+            if send_at <= self._loaded_until:
+                heapq.heappush(self._heap, (send_at, message_id))
+                self._cond.notify()
+        return message_id
+
+    def cancel(self, message_id):
+        """
+        Cancel a pending send. Returns True if it was still pending.
+        """
+        with self._db() as db:
+            cur = db.execute(
+                "UPDATE scheduled_messages SET status = 'cancelled', payload = '{}', finished_at = ? "
+                "WHERE id = ? AND status = 'pending'",
+                (time.time(), message_id)
+            )
+        return cur.rowcount == 1
+
+    def get(self, message_id):
+        """
+        Return the scheduled message as a dict, or None.
+        """
+        with self._db() as db:
+            row = db.execute('SELECT * FROM scheduled_messages WHERE id = ?', (message_id,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        del entry['payload']
+        return entry
+
+    def _load_window(self):
+        """
+        Pull pending entries due before now + horizon into the heap.
+        """
+        until = time.time() + self.horizon
+        # Advance the window first so concurrent schedule() calls push their
+        # entries straight onto the heap rather than slipping between the
+        # query and the update
+        with self._cond:
+            self._loaded_until = until
+        with self._db() as db:
+            rows = db.execute(
+                "SELECT id, send_at FROM scheduled_messages WHERE status = 'pending' AND send_at <= ? "
+                "ORDER BY send_at",
+                (until,)
+            ).fetchall()
+        with self._cond:
+            queued = {message_id for _, message_id in self._heap}
+            for row in rows:
+                if row['id'] not in queued:
+                    heapq.heappush(self._heap, (row['send_at'], row['id']))
+
+    def _claim(self, message_id):
+        with self._db() as db:
+            db.execute('BEGIN IMMEDIATE')
+            row = db.execute(
+                "SELECT * FROM scheduled_messages WHERE id = ? AND status = 'pending'", (message_id,)
+            ).fetchone()
+            if row is not None:
+                now = time.time()
+                db.execute(
+                    "UPDATE scheduled_messages SET status = 'running', fired_at = ?, heartbeat_at = ? WHERE id = ?",
+                    (now, now, message_id)
+                )
+            db.execute('COMMIT')
+        return row
+
+    def _finish(self, message_id, status, result=None, error=None):
+        with self._db() as db:
+            db.execute(
+                "UPDATE scheduled_messages SET status = ?, result = ?, error = ?, finished_at = ?, payload = '{}' "
+                "WHERE id = ?",
+                (status, result, error, time.time(), message_id)
+            )
+
+    def _dispatch(self, message_id):
+        try:
+            row = self._claim(message_id)
+        except sqlite3.Error as e:
+            logging.error(f"Scheduler claim error for {message_id}: {e}")
+            return
+        if row is None:
+            # Cancelled, or already fired by another process
+            return
+        with self._running_lock:
+            self._running.add(message_id)
+        try:
+            result = CHANNELS[row['channel']](json.loads(row['payload']))
+            if getattr(result, 'ok', True):
+                self._finish(message_id, 'sent', result=str(result))
+            else:
+                self._finish(message_id, 'failed', result=str(result), error=result.error)
+        except Exception as e:
+            logging.error(f"Scheduled {row['channel']} send {message_id} failed: {e}")
+            self._finish(message_id, 'failed', error=str(e))
+        finally:
+            with self._running_lock:
+                self._running.discard(message_id)
+
+    def _heartbeat(self):
+        # Renew the lease of every send this process is running, so a send
+        # queued behind a slow one (e.g. the single WhatsApp browser) isn't
+        # taken for lost and sent again by a restarting process
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            with self._running_lock:
+                running = list(self._running)
+            if not running:
+                continue
+            try:
+                with self._db() as db:
+                    db.executemany(
+                        "UPDATE scheduled_messages SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                        [(time.time(), message_id) for message_id in running]
+                    )
+            except sqlite3.Error as e:
+                logging.error(f"Scheduler heartbeat error: {e}")
+
+    def _run(self):
+        while True:
+            if time.time() >= self._loaded_until - self.horizon / 2:
+                try:
+                    self._load_window()
+                except sqlite3.Error as e:
+                    logging.error(f"Scheduler load error: {e}")
+            with self._cond:
+                now = time.time()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[1])
+                if not due:
+                    next_at = self._heap[0][0] if self._heap else self._loaded_until
+                    wait = min(next_at, self._loaded_until - self.horizon / 2) - now
+                    self._cond.wait(timeout=max(0.05, min(wait, self.horizon)))
+            for message_id in due:
+                self._executor.submit(self._dispatch, message_id)
+
+    def start(self):
+        """
+        Start the timer and heartbeat threads (idempotent). Sends left
+        'running' by a crashed process, with no heartbeat for longer than the
+        lease, are put back to 'pending'.
+        """
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            with self._db() as db:
+                db.execute(
+                    "UPDATE scheduled_messages SET status = 'pending' "
+                    "WHERE status = 'running' AND COALESCE(heartbeat_at, fired_at) < ?",
+                    (time.time() - self.lease_seconds,)
+                )
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            threading.Thread(target=self._heartbeat, daemon=True).start()
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    Return the process-wide scheduler, configured from environment variables.
+    """
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = MessageScheduler(
+                db_path=os.getenv('SCHEDULER_DB_PATH', 'scheduler.db'),
+                workers=int(os.getenv('SCHEDULER_WORKERS', 4)),
+                horizon=float(os.getenv('SCHEDULER_HORIZON', 300)),
+            )
+        return _default_scheduler
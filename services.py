@@ -0,0 +1,65 @@
+import importlib
+import importlib.util
+import threading
+
+
+class LazyService:
+    """
+    A provider module that is only imported the first time one of its
+    attributes is used, so starting the app doesn't pay for SDKs (twilio,
+    instagrapi, paramiko, pywhatkit, ...) that no request has needed yet.
+    Args:
+        name (str): Service name reported by the API
+        module (str): Module implementing the service
+        requires (tuple): Top-level packages it needs, probed for `available`
+    """
+
+    def __init__(self, name, module, requires=()):
+        self.name = name
+        self.module = module
+        self.requires = tuple(requires)
+        self._module = None
+        self._available = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        """
+        Whether the service's dependencies are installed, checked with
+        importlib.util.find_spec (nothing is imported).
+        """
+        if self._available is None:
+            self._available = all(
+                importlib.util.find_spec(name) is not None for name in (self.module, *self.requires)
+            )
+        return self._available
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self.module)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+SERVICES = {}
+
+
+def register_service(name, module, requires=()):
+    SERVICES[name] = LazyService(name, module, requires)
+    return SERVICES[name]
+
+
+def get_service(name):
+    return SERVICES[name]
+
+
+register_service('sms', 'sms_call_utils', ('twilio',))
+register_service('instagram', 'instagram_utils', ('instagrapi',))
+register_service('ssh', 'website_scraper', ('paramiko',))
+register_service('whatsapp', 'whatsapp_transport')
+register_service('gmail', 'gmail_utils')
+
@@ -1,6 +1,10 @@
 import os
 import logging
-from twilio.rest import Client
+from twilio_client import get_twilio_client
+from rate_limiter import throttle
+from resilience import SendResult, before_send, call_with_retry, get_breaker
+from delivery_log import log_delivery
+from batching import clamp_workers, run_bounded
 
 def send_sms_twilio(account_sid, auth_token, twilio_number, to_number, message):
     """
@@ -12,19 +16,23 @@ def send_sms_twilio(account_sid, auth_token, twilio_number, to_number, message):
         to_number (str): Recipient phone number (E.164 format)
         message (str): SMS message body
     Returns:
-        str: Success or error message
+        SendResult: Success or error message, with ok/error/retryable attributes
     """
     try:
-        client = Client(account_sid, auth_token)
-        message_obj = client.messages.create(
+        throttle('sms', twilio_number, to_number)
+        client = get_twilio_client(account_sid, auth_token)
+        # POSTs aren't idempotent: only retry failures that happened before Twilio got the request
+        message_obj = call_with_retry(lambda: client.messages.create(
             body=message,
             from_=twilio_number,
             to=to_number
-        )
-        return f"✅ SMS sent successfully! SID: {message_obj.sid}"
+        ), breaker=get_breaker(('twilio', account_sid)), retry_if=before_send)
+        log_delivery('sms', to_number, 'sent', sid=message_obj.sid)
+        return SendResult.success(f"✅ SMS sent successfully! SID: {message_obj.sid}", sid=message_obj.sid)
     except Exception as e:
         logging.error(f"Twilio SMS error: {e}")
-        return f"Error sending SMS: {e}"
+        log_delivery('sms', to_number, 'failed', error=str(e))
+        return SendResult.failure(f"Error sending SMS: {e}", e)
 
 def make_call_twilio(account_sid, auth_token, twilio_number, to_number, twiml_url="http://demo.twilio.com/docs/voice.xml"):
     """
@@ -36,16 +44,46 @@ def make_call_twilio(account_sid, auth_token, twilio_number, to_number, twiml_ur
         to_number (str): Recipient phone number (E.164 format)
         twiml_url (str): URL to TwiML instructions for the call
     Returns:
-        str: Success or error message
+        SendResult: Success or error message, with ok/error/retryable attributes
     """
     try:
-        client = Client(account_sid, auth_token)
-        call = client.calls.create(
+        throttle('call', twilio_number, to_number)
+        client = get_twilio_client(account_sid, auth_token)
+        # POSTs aren't idempotent: only retry failures that happened before Twilio got the request
+        call = call_with_retry(lambda: client.calls.create(
             to=to_number,
             from_=twilio_number,
             url=twiml_url
-        )
-        return f"✅ Call initiated successfully! SID: {call.sid}"
+        ), breaker=get_breaker(('twilio', account_sid)), retry_if=before_send)
+        log_delivery('call', to_number, 'sent', sid=call.sid)
+        return SendResult.success(f"✅ Call initiated successfully! SID: {call.sid}", sid=call.sid)
     except Exception as e:
         logging.error(f"Twilio call error: {e}")
-        return f"Error making call: {e}" 
\ No newline at end of file
+        log_delivery('call', to_number, 'failed', error=str(e))
+        return SendResult.failure(f"Error making call: {e}", e)
+
+def send_sms_batch(account_sid, auth_token, twilio_number, messages, max_workers=None):
+    """
+    Send many SMS concurrently. Each send is paced by the shared rate limiter
+    to the sending number's throughput limit (TWILIO_MESSAGES_PER_SECOND).
+    Args:
+        account_sid (str): Twilio Account SID
+        auth_token (str): Twilio Auth Token
+        twilio_number (str): Twilio phone number (E.164 format)
+        messages (iterable): (to_number, message) pairs
+        max_workers (int): Concurrent Twilio requests, capped at SMS_BATCH_WORKERS (the default)
+    Returns:
+        iterator: {'to_number', 'status', 'result'} for each recipient, in completion order
+    Raises:
+        ValueError: If max_workers is not a positive integer
+    """
+    # Checked up front, before the caller starts consuming results
+    max_workers = clamp_workers(max_workers, int(os.getenv('SMS_BATCH_WORKERS', 8)))
+
+    def send(item):
+        to_number, message = item
+        result = send_sms_twilio(account_sid, auth_token, twilio_number, to_number, message)
+        status = 'sent' if result.ok else 'failed'
+        return {'to_number': to_number, 'status': status, 'result': result}
+
+    return run_bounded(send, messages, max_workers)
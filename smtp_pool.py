@@ -0,0 +1,238 @@
+import os
+import hashlib
+import smtplib
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolExhausted(Exception):
+    """
+    Raised when no pooled connection for an account became free within the
+    pool's acquire timeout.
+    """
+
+
+class DeliveryUnknown(smtplib.SMTPException):
+    """
+    Raised when the connection dropped after a message's DATA command went
+    out, so the server may have accepted it. Never retried, to avoid
+    delivering the message twice.
+    """
+
+
+class _SMTP(smtplib.SMTP):
+    """
+    smtplib.SMTP that notes when the current message's DATA command was sent.
+    """
+
+    data_started = False
+
+    def data(self, msg):
+        self.data_started = True
+        return super().data(msg)
+
+
+class PooledSMTPConnection:
+    """
+    A logged-in SMTP connection owned by an SMTPConnectionPool.
+    Tracks how many messages it has sent and when it was last used.
+    """
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+        self.broken = False
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        """
+        Raises:
+            DeliveryUnknown: If the connection dropped once the message was being sent
+        """
+        self.smtp.data_started = False
+        try:
+            refused = self.smtp.sendmail(from_addr, to_addrs, msg)
+        except OSError as e:
+            # SMTP error replies are OSErrors too, but only a dropped
+            # connection (or one the server closed with a 421) is unusable
+            if (isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException)
+                    or self.smtp.sock is None):
+                self.broken = True
+            if isinstance(e, smtplib.SMTPServerDisconnected) and self.smtp.data_started:
+                raise DeliveryUnknown(f"Connection lost while sending the message, it may have been delivered: {e}") from e
+            raise
+        self.messages_sent += 1
+        self.last_used = time.monotonic()
+        return refused
+
+    def is_alive(self):
+        try:
+            code, _ = self.smtp.noop()
+            return code == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            try:
+                self.smtp.close()
+            except Exception:
+                pass
+
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of authenticated SMTP connections, keyed by sender account.
+    Args:
+        host (str): SMTP server host
+        port (int): SMTP server port
+        use_tls (bool): Whether to run STARTTLS after connecting
+        max_connections (int): Maximum open connections per sender account
+        max_messages_per_connection (int): Recycle a connection after this many sends
+        noop_interval (float): Seconds of idleness after which a NOOP keep-alive check is run
+        idle_timeout (float): Seconds of idleness after which a connection is dropped
+        timeout (float): Socket timeout for SMTP operations
+        acquire_timeout (float): Seconds to wait for a free connection before raising PoolExhausted
+    """
+
+    def __init__(self, host='smtp.gmail.com', port=587, use_tls=True, max_connections=4,
+                 max_messages_per_connection=100, noop_interval=30, idle_timeout=300, timeout=30,
+                 acquire_timeout=30):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.max_connections = max_connections
+        self.max_messages_per_connection = max_messages_per_connection
+        self.noop_interval = noop_interval
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._slots = {}
+
+    def _key(self, sender_email, sender_password):
+        # Hash the password so it isn't kept in the key in clear text
+        return (sender_email, hashlib.sha256(sender_password.encode()).hexdigest())
+
+    def _slot(self, key):
+        with self._lock:
+            if key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(self.max_connections)
+                self._idle[key] = deque()
+            return self._slots[key]
+
+    def _open(self, sender_email, sender_password):
+        smtp = _SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+            # Local stand-in servers (aiosmtpd/smtpd) usually don't offer AUTH
+            if smtp.has_extn('auth'):
+                smtp.login(sender_email, sender_password)
+        except Exception:
+            smtp.close()
+            raise
+        return PooledSMTPConnection(smtp)
+
+    def _checkout(self, key, sender_email, sender_password):
+        while True:
+            with self._lock:
+                conn = self._idle[key].pop() if self._idle[key] else None
+            if conn is None:
+                return self._open(sender_email, sender_password)
+            idle_for = time.monotonic() - conn.last_used
+            if idle_for > self.idle_timeout:
+                conn.close()
+                continue
+            if idle_for > self.noop_interval and not conn.is_alive():
+                logging.info(f"Dropping stale SMTP connection for {sender_email}")
+                conn.close()
+                continue
+            return conn
+
+    def _checkin(self, key, conn):
+        if conn.broken or conn.messages_sent >= self.max_messages_per_connection:
+            conn.close()
+            return
+        with self._lock:
+            self._idle[key].append(conn)
+
+    @contextmanager
+    def connection(self, sender_email, sender_password):
+        """
+        Borrow a logged-in connection for sender_email. Blocks while the
+        account already has max_connections connections checked out.
+        Raises:
+            PoolExhausted: If none was free within acquire_timeout
+        """
+        key = self._key(sender_email, sender_password)
+        slot = self._slot(key)
+        if not slot.acquire(timeout=self.acquire_timeout):
+            raise PoolExhausted(
+                f"All {self.max_connections} SMTP connections for {sender_email} are busy, try again later"
+            )
+        conn = None
+        try:
+            conn = self._checkout(key, sender_email, sender_password)
+            yield conn
+        finally:
+            if conn is not None:
+                self._checkin(key, conn)
+            slot.release()
+
+    def sendmail(self, sender_email, sender_password, recipients, msg):
+        """
+        Send a single serialized message, retrying once on a fresh connection
+        if the pooled one turned out to be disconnected before the message
+        went out. Callers retrying on top of this should pass
+        resilience.before_send as `retry_if`, so disconnects aren't retried twice.
+        """
+        for attempt in range(2):
+            try:
+                with self.connection(sender_email, sender_password) as conn:
+                    return conn.sendmail(sender_email, recipients, msg)
+            except smtplib.SMTPServerDisconnected:
+                if attempt:
+                    raise
+                logging.info(f"SMTP connection for {sender_email} went away, reconnecting")
+
+    def close_all(self):
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            for conns in self._idle.values():
+                conns.clear()
+        for conn in idle:
+            conn.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_smtp_pool():
+    """
+    Return the process-wide SMTP pool, configured from environment variables.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SMTPConnectionPool(
+                host=os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+                port=int(os.getenv('SMTP_PORT', 587)),
+                use_tls=os.getenv('SMTP_USE_TLS', '1').lower() not in ('0', 'false', 'no'),
+                max_connections=int(os.getenv('SMTP_POOL_SIZE', 4)),
+                max_messages_per_connection=int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', 100)),
+                noop_interval=float(os.getenv('SMTP_NOOP_INTERVAL', 30)),
+                idle_timeout=float(os.getenv('SMTP_IDLE_TIMEOUT', 300)),
+                acquire_timeout=float(os.getenv('SMTP_POOL_ACQUIRE_TIMEOUT', 30)),
+            )
+        return _default_pool
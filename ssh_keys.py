@@ -0,0 +1,51 @@
+import os
+import threading
+import paramiko
+
+# Key classes tried in order when a key file is loaded for the first time
+_KEY_TYPES = (paramiko.RSAKey, paramiko.Ed25519Key, paramiko.ECDSAKey)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_private_key(key_path, passphrase=None):
+    """
+    Load a private key file, parsing (and for encrypted keys, decrypting) it
+    only once per process. Entries are keyed by path and invalidated when the
+    file's mtime or size changes; the key type that worked is remembered so
+    reloads after a change try it first.
+    Args:
+        key_path (str): Path to the private key file
+        passphrase (str): Passphrase for encrypted keys (default: SSH_KEY_PASSPHRASE)
+    Returns:
+        paramiko.PKey
+    """
+    if passphrase is None:
+        passphrase = os.getenv('SSH_KEY_PASSPHRASE') or None
+    path = os.path.abspath(key_path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        entry = _cache.get(path)
+    if entry and entry['version'] == version:
+        return entry['key']
+
+    preferred = entry['type'] if entry else None
+    key_types = ((preferred,) if preferred else ()) + tuple(t for t in _KEY_TYPES if t is not preferred)
+    last_error = None
+    for key_type in key_types:
+        try:
+            key = key_type.from_private_key_file(path, password=passphrase)
+            break
+        except paramiko.PasswordRequiredException:
+            raise
+        except (paramiko.SSHException, ValueError) as e:
+            last_error = e
+    else:
+        raise paramiko.SSHException(f"Unsupported or invalid private key: {last_error}")
+
+    with _cache_lock:
+        _cache[path] = {'version': version, 'type': key_type, 'key': key}
+    return key
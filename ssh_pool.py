@@ -0,0 +1,156 @@
+import os
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+import paramiko
+
+
+class SSHConnectionPool:
+    """
+    Pool of authenticated SSH clients keyed by (ip, username, auth method).
+    New commands open a fresh channel on an existing transport, so repeat
+    commands against the same host skip key exchange and authentication.
+
+    Callers hold a client with checkout() (or acquire()/release()) for as
+    long as they use it, including while a streamed command's channel is
+    open; only clients nobody holds are reaped once idle.
+    Args:
+        idle_timeout (float): Seconds a client may sit unheld before it is closed
+        keepalive (int): Transport keepalive interval in seconds (0 disables)
+        connect_timeout (float): Timeout for establishing new connections
+    """
+
+    def __init__(self, idle_timeout=300, keepalive=30, connect_timeout=10):
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self._lock = threading.Lock()
+        # key -> [client, last_used, holders]
+        self._clients = {}
+        self._key_locks = {}
+        self._held = {}
+
+    def _key(self, ip, username, password, pkey):
+        if password:
+            # Hash the password so it isn't kept in the key in clear text
+            auth = ('password', hashlib.sha256(password.encode()).hexdigest())
+        else:
+            auth = ('key', pkey.get_fingerprint().hex())
+        return (ip, username, auth)
+
+    def _connect(self, ip, username, password, pkey):
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        if password:
+            client.connect(hostname=ip, username=username, password=password, timeout=self.connect_timeout)
+        else:
+            client.connect(hostname=ip, username=username, pkey=pkey, timeout=self.connect_timeout)
+        if self.keepalive:
+            client.get_transport().set_keepalive(self.keepalive)
+        return client
+
+    def _reap_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (_, last_used, holders) in self._clients.items()
+                       if not holders and now - last_used > self.idle_timeout]
+            clients = [self._clients.pop(k)[0] for k in expired]
+        for client in clients:
+            client.close()
+
+    def get_client(self, ip, username, password=None, pkey=None):
+        """
+        Return a connected paramiko.SSHClient for these credentials, reusing
+        a live pooled transport when there is one. The client is not held;
+        use checkout() to run commands on it.
+        """
+        return self._get(ip, username, password, pkey, hold=False)
+
+    def acquire(self, ip, username, password=None, pkey=None):
+        """
+        Like get_client(), but hold the client until release(client).
+        """
+        return self._get(ip, username, password, pkey, hold=True)
+
+    def release(self, client):
+        with self._lock:
+            key = self._held.get(client)
+            entry = self._clients.get(key)
+            if entry and entry[0] is client:
+                entry[1] = time.monotonic()
+                entry[2] -= 1
+                if entry[2] <= 0:
+                    del self._held[client]
+            else:
+                # Replaced or discarded while held
+                self._held.pop(client, None)
+
+    @contextmanager
+    def checkout(self, ip, username, password=None, pkey=None):
+        client = self.acquire(ip, username, password, pkey)
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def _get(self, ip, username, password, pkey, hold):
+        self._reap_idle()
+        key = self._key(ip, username, password, pkey)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Serialize connects per key so concurrent callers share one handshake
+        with key_lock:
+            with self._lock:
+                entry = self._clients.get(key)
+            client = entry[0] if entry else None
+            transport = client.get_transport() if client else None
+            if transport is None or not transport.is_active():
+                if client is not None:
+                    client.close()
+                client = self._connect(ip, username, password, pkey)
+                entry = [client, time.monotonic(), 0]
+            with self._lock:
+                entry[1] = time.monotonic()
+                if hold:
+                    entry[2] += 1
+                    self._held[client] = key
+                self._clients[key] = entry
+            return client
+
+    def discard(self, ip, username, password=None, pkey=None):
+        """
+        Close and forget the pooled client for these credentials.
+        """
+        key = self._key(ip, username, password, pkey)
+        with self._lock:
+            entry = self._clients.pop(key, None)
+        if entry:
+            entry[0].close()
+
+    def close_all(self):
+        with self._lock:
+            clients = [entry[0] for entry in self._clients.values()]
+            self._clients.clear()
+            self._held.clear()
+        for client in clients:
+            client.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_ssh_pool():
+    """
+    Return the process-wide SSH pool, configured from environment variables.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SSHConnectionPool(
+                idle_timeout=float(os.getenv('SSH_IDLE_TIMEOUT', 300)),
+                keepalive=int(os.getenv('SSH_KEEPALIVE', 30)),
+                connect_timeout=float(os.getenv('SSH_CONNECT_TIMEOUT', 10)),
+            )
+        return _default_pool
@@ -3,6 +3,7 @@ SSH remote execution using Paramiko.
 """
 
 import paramiko
+from ssh_keys import load_private_key
 
 def ssh_execute_command(host: str, username: str, command: str, password=None, key_file=None) -> str:
     try:
@@ -10,7 +11,7 @@ def ssh_execute_command(host: str, username: str, command: str, password=None, k
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
         if key_file:
-            key = paramiko.RSAKey.from_private_key_file(key_file)
+            key = load_private_key(key_file)
             ssh.connect(hostname=host, username=username, pkey=key)
         else:
             ssh.connect(hostname=host, username=username, password=password)
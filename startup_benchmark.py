@@ -0,0 +1,76 @@
+"""
+Measure how long importing the web app takes in a fresh interpreter and fail
+if it exceeds the budget or eagerly loads a provider SDK.
+
+Usage:
+    python startup_benchmark.py [module] [--runs N] [--budget-ms MS]
+
+Exits non-zero when the median import time is over budget
+(STARTUP_IMPORT_BUDGET_MS, default 1000) or any heavy provider package is
+imported at startup.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+# Packages that must only be imported when their route is first used
+HEAVY_MODULES = ('twilio', 'instagrapi', 'paramiko', 'pywhatkit', 'PIL')
+
+_PROBE = '''
+import sys, time, json, os
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed_ms": elapsed * 1000,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+sys.stdout.flush()
+# Skip waiting on the app's worker threads
+os._exit(0)
+'''
+
+
+def measure(module, repo_dir, timeout=60):
+    # Run in a scratch directory so the app's SQLite/log files don't land in the repo;
+    # the timeout turns a startup that hangs into a failure
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [repo_dir, os.getenv('PYTHONPATH')])))
+        out = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=scratch, env=env, capture_output=True, text=True, check=True, timeout=timeout
+        ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Enforce the app import-time budget')
+    parser.add_argument('module', nargs='?', default='app_simple')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('STARTUP_IMPORT_BUDGET_MS', 1000)))
+    args = parser.parse_args()
+
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    samples = [measure(args.module, repo_dir) for _ in range(args.runs)]
+    median = statistics.median(s['elapsed_ms'] for s in samples)
+    heavy = sorted({m for s in samples for m in s['heavy']})
+
+    print(f"import {args.module}: median {median:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if median > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    if heavy:
+        print(f"FAIL: provider packages imported at startup: {', '.join(heavy)}")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import os
+import sys
+import socket
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the logs and databases the modules create out of the working tree,
+# and make retries fast
+_data_dir = tempfile.mkdtemp(prefix='menu-dashboard-tests-')
+os.environ.update({
+    'DELIVERY_LOG_PATH': os.path.join(_data_dir, 'delivery_log.jsonl'),
+    'DELIVERY_DB_PATH': os.path.join(_data_dir, 'deliveries.db'),
+    'JOBS_DB_PATH': os.path.join(_data_dir, 'jobs.db'),
+    'SCHEDULER_DB_PATH': os.path.join(_data_dir, 'scheduler.db'),
+    'RETRY_ATTEMPTS': '2',
+    'RETRY_BASE_DELAY': '0.01',
+    'RETRY_MAX_DELAY': '0.05',
+})
+
+import resilience  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class RecordingHandler:
+    """
+    aiosmtpd handler that keeps every delivered message and refuses the
+    recipients listed in `refuse` with the given reply. With
+    `drop_after_data`, it keeps the message but hangs up instead of replying.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.refuse = {}
+        self.drop_after_data = False
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse:
+            return self.refuse[address]
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append({
+            'peer': session.peer,
+            'from': envelope.mail_from,
+            'to': list(envelope.rcpt_tos),
+            'content': envelope.content.decode('utf-8', 'replace'),
+        })
+        if self.drop_after_data:
+            server.transport.close()
+        return '250 Message accepted for delivery'
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    resilience._breakers.clear()
+    yield
+    resilience._breakers.clear()
+
+
+@pytest.fixture
+def smtp_server():
+    """
+    A local aiosmtpd server; yields (host, port, handler).
+    """
+    from aiosmtpd.controller import Controller
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    try:
+        yield controller.hostname, controller.port, handler
+    finally:
+        controller.stop()
+
+
+@pytest.fixture
+def smtp_pool(smtp_server):
+    from smtp_pool import SMTPConnectionPool
+    host, port, _ = smtp_server
+    pool = SMTPConnectionPool(host=host, port=port, use_tls=False, timeout=5)
+    yield pool
+    pool.close_all()
+
+
+class SSHServerState:
+    """
+    What the ssh_server fixture saw: accepted connections and commands run.
+    Commands are answered as `echo <text>` -> stdout, anything else -> stderr.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.commands = []
+
+
+@pytest.fixture
+def ssh_server():
+    """
+    A local asyncssh server accepting user/secret; yields (host, port, state).
+    """
+    import asyncio
+    import threading
+    asyncssh = pytest.importorskip('asyncssh')
+    state = SSHServerState()
+
+    class Server(asyncssh.SSHServer):
+        def connection_made(self, conn):
+            state.connections += 1
+
+        def begin_auth(self, username):
+            return True
+
+        def password_auth_supported(self):
+            return True
+
+        def validate_password(self, username, password):
+            return (username, password) == ('user', 'secret')
+
+    def handle(process):
+        state.commands.append(process.command)
+        if process.command.startswith('echo '):
+            process.stdout.write(process.command[len('echo '):] + '\n')
+        else:
+            process.stderr.write(f'unknown command: {process.command}\n')
+        process.exit(0)
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    port = free_port()
+
+    async def listen():
+        return await asyncssh.listen(
+            '127.0.0.1', port, server_factory=Server, process_factory=handle,
+            server_host_keys=[asyncssh.generate_private_key('ssh-ed25519')],
+        )
+
+    listener = asyncio.run_coroutine_threadsafe(listen(), loop).result(10)
+    try:
+        yield '127.0.0.1', port, state
+    finally:
+        listener.close()
+        asyncio.run_coroutine_threadsafe(listener.wait_closed(), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
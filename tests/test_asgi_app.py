@@ -0,0 +1,128 @@
+import json
+import asyncio
+import pytest
+import credentials
+from credentials import Credentials
+
+pytest.importorskip('asgiref')
+
+
+def call_asgi(app, path, payload, headers=()):
+    """
+    POST `payload` as JSON to an ASGI app; returns (status, parsed body).
+    """
+    body = json.dumps(payload).encode()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': b'',
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+                    *headers],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 12345),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = next(m['status'] for m in sent if m['type'] == 'http.response.start')
+    content = b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+    return status, json.loads(content)
+
+
+@pytest.fixture
+def no_credentials(monkeypatch):
+    monkeypatch.setattr(credentials, '_current', Credentials({}))
+
+
+@pytest.mark.parametrize('path, payload', [
+    ('/api/send_sms', {'to_number': '+15550100', 'message': 'hi'}),
+    ('/api/send_whatsapp_twilio', {'to_number': '+15550100', 'message': 'hi'}),
+    ('/api/send_gmail', {'to_email': 'r@example.com', 'subject': 's', 'message': 'hi'}),
+])
+def test_missing_credentials_are_rejected_alike_by_both_servers(no_credentials, path, payload):
+    import asgi_app
+    if path not in asgi_app.NATIVE_ROUTES:
+        pytest.skip(f'{path} is not served natively here')
+    flask_response = asgi_app.flask_app.test_client().post(path, json=payload)
+    status, body = call_asgi(asgi_app.app, path, payload)
+    assert (status, body) == (flask_response.status_code, flask_response.get_json())
+    assert status == 400
+
+
+def call_asgi_get(app, path):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': b'',
+        'headers': [], 'server': ('testserver', 80), 'client': ('127.0.0.1', 12345),
+    }
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = next(m['status'] for m in sent if m['type'] == 'http.response.start')
+    return status, json.loads(b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body'))
+
+
+@pytest.fixture
+def gmail_over_asgi(monkeypatch, smtp_server):
+    pytest.importorskip('aiosmtplib')
+    import asgi_app
+    import async_smtp_pool
+    import rate_limiter
+    from async_smtp_pool import AsyncSMTPConnectionPool
+    from rate_limiter import RateLimiter
+    host, port, handler = smtp_server
+    if '/api/send_gmail' not in asgi_app.NATIVE_ROUTES:
+        pytest.skip('send_gmail is not served natively here')
+    monkeypatch.setattr(credentials, '_current', Credentials({
+        'GMAIL_ADDRESS': 'sender@example.com', 'GMAIL_APP_PASSWORD': 'secret',
+    }))
+    monkeypatch.setattr(rate_limiter, '_default_limiter', RateLimiter({}))
+    # A fresh pool per test: each asyncio.run() has its own event loop
+    monkeypatch.setattr(async_smtp_pool, '_default_pool', None)
+    monkeypatch.setattr(async_smtp_pool, 'get_async_smtp_pool',
+                        lambda: AsyncSMTPConnectionPool(host=host, port=port, use_tls=False, timeout=5))
+    return asgi_app, handler
+
+
+def test_native_gmail_route_delivers_over_async_smtp(gmail_over_asgi):
+    asgi_app, handler = gmail_over_asgi
+    status, body = call_asgi(asgi_app.app, '/api/send_gmail',
+                             {'to_email': 'r@example.com', 'subject': 'Hello', 'message': 'hi'})
+    assert status == 200 and 'sent successfully' in body['result']
+    assert [m['to'] for m in handler.messages] == [['r@example.com']]
+    assert 'Subject: Hello' in handler.messages[0]['content']
+
+
+def test_idempotency_key_requests_go_through_flask(gmail_over_asgi, monkeypatch):
+    asgi_app, _ = gmail_over_asgi
+    served = []
+
+    async def serve_flask(scope, receive, send):
+        served.append(scope['path'])
+        await asgi_app._json_response(send, 200, {'served_by': 'flask'})
+
+    monkeypatch.setattr(asgi_app, '_serve_flask', serve_flask)
+    call_asgi(asgi_app.app, '/api/send_gmail', {'to_email': 'r@example.com', 'subject': 's', 'message': 'hi'},
+              headers=[(b'idempotency-key', b'k1')])
+    call_asgi(asgi_app.app, '/api/send_gmail', {'to_email': 'r@example.com', 'subject': 's', 'message': 'hi',
+                                                'attachments': []})
+    assert served == ['/api/send_gmail', '/api/send_gmail']
+
+
+def test_other_routes_are_served_by_the_flask_app():
+    import asgi_app
+    status, body = call_asgi_get(asgi_app.app, '/api/history')
+    assert status == 200 and 'items' in body
@@ -0,0 +1,85 @@
+import email
+from bulk_mailer import BulkMailer
+from gmail_utils import PreparedMessage
+from rate_limiter import RateLimiter
+from resilience import get_breaker
+from smtp_pool import SMTPConnectionPool
+from conftest import free_port
+
+UNLIMITED = RateLimiter({})
+
+
+def mailer(pool, workers=3):
+    return BulkMailer('sender@example.com', 'secret', workers=workers, pool=pool, limiter=UNLIMITED)
+
+
+def test_delivers_every_message_with_its_own_to_header(smtp_server, smtp_pool):
+    _, _, handler = smtp_server
+    recipients = [f'user{i}@example.com' for i in range(25)]
+    prepared = PreparedMessage('sender@example.com', 'Hello', 'Body text')
+
+    report = mailer(smtp_pool).send(prepared.messages(recipients))
+
+    assert report['sent'] == 25 and report['failed'] == 0
+    assert [r['recipient'] for r in report['results']] == recipients
+    delivered = {m['to'][0]: email.message_from_string(m['content']) for m in handler.messages}
+    assert sorted(delivered) == sorted(recipients)
+    for recipient, msg in delivered.items():
+        assert msg.get_all('To') == [recipient]
+    # Connections are reused: at most one per worker
+    assert len({m['peer'] for m in handler.messages}) <= 3
+
+
+def test_invalid_recipient_fails_alone(smtp_server, smtp_pool):
+    _, _, handler = smtp_server
+    prepared = PreparedMessage('sender@example.com', 'Hello', 'Body text')
+    recipients = ['ok@example.com', 'x@example.com\r\nBcc: victim@example.org']
+
+    report = mailer(smtp_pool).send(prepared.messages(recipients))
+
+    assert [r['status'] for r in report['results']] == ['sent', 'failed']
+    assert [m['to'] for m in handler.messages] == [['ok@example.com']]
+    assert 'victim' not in handler.messages[0]['content']
+
+
+def test_greylisted_recipients_do_not_open_the_circuit(smtp_server, smtp_pool):
+    _, _, handler = smtp_server
+    greylisted = [f'grey{i}@example.com' for i in range(10)]
+    for address in greylisted:
+        handler.refuse[address] = '450 4.2.0 Greylisted, try again later'
+
+    report = mailer(smtp_pool, workers=1).send((r, 'Subject: t\r\n\r\nhi\r\n') for r in greylisted + ['ok@example.com'])
+
+    assert report['failed'] == 10 and report['sent'] == 1
+    assert get_breaker(('smtp', smtp_pool.host)).state == 'closed'
+
+
+def test_unreachable_server_opens_the_circuit():
+    pool = SMTPConnectionPool(host='127.0.0.1', port=free_port(), use_tls=False, timeout=2)
+
+    report = mailer(pool, workers=2).send((f'r{i}@example.com', 'Subject: t\r\n\r\nhi\r\n') for i in range(30))
+
+    assert report['failed'] == 30
+    assert get_breaker(('smtp', '127.0.0.1')).state == 'open'
+    # Once open, the remaining recipients fail fast instead of each trying to connect
+    assert any('unavailable' in r['error'] for r in report['results'])
+
+
+def test_bulk_run_leaves_a_connection_for_single_sends(smtp_server):
+    host, port, handler = smtp_server
+    pool = SMTPConnectionPool(host=host, port=port, use_tls=False, max_connections=2, acquire_timeout=1)
+    single = []
+
+    def on_result(index, result):
+        # A single send for the same account, made while the bulk run is in progress
+        if index == 0:
+            single.append(pool.sendmail('sender@example.com', 'secret', ['single@example.com'], 'Subject: s\r\n\r\nhi\r\n'))
+
+    try:
+        bulk = mailer(pool, workers=4)
+        assert bulk.workers == 1
+        bulk.send(((f'r{i}@example.com', 'Subject: t\r\n\r\nhi\r\n') for i in range(5)), on_result=on_result)
+    finally:
+        pool.close_all()
+    assert single == [{}]
+    assert len(handler.messages) == 6
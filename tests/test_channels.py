@@ -0,0 +1,158 @@
+import json
+import time
+import pytest
+import credentials
+import rate_limiter
+import smtp_pool as smtp_pool_module
+import channels.sms
+from credentials import Credentials
+from rate_limiter import RateLimiter
+from resilience import SendResult
+from services import LazyService
+
+TWILIO = {'TWILIO_ACCOUNT_SID': 'AC1', 'TWILIO_AUTH_TOKEN': 'token', 'TWILIO_PHONE_NUMBER': '+15550000'}
+GMAIL = {'GMAIL_ADDRESS': 'sender@example.com', 'GMAIL_APP_PASSWORD': 'secret'}
+
+
+def make_client(monkeypatch, names, env=None):
+    monkeypatch.setattr(credentials, '_current', Credentials(env or {}))
+    monkeypatch.delenv('ASYNC_JOBS', raising=False)
+    from app_factory import create_app
+    return create_app(names).test_client()
+
+
+@pytest.fixture
+def twilio_sends(monkeypatch):
+    """
+    Replace the Twilio send functions; returns the (kind, args) they were called with.
+    """
+    pytest.importorskip('twilio')
+    import sms_call_utils
+    calls = []
+
+    def fake(kind):
+        def send(*args):
+            calls.append((kind, args))
+            return SendResult.success(f'{kind} to {args[3]}', sid=f'SM{len(calls)}')
+        return send
+
+    monkeypatch.setattr(sms_call_utils, 'send_sms_twilio', fake('sms'))
+    monkeypatch.setattr(sms_call_utils, 'make_call_twilio', fake('call'))
+    return calls
+
+
+def test_only_enabled_channels_are_served(monkeypatch):
+    client = make_client(monkeypatch, ['call'], TWILIO)
+    assert client.post('/api/send_sms', json={}).status_code == 404
+    assert client.post('/api/make_call', json={}).status_code != 404
+
+
+def test_channel_without_its_provider_answers_503(monkeypatch):
+    monkeypatch.setattr(channels.sms.channel, 'service', LazyService('sms', 'sms_call_utils', ('no_such_sdk',)))
+    client = make_client(monkeypatch, ['sms'], TWILIO)
+    response = client.post('/api/send_sms', json={'to_number': '+15550100', 'message': 'hi'})
+    assert response.status_code == 503
+    assert response.get_json() == {'error': 'SMS service not available'}
+
+
+@pytest.mark.parametrize('names, path', [
+    (['sms'], '/api/send_sms'),
+    (['call'], '/api/make_call'),
+    (['gmail'], '/api/send_gmail'),
+])
+def test_missing_credentials_answer_400(monkeypatch, names, path):
+    response = make_client(monkeypatch, names).post(path, json={'to_number': '+15550100'})
+    assert response.status_code == 400
+    assert 'credentials not found' in response.get_json()['error']
+
+
+def test_sms_and_call_use_the_credential_bundle(monkeypatch, twilio_sends):
+    client = make_client(monkeypatch, ['sms', 'call'], TWILIO)
+    sms = client.post('/api/send_sms', json={'to_number': '+15550100', 'message': 'hi'}).get_json()
+    call = client.post('/api/make_call', json={'to_number': '+15550101'}).get_json()
+    assert sms == {'result': 'sms to +15550100'} and call == {'result': 'call to +15550101'}
+    assert twilio_sends == [
+        ('sms', ('AC1', 'token', '+15550000', '+15550100', 'hi')),
+        ('call', ('AC1', 'token', '+15550000', '+15550101')),
+    ]
+
+
+def test_missing_field_answers_400(monkeypatch, twilio_sends):
+    response = make_client(monkeypatch, ['sms'], TWILIO).post('/api/send_sms', json={'message': 'hi'})
+    assert response.status_code == 400
+    assert twilio_sends == []
+
+
+def test_batch_body_fans_out_with_shared_fields(monkeypatch, twilio_sends):
+    client = make_client(monkeypatch, ['sms'], TWILIO)
+    response = client.post('/api/send_sms', json={
+        'message': 'hi', 'batch': [{'to_number': '+15550100'}, {'to_number': '+15550101'}],
+    })
+    assert response.mimetype == 'application/x-ndjson'
+    results = sorted((json.loads(line) for line in response.data.splitlines()), key=lambda r: r['index'])
+    assert results == [
+        {'index': 0, 'result': 'sms to +15550100'}, {'index': 1, 'result': 'sms to +15550101'},
+    ]
+
+
+def test_async_request_is_queued_and_runs_on_the_job_queue(monkeypatch, twilio_sends):
+    client = make_client(monkeypatch, ['call'], TWILIO)
+    response = client.post('/api/make_call?async=1', json={'to_number': '+15550100'})
+    assert response.status_code == 202
+    status_url = response.get_json()['status_url']
+
+    deadline = time.monotonic() + 5
+    job = client.get(status_url).get_json()
+    while job['status'] in ('queued', 'running') and time.monotonic() < deadline:
+        time.sleep(0.02)
+        job = client.get(status_url).get_json()
+    assert job['status'] == 'done'
+    assert job['result'] == {'result': 'call to +15550100'}
+
+
+def test_gmail_send_and_bulk_deliver_over_smtp(monkeypatch, smtp_server, smtp_pool):
+    _, _, handler = smtp_server
+    monkeypatch.setattr(smtp_pool_module, '_default_pool', smtp_pool)
+    monkeypatch.setattr(rate_limiter, '_default_limiter', RateLimiter({}))
+    client = make_client(monkeypatch, ['gmail'], GMAIL)
+
+    single = client.post('/api/send_gmail', json={'to_email': 'one@example.com', 'subject': 's', 'message': 'hi'})
+    assert single.status_code == 200 and 'sent successfully' in single.get_json()['result']
+    bulk = client.post('/api/send_gmail_bulk', json={
+        'recipients_list': ['two@example.com', 'three@example.com'], 'subject': 's', 'message': 'hi',
+    }).get_json()
+    assert (bulk['sent'], bulk['failed']) == (2, 0)
+    assert sorted(to for m in handler.messages for to in m['to']) == [
+        'one@example.com', 'three@example.com', 'two@example.com']
+
+
+def test_ssh_routes_validate_hosts_and_pass_requests_through(monkeypatch):
+    pytest.importorskip('paramiko')
+    import website_scraper
+    monkeypatch.setattr(website_scraper, 'run_command_on_linux',
+                        lambda ip, username, key_path, password, command: (f'{username}@{ip}: {command}', ''))
+    client = make_client(monkeypatch, ['ssh'])
+
+    response = client.post('/api/remote_command', json={
+        'ip': '10.0.0.1', 'username': 'root', 'key_path': '', 'password': 'pw', 'command': 'uptime',
+    })
+    assert response.get_json() == {'output': 'root@10.0.0.1: uptime', 'error': ''}
+    response = client.post('/api/remote_commands_multi', json={'hosts': [], 'commands': ['uptime']})
+    assert response.status_code == 400 and 'hosts must be' in response.get_json()['error']
+
+
+def test_instagram_requires_login_fields(monkeypatch):
+    pytest.importorskip('instagrapi')
+    import instagram_utils
+    posted = []
+    monkeypatch.setattr(instagram_utils, 'post_instagram_photo',
+                        lambda *args: posted.append(args) or SendResult.success('posted'))
+    client = make_client(monkeypatch, ['instagram'])
+
+    response = client.post('/api/post_instagram', json={'image_path': 'a.jpg', 'caption': 'c'})
+    assert response.status_code == 400 and 'username and password' in response.get_json()['error']
+    response = client.post('/api/post_instagram', json={
+        'username': 'ann', 'password': 'pw', 'image_path': 'a.jpg', 'caption': 'c',
+    })
+    assert response.get_json() == {'result': 'posted'}
+    assert posted == [('ann', 'pw', 'a.jpg', 'c', None)]
@@ -0,0 +1,64 @@
+import json
+from delivery_log import DeliveryLog
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_close_writes_every_queued_record_to_file_and_sinks(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    log = DeliveryLog(path=path, flush_interval=5)
+    batches = []
+    log.add_sink(batches.append)
+    for i in range(3):
+        log.log('sms', f'+1555010{i}', 'sent', sid=f'S{i}')
+    log.close()
+
+    records = read_lines(path)
+    assert [(r['channel'], r['to'], r['status'], r['sid']) for r in records] == [
+        ('sms', f'+1555010{i}', 'sent', f'S{i}') for i in range(3)]
+    assert [r for batch in batches for r in batch] == records
+
+    # After close, records are written straight through
+    log.log('email', 'late@example.com', 'failed', error='boom')
+    assert read_lines(path)[-1]['to'] == 'late@example.com'
+
+
+def test_rotates_and_keeps_backup_count_files(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    log = DeliveryLog(path=path, max_bytes=200, backup_count=2)
+    for i in range(12):
+        log.log('email', f'r{i}@example.com', 'sent')
+        log.flush()
+    log.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['log.jsonl', 'log.jsonl.1', 'log.jsonl.2']
+    assert read_lines(path)[-1]['to'] == 'r11@example.com'
+    assert all(p.stat().st_size <= 200 for p in tmp_path.iterdir())
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    log = DeliveryLog(path=str(tmp_path / 'log.jsonl'), max_queue=1, flush_interval=5)
+    # Keep the writer from draining the queue while we fill it
+    with log._write_lock:
+        for i in range(50):
+            log.log('sms', str(i), 'sent')
+        assert log.dropped > 0
+    log.close()
+
+
+def test_sink_errors_do_not_stop_the_log(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    log = DeliveryLog(path=path)
+
+    def broken_sink(batch):
+        raise RuntimeError('db down')
+
+    log.add_sink(broken_sink)
+    log.log('sms', '+15550100', 'sent')
+    log.flush()
+    log.log('sms', '+15550101', 'sent')
+    log.close()
+    assert [r['to'] for r in read_lines(path)] == ['+15550100', '+15550101']
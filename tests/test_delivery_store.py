@@ -0,0 +1,69 @@
+from delivery_store import DeliveryStore
+
+
+def make_store(tmp_path, count=7):
+    store = DeliveryStore(str(tmp_path / 'deliveries.db'))
+    # Several records share a timestamp, so paging has to break ties on id
+    store.insert_batch([
+        {'ts': 1000.0 + i // 2, 'channel': 'sms' if i % 2 else 'email', 'to': f'r{i % 3}',
+         'status': 'failed' if i == 4 else 'sent', 'sid': f'S{i}'}
+        for i in range(count)
+    ])
+    return store
+
+
+def all_pages(store, **filters):
+    pages, cursor = [], None
+    while True:
+        page = store.query(cursor=cursor, limit=2, **filters)
+        pages.append(page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_cover_every_row_once_newest_first(tmp_path):
+    store = make_store(tmp_path)
+    pages = all_pages(store)
+
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+    items = [item for page in pages for item in page]
+    assert [item['details']['sid'] for item in items] == [f'S{i}' for i in reversed(range(7))]
+    assert [(item['ts'], item['id']) for item in items] == sorted(
+        ((item['ts'], item['id']) for item in items), reverse=True)
+
+
+def test_filters_apply_across_pages(tmp_path):
+    store = make_store(tmp_path)
+    items = [item for page in all_pages(store, channel='sms') for item in page]
+    assert [item['details']['sid'] for item in items] == ['S5', 'S3', 'S1']
+
+    def sids(**filters):
+        return [item['details']['sid'] for item in store.query(**filters)['items']]
+
+    assert sids(recipient='r1') == ['S4', 'S1']
+    assert sids(recipient='r1', status='sent') == ['S1']
+    assert sids(since=1002.0, until=1003.0) == ['S5', 'S4']
+    assert sids(until=1000.0) == []
+
+
+def test_has_messaged_only_counts_successful_sends(tmp_path):
+    store = make_store(tmp_path)
+    assert store.has_messaged('r0')
+    assert store.has_messaged('r1', channel='sms')
+    assert not store.has_messaged('r1', channel='email', since=1002.0)
+    assert not store.has_messaged('nobody')
+
+
+def test_history_route_pages_with_the_cursor(tmp_path, monkeypatch):
+    import delivery_store
+    monkeypatch.setattr(delivery_store, '_default_store', make_store(tmp_path))
+    from app_factory import create_app
+    client = create_app([]).test_client()
+
+    first = client.get('/api/history?limit=4').get_json()
+    second = client.get(f"/api/history?limit=4&cursor={first['next_cursor']}").get_json()
+    assert [item['details']['sid'] for item in first['items'] + second['items']] == [
+        f'S{i}' for i in reversed(range(7))]
+    assert second['next_cursor'] is None
+    assert client.get('/api/history?cursor=garbage').status_code == 400
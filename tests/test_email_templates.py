@@ -0,0 +1,61 @@
+import os
+import pytest
+from email_templates import CompiledTemplate, TemplateRegistry
+
+
+def test_builtin_template_renders_subject_and_body():
+    registry = TemplateRegistry()
+    subject, html = registry.get('report').render({
+        'month': 'May', 'total_users': 10, 'revenue': '1,000', 'growth_rate': 5, 'summary': 'ok',
+    })
+    assert subject == 'Monthly Report - May'
+    assert '$1,000' in html and '5%' in html
+
+
+def test_doubled_braces_are_literal_and_format_specs_apply():
+    template = CompiledTemplate('{{literal}} {name!r} {amount:>6.2f} {user[name]} {items[0]}')
+    assert template.render({'name': 'Ann', 'amount': 3.5, 'user': {'name': 'Bo'}, 'items': ['x']}) == (
+        "{literal} 'Ann'   3.50 Bo x")
+
+
+def test_nested_format_spec_falls_back_to_str_format():
+    assert CompiledTemplate('{value:>{width}}').render({'value': 'a', 'width': 3}) == '  a'
+
+
+def test_missing_field_raises_key_error():
+    with pytest.raises(KeyError, match='account_id'):
+        TemplateRegistry().get('welcome').render({'name': 'Ann', 'email': 'a@example.com', 'join_date': 'today'})
+
+
+def test_values_are_inserted_verbatim():
+    # Templates are HTML the sender wrote; values aren't escaped
+    assert CompiledTemplate('<p>{message}</p>').render({'message': '<b>hi</b>'}) == '<p><b>hi</b></p>'
+
+
+def test_file_template_overrides_builtin_and_reloads_on_change(tmp_path):
+    path = tmp_path / 'welcome.html'
+    path.write_text('Subject: Hello {name}\n\n<p>v1 {name}</p>', encoding='utf-8')
+    registry = TemplateRegistry(str(tmp_path))
+
+    template = registry.get('welcome')
+    assert template.render({'name': 'Ann'}) == ('Hello Ann', '<p>v1 Ann</p>')
+    assert registry.get('welcome') is template
+
+    path.write_text('<p>v2 {name}</p>', encoding='utf-8')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert registry.get('welcome').render({'name': 'Ann'}) == ('welcome', '<p>v2 Ann</p>')
+
+    assert 'welcome' in registry.names() and 'report' in registry.names()
+
+
+def test_render_many_and_unknown_templates(tmp_path):
+    registry = TemplateRegistry(str(tmp_path))
+    rendered = list(registry.render_many('custom', [
+        {'subject': 'A', 'html_content': '<p>a</p>'}, {'subject': 'B', 'html_content': '<p>b</p>'},
+    ]))
+    assert rendered == [('A', '<p>a</p>'), ('B', '<p>b</p>')]
+    with pytest.raises(KeyError):
+        registry.render_many('missing', [])
+    # Names can't reach outside the template directory
+    assert registry.get(os.path.join('..', 'welcome')) is None
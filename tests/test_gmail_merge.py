@@ -0,0 +1,62 @@
+import json
+import pytest
+import credentials
+import rate_limiter
+import smtp_pool as smtp_pool_module
+from credentials import Credentials
+from rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def client(smtp_pool, monkeypatch):
+    monkeypatch.setattr(smtp_pool_module, '_default_pool', smtp_pool)
+    monkeypatch.setattr(rate_limiter, '_default_limiter', RateLimiter({}))
+    monkeypatch.setattr(credentials, '_current', Credentials({
+        'GMAIL_ADDRESS': 'sender@example.com', 'GMAIL_APP_PASSWORD': 'secret',
+    }))
+    from app_factory import create_app
+    return create_app(['gmail']).test_client()
+
+
+def row(email, **fields):
+    return json.dumps({'email': email, 'subject': 'Hi {0}'.format(email), 'html_content': '<p>hello</p>', **fields})
+
+
+def merge(client, body, content_type='application/x-ndjson'):
+    return client.post('/api/send_gmail_merge?template_name=custom', data=body, content_type=content_type)
+
+
+def test_bad_rows_fail_alone_and_counts_stay_accurate(client, smtp_server):
+    _, _, handler = smtp_server
+    lines = [
+        row('one@example.com').encode(),
+        row('two@example.com').encode(),
+        b'["not", "an", "object"]',
+        b'{not json',
+        b'{"email": "bad-utf8@example.com", "subject": "\xff", "html_content": "x"}',
+        row('evil@example.com\\r\\nBcc: victim@example.org').encode(),
+        json.dumps({'email': 'nosubject@example.com', 'html_content': 'x'}).encode(),
+        row('three@example.com').encode(),
+    ]
+    response = merge(client, b'\n'.join(lines) + b'\n')
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert (body['sent'], body['failed']) == (3, 5)
+    errors = [f['error'] for f in body['failures']]
+    assert any(e.startswith('line 3:') for e in errors)
+    assert any(e.startswith('line 4:') for e in errors)
+    assert any(e.startswith('line 5:') and 'UTF-8' in e for e in errors)
+    assert sorted(m['to'][0] for m in handler.messages) == ['one@example.com', 'three@example.com', 'two@example.com']
+    assert not any('victim' in m['content'] for m in handler.messages)
+
+
+def test_csv_rows(client, smtp_server):
+    _, _, handler = smtp_server
+    body = b'email,subject,html_content\r\na@example.com,Hello,<p>a</p>\r\nb@example.com,\xfe,<p>b</p>\r\n'
+    response = merge(client, body, content_type='text/csv')
+
+    result = response.get_json()
+    assert (result['sent'], result['failed']) == (1, 1)
+    assert result['failures'][0]['error'] == 'line 3: not valid UTF-8'
+    assert [m['to'] for m in handler.messages] == [['a@example.com']]
@@ -0,0 +1,42 @@
+import email
+import pytest
+from gmail_utils import PreparedMessage
+
+
+@pytest.fixture
+def prepared():
+    return PreparedMessage('sender@example.com', 'Hello', 'Body text')
+
+
+@pytest.mark.parametrize('recipient', [
+    'a@example.com\r\nBcc: victim@example.org',
+    'a@example.com\nBcc: victim@example.org',
+    'a@example.com\rX-Injected: 1',
+    'a@example.com, b@example.com',
+    'not an address',
+    '',
+    None,
+])
+def test_rejects_anything_but_one_address(prepared, recipient):
+    with pytest.raises(ValueError):
+        prepared.for_recipient(recipient)
+
+
+def test_sets_a_single_to_header(prepared):
+    msg = email.message_from_string(prepared.for_recipient('a@example.com'))
+    assert msg.get_all('To') == ['a@example.com']
+    assert msg['Subject'] == 'Hello'
+    assert msg['Bcc'] is None
+
+
+def test_encodes_display_names_and_domains(prepared):
+    header = prepared.for_recipient('Jöhn Smith <john@bücher.de>').split('\n', 1)[0]
+    assert header.isascii()
+    assert 'xn--bcher-kva.de' in header
+    assert '=?utf-8?' in header
+
+
+def test_messages_pairs_invalid_recipients_with_their_error(prepared):
+    pairs = list(prepared.messages(['a@example.com', 'b@example.com\r\nBcc: x@example.org']))
+    assert pairs[0][0] == 'a@example.com' and isinstance(pairs[0][1], str)
+    assert pairs[1][0] == 'b@example.com\r\nBcc: x@example.org' and isinstance(pairs[1][1], ValueError)
@@ -0,0 +1,70 @@
+import pytest
+from flask import Flask, request
+import idempotency
+from idempotency import idempotent
+from job_queue import dispatch
+from resilience import SendResult
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(idempotency, '_default_cache', None)
+    monkeypatch.delenv('ASYNC_JOBS', raising=False)
+    outcomes = []
+    calls = []
+
+    def handler(data):
+        calls.append(data)
+        ok = outcomes.pop(0)
+        return {'result': SendResult.success('sent') if ok else SendResult.failure('provider down', 'timeout')}
+
+    app = Flask(__name__)
+
+    @app.route('/send', methods=['POST'])
+    @idempotent
+    def send():
+        data = request.json
+        if 'to' not in data:
+            return {'error': 'to is required'}, 400
+        return dispatch('send', handler, data)
+
+    client = app.test_client()
+    client.outcomes = outcomes
+    client.calls = calls
+    return client
+
+
+def post(client, body, key='key-1'):
+    return client.post('/send', json=body, headers={'Idempotency-Key': key})
+
+
+def test_successful_send_is_replayed(client):
+    client.outcomes.extend([True, True])
+    first = post(client, {'to': 'a'})
+    second = post(client, {'to': 'a'})
+    assert len(client.calls) == 1
+    assert second.get_json() == first.get_json()
+    assert second.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_failed_send_is_not_cached(client):
+    client.outcomes.extend([False, True])
+    first = post(client, {'to': 'a'})
+    assert first.status_code == 200 and 'provider down' in first.get_json()['result']
+    second = post(client, {'to': 'a'})
+    assert len(client.calls) == 2
+    assert second.get_json()['result'] == 'sent'
+    assert 'Idempotent-Replayed' not in second.headers
+
+
+def test_rejected_request_is_not_cached(client):
+    client.outcomes.append(True)
+    assert post(client, {}).status_code == 400
+    assert post(client, {'to': 'a'}).status_code == 200
+
+
+def test_key_reused_with_a_different_body_is_refused(client):
+    client.outcomes.append(True)
+    post(client, {'to': 'a'})
+    assert post(client, {'to': 'b'}).status_code == 422
+    assert len(client.calls) == 1
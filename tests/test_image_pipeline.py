@@ -0,0 +1,65 @@
+import os
+import pytest
+import image_pipeline
+
+
+def fake_prepare(path):
+    if path == 'bad':
+        raise OSError('cannot identify image file')
+    if path == 'crash':
+        os._exit(1)
+    return path + '.jpg'
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    # Forked workers inherit the patched function
+    monkeypatch.setattr(image_pipeline, 'PIL_AVAILABLE', True)
+    monkeypatch.setattr(image_pipeline, 'prepare_instagram_image', fake_prepare)
+    monkeypatch.setenv('INSTAGRAM_PREPROCESS_WORKERS', '2')
+    monkeypatch.setattr(image_pipeline, '_pool', None)
+    yield
+    if image_pipeline._pool is not None:
+        image_pipeline._pool.shutdown()
+
+
+def test_pool_is_only_created_by_the_first_batch(fake_pool):
+    assert image_pipeline._pool is None
+    assert image_pipeline.prepare_instagram_images(['a', 'bad', 'c'], workers=2) == [
+        ('a.jpg', None), (None, 'cannot identify image file'), ('c.jpg', None)
+    ]
+    pool = image_pipeline._pool
+    assert pool is not None
+    image_pipeline.prepare_instagram_images(['d'])
+    assert image_pipeline._pool is pool
+
+
+def test_crashed_worker_is_replaced_on_the_next_batch(fake_pool):
+    results = image_pipeline.prepare_instagram_images(['a', 'crash'], workers=1)
+    assert results[1][0] is None
+    assert image_pipeline.prepare_instagram_images(['e']) == [('e.jpg', None)]
+
+
+@pytest.mark.parametrize('workers', [0, -1, 'many', 1.5])
+def test_rejects_invalid_worker_counts(fake_pool, workers):
+    with pytest.raises(ValueError):
+        image_pipeline.prepare_instagram_images(['a'], workers=workers)
+
+
+def test_pool_never_exceeds_the_cpu_count(monkeypatch):
+    monkeypatch.setenv('INSTAGRAM_PREPROCESS_WORKERS', '10000')
+    assert image_pipeline.preprocess_workers() == (os.cpu_count() or 1)
+
+
+def test_resizes_and_strips_metadata(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    source = tmp_path / 'tall.png'
+    Image.new('RGBA', (2000, 4000), (255, 0, 0, 128)).save(source)
+
+    out = image_pipeline.prepare_instagram_image(str(source), cache_dir=str(tmp_path / 'cache'))
+    with Image.open(out) as img:
+        assert img.format == 'JPEG' and img.mode == 'RGB'
+        assert img.size == (1080, 1350)
+        assert not img.info.get('exif')
+    # Same source again is served from the cache
+    assert image_pipeline.prepare_instagram_image(str(source), cache_dir=str(tmp_path / 'cache')) == out
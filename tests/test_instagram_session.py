@@ -0,0 +1,100 @@
+import os
+import json
+import stat
+import pytest
+
+pytest.importorskip('instagrapi')
+import instagram_session  # noqa: E402
+from instagrapi.exceptions import LoginRequired  # noqa: E402
+from instagram_session import InstagramSessionCache  # noqa: E402
+
+
+class FakeClient:
+    """
+    Stands in for instagrapi.Client: records logins and round-trips settings.
+    """
+    logins = []
+
+    def __init__(self):
+        self.settings = {}
+        self.session_valid = True
+
+    def load_settings(self, path):
+        with open(path) as f:
+            self.settings = json.load(f)
+
+    def dump_settings(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.settings, f)
+
+    def get_settings(self):
+        return self.settings
+
+    def set_settings(self, settings):
+        self.settings = settings
+
+    def set_uuids(self, uuids):
+        self.settings['uuids'] = uuids
+
+    def login(self, username, password):
+        FakeClient.logins.append((username, 'resumed' if self.settings.get('cookie') else 'fresh'))
+        self.settings.setdefault('uuids', {'phone_id': 'device-1'})
+        self.settings['cookie'] = f'session-for-{password}'
+        self.session_valid = True
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(instagram_session, 'Client', FakeClient)
+    monkeypatch.setattr(FakeClient, 'logins', [])
+    return InstagramSessionCache(str(tmp_path))
+
+
+def test_client_is_logged_in_once_and_reused(sessions, tmp_path):
+    first = sessions.call('ann', 'pw', lambda cl: cl)
+    assert sessions.call('ann', 'pw', lambda cl: cl) is first
+    assert FakeClient.logins == [('ann', 'fresh')]
+
+    path = tmp_path / 'ann.json'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_restarted_process_resumes_the_saved_session(sessions, tmp_path):
+    sessions.call('ann', 'pw', lambda cl: None)
+    InstagramSessionCache(str(tmp_path)).call('ann', 'pw', lambda cl: None)
+    assert FakeClient.logins == [('ann', 'fresh'), ('ann', 'resumed')]
+
+
+def test_expired_session_logs_in_again_keeping_the_device(sessions):
+    calls = []
+
+    def post(cl):
+        calls.append(cl.settings.get('cookie'))
+        if len(calls) == 1:
+            raise LoginRequired('expired')
+        return 'posted'
+
+    sessions.call('ann', 'pw', lambda cl: None)
+    assert sessions.call('ann', 'pw', post) == 'posted'
+    client = sessions.call('ann', 'pw', lambda cl: cl)
+    assert client.settings['uuids'] == {'phone_id': 'device-1'}
+    assert [mode for _, mode in FakeClient.logins] == ['fresh', 'fresh']
+
+
+def test_password_change_replaces_the_cached_client(sessions):
+    first = sessions.call('ann', 'old', lambda cl: cl)
+    second = sessions.call('ann', 'new', lambda cl: cl)
+    assert second is not first
+    assert second.settings['cookie'] == 'session-for-new'
+
+
+def test_invalidate_forgets_client_and_saved_session(sessions, tmp_path):
+    sessions.call('ann', 'pw', lambda cl: None)
+    sessions.invalidate('ann')
+    assert not (tmp_path / 'ann.json').exists()
+    sessions.call('ann', 'pw', lambda cl: None)
+    assert FakeClient.logins == [('ann', 'fresh'), ('ann', 'fresh')]
+
+
+def test_session_file_names_cannot_escape_the_directory(sessions, tmp_path):
+    assert os.path.dirname(sessions._path('../../etc/passwd')) == str(tmp_path)
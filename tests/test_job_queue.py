@@ -0,0 +1,99 @@
+import time
+import sqlite3
+import threading
+from job_queue import JobQueue
+
+
+def make_queue(tmp_path, workers=0, lease_seconds=0.2):
+    queue = JobQueue(db_path=str(tmp_path / 'jobs.db'), workers=workers, lease_seconds=lease_seconds)
+    queue.register('echo', lambda payload: {'result': payload.get('password')})
+    return queue
+
+
+def wait_for(queue, job_id, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job['status'] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job stayed {queue.get(job_id)['status']}")
+
+
+def test_expired_lease_is_reclaimed_only_once(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue('echo', {})
+
+    row, first_token = queue._claim()
+    assert row['id'] == job_id
+    time.sleep(0.25)
+    row, second_token = queue._claim()
+    assert row['id'] == job_id and second_token != first_token
+
+    # The first worker's late result is discarded
+    queue._finish(job_id, first_token, 'done', result={'result': 'stale'})
+    assert queue.get(job_id)['status'] == 'running'
+
+    time.sleep(0.25)
+    assert queue._claim() == (None, None)
+    job = queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['attempts'] == 2
+    assert 'Worker stopped' in job['error']
+
+
+def test_heartbeat_keeps_a_long_job_from_being_reclaimed(tmp_path):
+    queue = make_queue(tmp_path, workers=1, lease_seconds=0.3)
+    release = threading.Event()
+    queue.register('slow', lambda payload: release.wait(5) and {'result': 'done'})
+    other = make_queue(tmp_path, lease_seconds=0.3)
+    other.register('slow', lambda payload: {'result': 'duplicate'})
+
+    job_id = queue.enqueue('slow', {})
+    wait_for(queue, job_id, 'running')
+    for _ in range(5):
+        time.sleep(0.2)
+        assert other._claim() == (None, None)
+    release.set()
+
+    job = wait_for(queue, job_id, 'done')
+    assert job['attempts'] == 1 and job['result'] == {'result': 'done'}
+
+
+def test_secrets_are_not_written_to_the_database(tmp_path):
+    queue = make_queue(tmp_path, workers=1)
+    job_id = queue.enqueue('echo', {'password': 'hunter2', 'hosts': [{'ip': '10.0.0.1', 'password': 'swordfish'}]})
+
+    with sqlite3.connect(str(tmp_path / 'jobs.db')) as db:
+        stored = db.execute('SELECT payload FROM jobs WHERE id = ?', (job_id,)).fetchone()[0]
+    assert 'hunter2' not in stored and 'swordfish' not in stored
+
+    # The worker in the same process still gets the real value
+    assert wait_for(queue, job_id, 'done')['result'] == {'result': 'hunter2'}
+
+
+def test_job_with_secrets_held_by_a_gone_process_fails(tmp_path):
+    owner = make_queue(tmp_path)
+    # The owner stops heartbeating, as if its process had died
+    owner._heartbeat = lambda: None
+    job_id = owner.enqueue('echo', {'password': 'hunter2'})
+    other = make_queue(tmp_path)
+
+    assert other._claim() == (None, None)
+    time.sleep(0.25)
+    assert other._claim() == (None, None)
+    job = other.get(job_id)
+    assert job['status'] == 'failed'
+    assert 'submit it again' in job['error']
+
+
+def test_job_with_secrets_held_by_a_live_process_stays_queued(tmp_path):
+    owner = make_queue(tmp_path)
+    # No workers: the job waits in the queue longer than a lease
+    job_id = owner.enqueue('echo', {'password': 'hunter2'})
+    other = make_queue(tmp_path)
+
+    for _ in range(4):
+        time.sleep(0.2)
+        assert other._claim() == (None, None)
+    assert other.get(job_id)['status'] == 'queued'
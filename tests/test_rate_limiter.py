@@ -0,0 +1,31 @@
+import pytest
+from rate_limiter import RateLimiter, TokenBucket, destination
+
+
+@pytest.mark.parametrize('recipient, expected', [
+    ('User@Example.COM', 'example.com'),
+    ('+1 555 0100', '+1'),
+    ('+44 20 7946 0000', '+44'),
+    ('whatsapp:+353861234567', '+353'),
+])
+def test_destination(recipient, expected):
+    assert destination(recipient) == expected
+
+
+def test_bucket_allows_a_burst_up_to_capacity():
+    bucket = TokenBucket(rate=0.01, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_acquire_gives_up_after_timeout():
+    bucket = TokenBucket(rate=0.01, capacity=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.05)
+
+
+def test_busy_destination_does_not_spend_the_account_budget():
+    limiter = RateLimiter({'test-email': {'account': 0.01, 'destination': 0.01}})
+    limiter.buckets('test-email', 'sender', 'first@busy.example')[1].try_acquire()
+
+    assert not limiter.try_acquire('test-email', 'sender', 'second@busy.example')
+    assert limiter.try_acquire('test-email', 'sender', 'someone@idle.example')
@@ -0,0 +1,113 @@
+import time
+import socket
+import smtplib
+import pytest
+from resilience import CircuitBreaker, CircuitOpen, before_send, call_with_retry, get_breaker, is_transient
+
+
+def failing(exc):
+    def func():
+        raise exc
+    return func
+
+
+def test_breaker_opens_after_threshold_and_recovers():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=0.1)
+    for _ in range(3):
+        with pytest.raises(ConnectionRefusedError):
+            call_with_retry(failing(ConnectionRefusedError()), breaker=breaker, attempts=1)
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpen):
+        call_with_retry(lambda: 'ok', breaker=breaker)
+
+    time.sleep(0.15)
+    assert call_with_retry(lambda: 'ok', breaker=breaker) == 'ok'
+    assert breaker.state == 'closed'
+
+
+def test_failed_trial_call_reopens_the_circuit():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0.1)
+    with pytest.raises(TimeoutError):
+        call_with_retry(failing(TimeoutError()), breaker=breaker, attempts=1)
+    time.sleep(0.15)
+    with pytest.raises(TimeoutError):
+        call_with_retry(failing(TimeoutError()), breaker=breaker, attempts=1)
+    assert breaker.state == 'open'
+
+
+def test_recipient_refusals_do_not_count_against_the_provider():
+    breaker = CircuitBreaker('smtp', failure_threshold=2)
+    greylisted = smtplib.SMTPRecipientsRefused({'a@example.com': (450, b'Greylisted')})
+    assert is_transient(greylisted)
+    for _ in range(5):
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            call_with_retry(failing(greylisted), breaker=breaker)
+    assert breaker.state == 'closed'
+
+
+def test_permanent_errors_are_not_retried():
+    calls = []
+
+    def func():
+        calls.append(1)
+        raise smtplib.SMTPAuthenticationError(535, b'Bad credentials')
+
+    with pytest.raises(smtplib.SMTPAuthenticationError):
+        call_with_retry(func, attempts=3)
+    assert len(calls) == 1
+
+
+def test_transient_errors_are_retried():
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) < 3:
+            raise smtplib.SMTPResponseException(451, b'Try again')
+        return 'sent'
+
+    assert call_with_retry(func, attempts=3) == 'sent'
+    assert len(calls) == 3
+
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f'HTTP {status}')
+        self.status = status
+
+
+def test_before_send_only_accepts_failures_the_provider_never_acted_on():
+    requests = pytest.importorskip('requests')
+    from urllib3.exceptions import MaxRetryError, NewConnectionError
+    refused = requests.exceptions.ConnectionError(
+        MaxRetryError(None, '/Messages.json', reason=NewConnectionError(None, 'Connection refused')))
+    assert before_send(refused)
+    assert before_send(requests.exceptions.ConnectTimeout())
+    assert before_send(ConnectionRefusedError())
+    assert before_send(smtplib.SMTPResponseException(451, b'Try again'))
+    assert before_send(HTTPError(429))
+
+    # The request may already have been processed
+    assert not before_send(requests.exceptions.ConnectionError('Connection aborted'))
+    assert not before_send(HTTPError(503))
+    assert not before_send(smtplib.SMTPServerDisconnected())
+    assert not before_send(socket.timeout())
+
+
+def test_non_idempotent_sends_are_not_retried_after_reaching_the_provider():
+    calls = []
+
+    def post():
+        calls.append(1)
+        raise HTTPError(503)
+
+    with pytest.raises(HTTPError):
+        call_with_retry(post, attempts=3, retry_if=before_send)
+    assert len(calls) == 1
+
+
+def test_circuit_opening_mid_retry_reports_the_real_error(monkeypatch):
+    monkeypatch.setenv('CIRCUIT_FAILURE_THRESHOLD', '1')
+    breaker = get_breaker(('test', 'mid-retry'))
+    with pytest.raises(ConnectionRefusedError):
+        call_with_retry(failing(ConnectionRefusedError('refused')), breaker=breaker, attempts=3)
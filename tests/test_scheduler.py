@@ -0,0 +1,81 @@
+import time
+import threading
+import pytest
+import scheduler as scheduler_module
+from scheduler import MessageScheduler, parse_send_at
+
+MAY_1_0900_UTC = 1714554000.0
+
+
+@pytest.mark.parametrize('value', [
+    '2024-05-01T09:00:00Z',
+    '2024-05-01T09:00:00.000Z',
+    '2024-05-01T09:00:00',
+    '2024-05-01T11:00:00+02:00',
+    MAY_1_0900_UTC,
+    int(MAY_1_0900_UTC),
+])
+def test_parse_send_at(value):
+    assert parse_send_at(value) == MAY_1_0900_UTC
+
+
+@pytest.mark.parametrize('value', [None, ''])
+def test_parse_send_at_means_now_when_empty(value):
+    assert parse_send_at(value) is None
+
+
+@pytest.mark.parametrize('value', ['tomorrow', '2024-13-01T00:00:00Z', True, ['2024-05-01']])
+def test_parse_send_at_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        parse_send_at(value)
+
+
+@pytest.mark.parametrize('channel, payload, error', [
+    ('fax', {'to_number': '+15550100'}, 'Unknown channel'),
+    ('sms', {'to_number': '+15550100'}, 'message'),
+    ('email', {'to_email': 'a@example.com', 'message': 'hi'}, 'subject'),
+    ('whatsapp', {'to_number': '+15550100', 'message': 'hi', 'transport': 'pigeon'}, 'transport'),
+])
+def test_schedule_validates_the_payload_up_front(tmp_path, channel, payload, error):
+    scheduler = MessageScheduler(db_path=str(tmp_path / 'scheduler.db'))
+    with pytest.raises(ValueError, match=error):
+        scheduler.schedule(channel, payload, parse_send_at('2099-01-01T00:00:00Z'))
+
+
+def test_scheduled_message_can_be_cancelled(tmp_path):
+    scheduler = MessageScheduler(db_path=str(tmp_path / 'scheduler.db'))
+    message_id = scheduler.schedule('call', {'to_number': '+15550100'}, parse_send_at('2099-01-01T00:00:00Z'))
+    assert scheduler.get(message_id)['status'] == 'pending'
+    assert scheduler.cancel(message_id)
+    assert scheduler.get(message_id)['status'] == 'cancelled'
+    assert not scheduler.cancel(message_id)
+
+
+def test_send_waiting_longer_than_the_lease_is_not_resent(tmp_path, monkeypatch):
+    # e.g. a pywhatkit send queued behind another one for the browser
+    release = threading.Event()
+    sends = []
+
+    def slow_send(payload):
+        sends.append(payload)
+        release.wait(5)
+        return 'sent'
+
+    monkeypatch.setitem(scheduler_module.CHANNELS, 'sms', slow_send)
+    db_path = str(tmp_path / 'scheduler.db')
+    scheduler = MessageScheduler(db_path=db_path, lease_seconds=0.3)
+    message_id = scheduler.schedule('sms', {'to_number': '+15550100', 'message': 'hi'})
+
+    deadline = time.monotonic() + 5
+    while scheduler.get(message_id)['status'] != 'running' and time.monotonic() < deadline:
+        time.sleep(0.02)
+    time.sleep(0.6)
+    # A restarting process must not take the send for lost
+    MessageScheduler(db_path=db_path, lease_seconds=0.3).start()
+    assert scheduler.get(message_id)['status'] == 'running'
+
+    release.set()
+    while scheduler.get(message_id)['status'] == 'running' and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert scheduler.get(message_id)['status'] == 'sent'
+    assert len(sends) == 1
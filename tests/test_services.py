@@ -0,0 +1,25 @@
+import sys
+from services import LazyService, SERVICES
+
+
+def test_module_is_imported_on_first_attribute_use(tmp_path, monkeypatch):
+    (tmp_path / 'lazy_fake_provider.py').write_text('GREETING = "hi"\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    service = LazyService('fake', 'lazy_fake_provider')
+
+    assert service.available
+    assert 'lazy_fake_provider' not in sys.modules
+    assert service.GREETING == 'hi'
+    assert 'lazy_fake_provider' in sys.modules
+    monkeypatch.delitem(sys.modules, 'lazy_fake_provider')
+
+
+def test_missing_dependency_makes_the_service_unavailable_without_importing():
+    service = LazyService('fake', 'json', requires=('no_such_sdk_package',))
+    assert not service.available
+    assert service._module is None
+
+
+def test_every_builtin_service_points_at_a_module_in_the_repo():
+    for service in SERVICES.values():
+        assert LazyService(service.name, service.module).available, service.module
@@ -0,0 +1,109 @@
+import smtplib
+import pytest
+from smtp_pool import DeliveryUnknown, PoolExhausted, SMTPConnectionPool
+
+MESSAGE = 'Subject: test\r\n\r\nhello\r\n'
+
+
+def test_sends_over_one_reused_connection(smtp_server, smtp_pool):
+    _, _, handler = smtp_server
+    for i in range(3):
+        smtp_pool.sendmail('sender@example.com', 'secret', [f'r{i}@example.com'], MESSAGE)
+    assert [m['to'] for m in handler.messages] == [['r0@example.com'], ['r1@example.com'], ['r2@example.com']]
+    assert len({m['peer'] for m in handler.messages}) == 1
+
+
+def test_reconnects_when_pooled_connection_dropped(smtp_server, smtp_pool):
+    _, _, handler = smtp_server
+    with smtp_pool.connection('sender@example.com', 'secret') as conn:
+        conn.sendmail('sender@example.com', ['a@example.com'], MESSAGE)
+        conn.smtp.close()
+    smtp_pool.sendmail('sender@example.com', 'secret', ['b@example.com'], MESSAGE)
+    assert [m['to'] for m in handler.messages] == [['a@example.com'], ['b@example.com']]
+    assert len({m['peer'] for m in handler.messages}) == 2
+
+
+def test_recycles_connection_after_max_messages(smtp_server):
+    host, port, handler = smtp_server
+    pool = SMTPConnectionPool(host=host, port=port, use_tls=False, max_messages_per_connection=2)
+    try:
+        for i in range(4):
+            pool.sendmail('sender@example.com', 'secret', [f'r{i}@example.com'], MESSAGE)
+    finally:
+        pool.close_all()
+    assert len(handler.messages) == 4
+    assert len({m['peer'] for m in handler.messages}) == 2
+
+
+def test_connections_are_per_account(smtp_server, smtp_pool):
+    _, _, handler = smtp_server
+    smtp_pool.sendmail('one@example.com', 'secret', ['r@example.com'], MESSAGE)
+    smtp_pool.sendmail('two@example.com', 'secret', ['r@example.com'], MESSAGE)
+    assert [m['from'] for m in handler.messages] == ['one@example.com', 'two@example.com']
+    assert len({m['peer'] for m in handler.messages}) == 2
+
+
+def test_refused_recipient_keeps_connection_usable(smtp_server, smtp_pool):
+    _, _, handler = smtp_server
+    handler.refuse['bad@example.com'] = '550 5.1.1 No such user'
+    with smtp_pool.connection('sender@example.com', 'secret') as conn:
+        try:
+            conn.sendmail('sender@example.com', ['bad@example.com'], MESSAGE)
+        except smtplib.SMTPRecipientsRefused:
+            pass
+        assert not conn.broken
+        conn.sendmail('sender@example.com', ['good@example.com'], MESSAGE)
+    assert [m['to'] for m in handler.messages] == [['good@example.com']]
+
+
+def test_acquire_times_out_when_every_connection_is_busy(smtp_server):
+    host, port, _ = smtp_server
+    pool = SMTPConnectionPool(host=host, port=port, use_tls=False, max_connections=1, acquire_timeout=0.2)
+    try:
+        with pool.connection('sender@example.com', 'secret'):
+            with pytest.raises(PoolExhausted, match='busy'):
+                pool.sendmail('sender@example.com', 'secret', ['r@example.com'], MESSAGE)
+    finally:
+        pool.close_all()
+
+
+def test_pool_keys_do_not_hold_the_password(smtp_server, smtp_pool):
+    smtp_pool.sendmail('sender@example.com', 'secret', ['r@example.com'], MESSAGE)
+    assert all('secret' not in key for key in smtp_pool._slots)
+    assert all('secret' not in key for key in smtp_pool._idle)
+
+
+def test_async_pool_keys_do_not_hold_the_password(smtp_server):
+    import asyncio
+    from async_smtp_pool import AsyncSMTPConnectionPool
+    host, port, handler = smtp_server
+    pool = AsyncSMTPConnectionPool(host=host, port=port, use_tls=False, timeout=5)
+
+    async def run():
+        await pool.sendmail('sender@example.com', 'secret', ['r@example.com'], MESSAGE)
+        keys = list(pool._slots) + list(pool._idle)
+        await pool.close_all()
+        return keys
+
+    keys = asyncio.run(run())
+    assert keys and all('secret' not in key for key in keys)
+    assert [m['to'] for m in handler.messages] == [['r@example.com']]
+
+
+def test_drop_after_data_is_not_resent(smtp_server, smtp_pool):
+    _, _, handler = smtp_server
+    handler.drop_after_data = True
+    with pytest.raises(DeliveryUnknown):
+        smtp_pool.sendmail('sender@example.com', 'secret', ['r@example.com'], MESSAGE)
+    assert len(handler.messages) == 1
+
+
+def test_async_drop_after_data_is_not_resent(smtp_server):
+    import asyncio
+    from async_smtp_pool import AsyncSMTPConnectionPool
+    host, port, handler = smtp_server
+    handler.drop_after_data = True
+    pool = AsyncSMTPConnectionPool(host=host, port=port, use_tls=False, timeout=5)
+    with pytest.raises(DeliveryUnknown):
+        asyncio.run(pool.sendmail('sender@example.com', 'secret', ['r@example.com'], MESSAGE))
+    assert len(handler.messages) == 1
@@ -0,0 +1,55 @@
+import os
+import pytest
+
+paramiko = pytest.importorskip('paramiko')
+import ssh_keys  # noqa: E402
+from ssh_keys import load_private_key  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(ssh_keys, '_cache', {})
+
+
+def write_key(path, key, passphrase=None):
+    key.write_private_key_file(str(path), password=passphrase)
+    return str(path)
+
+
+def test_key_is_parsed_once_until_the_file_changes(tmp_path, monkeypatch):
+    path = write_key(tmp_path / 'id', paramiko.ECDSAKey.generate())
+    parsed = []
+    original = paramiko.ECDSAKey.from_private_key_file.__func__
+
+    def counting(cls, *args, **kwargs):
+        parsed.append(cls)
+        return original(cls, *args, **kwargs)
+
+    monkeypatch.setattr(paramiko.ECDSAKey, 'from_private_key_file', classmethod(counting))
+    key = load_private_key(path)
+    assert load_private_key(path) is key
+    assert len(parsed) == 1
+
+    replacement = paramiko.ECDSAKey.generate()
+    write_key(tmp_path / 'id', replacement)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_private_key(path).get_fingerprint() == replacement.get_fingerprint()
+    # The key type that worked before is tried first
+    assert len(parsed) == 2
+
+
+def test_encrypted_key_uses_the_passphrase(tmp_path, monkeypatch):
+    key = paramiko.RSAKey.generate(2048)
+    path = write_key(tmp_path / 'id_rsa', key, passphrase='open sesame')
+    with pytest.raises(paramiko.PasswordRequiredException):
+        load_private_key(path)
+    monkeypatch.setenv('SSH_KEY_PASSPHRASE', 'open sesame')
+    assert load_private_key(path).get_fingerprint() == key.get_fingerprint()
+
+
+def test_invalid_key_file_is_rejected(tmp_path):
+    path = tmp_path / 'not_a_key'
+    path.write_text('hello')
+    with pytest.raises(paramiko.SSHException, match='Unsupported or invalid private key'):
+        load_private_key(str(path))
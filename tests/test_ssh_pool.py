@@ -0,0 +1,129 @@
+import threading
+import pytest
+
+paramiko = pytest.importorskip('paramiko')
+from ssh_pool import SSHConnectionPool  # noqa: E402
+
+
+@pytest.fixture
+def ssh(ssh_server, monkeypatch):
+    """
+    (host, state) of the test SSH server, with paramiko connects sent to its port.
+    """
+    host, port, state = ssh_server
+    connect = paramiko.SSHClient.connect
+
+    def connect_to_test_port(self, hostname, **kwargs):
+        return connect(self, hostname, port=port, allow_agent=False, look_for_keys=False, **kwargs)
+
+    monkeypatch.setattr(paramiko.SSHClient, 'connect', connect_to_test_port)
+    return host, state
+
+
+def run(client, command):
+    _, stdout, stderr = client.exec_command(command)
+    return stdout.read().decode(), stderr.read().decode()
+
+
+def test_commands_reuse_one_authenticated_connection(ssh):
+    host, state = ssh
+    pool = SSHConnectionPool()
+    try:
+        for i in range(3):
+            with pool.checkout(host, 'user', password='secret') as client:
+                assert run(client, f'echo {i}') == (f'{i}\n', '')
+    finally:
+        pool.close_all()
+    assert state.connections == 1
+    assert state.commands == ['echo 0', 'echo 1', 'echo 2']
+
+
+def test_concurrent_callers_share_one_handshake(ssh):
+    host, state = ssh
+    pool = SSHConnectionPool()
+    clients = []
+
+    def get():
+        clients.append(pool.get_client(host, 'user', password='secret'))
+
+    threads = [threading.Thread(target=get) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pool.close_all()
+    assert len({id(c) for c in clients}) == 1
+    assert state.connections == 1
+
+
+def test_dead_transport_is_replaced(ssh):
+    host, state = ssh
+    pool = SSHConnectionPool()
+    try:
+        first = pool.get_client(host, 'user', password='secret')
+        first.close()
+        second = pool.get_client(host, 'user', password='secret')
+        assert second is not first
+        assert run(second, 'echo again') == ('again\n', '')
+    finally:
+        pool.close_all()
+    assert state.connections == 2
+
+
+def test_only_unheld_idle_clients_are_reaped(ssh):
+    host, state = ssh
+    pool = SSHConnectionPool(idle_timeout=0)
+    try:
+        with pool.checkout(host, 'user', password='secret') as held:
+            pool._reap_idle()
+            assert held.get_transport().is_active()
+        pool._reap_idle()
+        assert not held.get_transport()
+        assert pool._clients == {}
+    finally:
+        pool.close_all()
+
+
+def test_wrong_password_is_rejected(ssh):
+    host, _ = ssh
+    pool = SSHConnectionPool()
+    with pytest.raises(paramiko.AuthenticationException):
+        pool.get_client(host, 'user', password='wrong')
+    assert pool._clients == {}
+
+
+@pytest.fixture
+def scraper(ssh, monkeypatch):
+    import ssh_pool
+    import website_scraper
+    pool = SSHConnectionPool()
+    monkeypatch.setattr(ssh_pool, '_default_pool', pool)
+    yield website_scraper
+    pool.close_all()
+
+
+def test_remote_commands_run_once_each_over_the_pool(ssh, scraper):
+    host, state = ssh
+    assert scraper.run_command_on_linux(host, 'user', None, 'secret', 'echo hi') == ('hi\n', '')
+    assert scraper.run_multiple_commands_on_linux(host, 'user', None, 'secret', ['echo a', 'nope']) == [
+        ('echo a', 'a\n', ''), ('nope', '', 'unknown command: nope\n'),
+    ]
+    assert state.commands == ['echo hi', 'echo a', 'nope']
+    assert state.connections == 1
+
+
+def test_dropped_pooled_connection_is_reopened_before_the_command(ssh, scraper):
+    host, state = ssh
+    scraper.run_command_on_linux(host, 'user', None, 'secret', 'echo one')
+    for client, _, _ in scraper.get_ssh_pool()._clients.values():
+        client.get_transport().close()
+    assert scraper.run_command_on_linux(host, 'user', None, 'secret', 'echo two') == ('two\n', '')
+    assert state.commands == ['echo one', 'echo two']
+    assert state.connections == 2
+
+
+def test_missing_credentials_are_reported_without_connecting(ssh, scraper):
+    host, state = ssh
+    assert scraper.run_command_on_linux(host, 'user', None, None, 'echo hi') == (
+        '', 'Error: Either password or key file must be provided')
+    assert state.connections == 0
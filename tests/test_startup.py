@@ -0,0 +1,10 @@
+import pytest
+from conftest import ROOT
+from startup_benchmark import measure
+
+
+@pytest.mark.parametrize('module', ['app', 'app_simple'])
+def test_create_app_loads_no_provider_sdk(module):
+    # Importing the module runs create_app() in a fresh interpreter
+    result = measure(module, ROOT, timeout=60)
+    assert result['heavy'] == []
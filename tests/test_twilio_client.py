@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+
+pytest.importorskip('twilio')
+import twilio_client  # noqa: E402
+from twilio_client import get_async_twilio_client, get_twilio_client, close_async_twilio_clients  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    monkeypatch.setattr(twilio_client, '_clients', {})
+    monkeypatch.setattr(twilio_client, '_async_clients', {})
+
+
+def test_clients_are_shared_per_credentials():
+    client = get_twilio_client('AC1', 'token')
+    assert get_twilio_client('AC1', 'token') is client
+    assert get_twilio_client('AC1', 'other') is not client
+    assert get_twilio_client('AC2', 'token') is not client
+
+
+def test_http_session_pool_is_sized_from_the_environment(monkeypatch):
+    monkeypatch.setenv('TWILIO_POOL_SIZE', '3')
+    monkeypatch.setenv('TWILIO_TIMEOUT', '7')
+    http_client = get_twilio_client('AC1', 'token').http_client
+    adapter = http_client.session.get_adapter('https://api.twilio.com/')
+    assert adapter._pool_maxsize == 3
+    assert http_client.timeout == 7.0
+
+
+def test_async_clients_are_shared_and_closed():
+    pytest.importorskip('aiohttp')
+
+    async def run():
+        client = get_async_twilio_client('AC1', 'token')
+        assert get_async_twilio_client('AC1', 'token') is client
+        await close_async_twilio_clients()
+        return client
+
+    async def reopen(closed):
+        client = get_async_twilio_client('AC1', 'token')
+        await close_async_twilio_clients()
+        return client is not closed
+
+    closed = asyncio.run(run())
+    assert twilio_client._async_clients == {}
+    assert asyncio.run(reopen(closed))
@@ -0,0 +1,44 @@
+import io
+import os
+import pytest
+from werkzeug.test import EnvironBuilder
+from uploads import save_upload
+
+
+def multipart_environ(data):
+    return EnvironBuilder(method='POST', data=data).get_environ()
+
+
+def test_upload_is_stored_once_under_its_hash(tmp_path):
+    first = save_upload(multipart_environ({'image': (io.BytesIO(b'pixels'), 'photo.JPG'), 'caption': 'hi'}),
+                        upload_dir=str(tmp_path))
+    second = save_upload(multipart_environ({'image': (io.BytesIO(b'pixels'), 'copy.jpg')}),
+                         upload_dir=str(tmp_path))
+
+    form, path, digest = first
+    assert form == {'caption': 'hi'}
+    assert path == str(tmp_path / f'{digest}.jpg') and second[1] == path
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_missing_file_field_leaves_no_temp_files(tmp_path):
+    with pytest.raises(ValueError, match="Missing file field 'image'"):
+        save_upload(multipart_environ({'other': (io.BytesIO(b'x'), 'a.png')}), upload_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_oversize_upload_is_rejected_with_413(tmp_path, monkeypatch):
+    import channels.instagram
+    # The instagram SDK isn't needed to reach the upload
+    monkeypatch.setattr(channels.instagram.channel, 'service', None)
+    monkeypatch.setenv('UPLOAD_DIR', str(tmp_path))
+    monkeypatch.setenv('UPLOAD_MAX_BYTES', '1024')
+    from app_factory import create_app
+    client = create_app(['instagram']).test_client()
+
+    response = client.post('/api/upload_instagram', data={
+        'image': (io.BytesIO(b'x' * 4096), 'big.jpg'), 'username': 'u', 'password': 'p',
+    })
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,33 @@
+import pytest
+import credentials
+from credentials import Credentials
+
+
+@pytest.fixture
+def client():
+    from app_factory import create_app
+    return create_app(['whatsapp']).test_client()
+
+
+def test_instant_send_without_twilio_credentials_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(credentials, '_current', Credentials({}))
+    response = client.post('/api/send_whatsapp_instant', json={'to_number': '+15550100', 'message': 'hi'})
+    assert response.status_code == 400
+    assert 'Twilio credentials' in response.get_json()['error']
+
+
+def test_instant_send_with_unknown_transport_is_rejected(client):
+    response = client.post('/api/send_whatsapp_instant',
+                           json={'to_number': '+15550100', 'message': 'hi', 'transport': 'pigeon'})
+    assert response.status_code == 400
+    assert 'Unknown WhatsApp transport' in response.get_json()['error']
+
+
+def test_instant_send_with_credentials_is_queued(client, monkeypatch):
+    monkeypatch.setattr(credentials, '_current', Credentials({
+        'TWILIO_ACCOUNT_SID': 'AC123', 'TWILIO_AUTH_TOKEN': 'token', 'TWILIO_PHONE_NUMBER': '+15550199',
+    }))
+    response = client.post('/api/send_whatsapp_instant',
+                           json={'to_number': '+15550100', 'message': 'hi', 'send_at': '2099-01-01T00:00:00Z'})
+    assert response.status_code == 200
+    assert response.get_json()['status_url'].startswith('/api/scheduled/')
@@ -0,0 +1,66 @@
+import os
+import threading
+from requests.adapters import HTTPAdapter
+from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _build_http_client():
+    """
+    Build a TwilioHttpClient whose requests.Session keeps a pool of
+    keep-alive connections sized by TWILIO_POOL_SIZE.
+    """
+    pool_size = int(os.getenv('TWILIO_POOL_SIZE', 10))
+    timeout = float(os.getenv('TWILIO_TIMEOUT', 15))
+    http_client = TwilioHttpClient(pool_connections=True, timeout=timeout)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    http_client.session.mount('https://', adapter)
+    return http_client
+
+
+def get_twilio_client(account_sid, auth_token):
+    """
+    Return the process-wide Twilio Client for these credentials, creating it
+    on first use. All callers with the same credentials share one HTTP session.
+    Args:
+        account_sid (str): Twilio Account SID
+        auth_token (str): Twilio Auth Token
+    Returns:
+        twilio.rest.Client
+    """
+    key = (account_sid, auth_token)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = Client(account_sid, auth_token, http_client=_build_http_client())
+            _clients[key] = client
+        return client
+
+
+_async_clients = {}
+
+
+def get_async_twilio_client(account_sid, auth_token):
+    """
+    Return a Twilio Client backed by the aiohttp-based AsyncTwilioHttpClient,
+    for the `*_async` API methods. Like get_twilio_client, one client (and
+    one pooled HTTP session) is shared per set of credentials. Must be used
+    from the event loop that serves the ASGI app.
+    """
+    from twilio.http.async_http_client import AsyncTwilioHttpClient
+    key = (account_sid, auth_token)
+    client = _async_clients.get(key)
+    if client is None:
+        timeout = float(os.getenv('TWILIO_TIMEOUT', 15))
+        client = Client(account_sid, auth_token, http_client=AsyncTwilioHttpClient(pool_connections=True, timeout=timeout))
+        _async_clients[key] = client
+    return client
+
+
+async def close_async_twilio_clients():
+    for client in _async_clients.values():
+        await client.http_client.close()
+    _async_clients.clear()
@@ -0,0 +1,77 @@
+import os
+import hashlib
+import tempfile
+from werkzeug.formparser import parse_form_data
+
+
+class HashingFile:
+    """
+    Temp file that hashes everything written to it, so an upload is hashed
+    in the same pass that streams it to disk.
+    """
+
+    def __init__(self, upload_dir):
+        os.makedirs(upload_dir, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=upload_dir, suffix='.part', delete=False)
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def save_upload(environ, field='image', upload_dir=None, max_bytes=None):
+    """
+    Parse a multipart request, streaming the `field` file straight to disk
+    (werkzeug's parser reads the body in fixed-size chunks, so memory use
+    doesn't grow with the file). The file is stored under its SHA-256, so
+    uploading the same image twice keeps a single copy.
+    Args:
+        environ (dict): WSGI environ of the request (its body must not have been read yet)
+        field (str): Name of the file field
+        upload_dir (str): Destination directory (UPLOAD_DIR)
+        max_bytes (int): Largest accepted request body (UPLOAD_MAX_BYTES)
+    Returns:
+        tuple: (form fields dict, stored file path, sha256 hex digest)
+    """
+    upload_dir = upload_dir or os.getenv('UPLOAD_DIR', 'uploads')
+    max_bytes = max_bytes or int(os.getenv('UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+    created = []
+
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        f = HashingFile(upload_dir)
+        created.append(f)
+        return f
+
+    try:
+        _, form, files = parse_form_data(
+            environ, stream_factory=stream_factory, max_content_length=max_bytes, silent=False
+        )
+        upload = files.get(field)
+        if upload is None or not upload.filename:
+            raise ValueError(f"Missing file field '{field}'")
+        stored = upload.stream
+        stored.close()
+        digest = stored.sha256.hexdigest()
+        ext = os.path.splitext(upload.filename)[1].lower()[:10]
+        path = os.path.join(upload_dir, digest + ext)
+        if os.path.exists(path):
+            # Already have this exact file
+            os.remove(stored.name)
+        else:
+            os.replace(stored.name, path)
+        created.remove(stored)
+        return form.to_dict(), path, digest
+    finally:
+        # Other file fields, or everything if parsing failed
+        for f in created:
+            f.close()
+            try:
+                os.remove(f.name)
+            except FileNotFoundError:
+                pass
@@ -1,6 +1,14 @@
 import paramiko
 import logging
 import os
+import time
+import codecs
+import select
+from concurrent.futures import ThreadPoolExecutor
+from batching import clamp_workers
+from ssh_pool import get_ssh_pool
+from ssh_keys import load_private_key
+from resilience import call_with_retry, get_breaker
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,40 +33,80 @@ def ssh_run_command(host, username, password, command, port=22):
         logger.error(f"SSH error while connecting to {host}: {e}")
         return None
 
-def run_command_on_linux(ip, username, key_path, password, command):
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+def _pooled_client(ip, username, key_path, password, hold=False):
+    """
+    Return (client, auth, error) for a pooled SSH connection. `auth` is the
+    (password, pkey) pair the pool keys on; `error` is set when the inputs
+    are unusable. With `hold`, the client stays checked out (safe from the
+    idle reaper) until get_ssh_pool().release(client).
+    """
+    # Clean up inputs
+    key_path = key_path.strip() if key_path else ""
+    password = password.strip() if password else ""
+    
+    if password:
+        # Use password authentication
+        auth = (password, None)
+    elif key_path:
+        # Use key file authentication
+        if not os.path.exists(key_path):
+            return None, None, f"Error: Key file not found at {key_path}"
+        try:
+            auth = (None, load_private_key(key_path))
+        except Exception as e:
+            return None, None, f"Error: Invalid key file format: {str(e)}"
+    else:
+        return None, None, "Error: Either password or key file must be provided"
 
-    try:
-        # Clean up inputs
-        key_path = key_path.strip() if key_path else ""
-        password = password.strip() if password else ""
-        
-        if password:
-            # Use password authentication
-            ssh.connect(hostname=ip, username=username, password=password, timeout=10)
-        elif key_path:
-            # Use key file authentication
-            if not os.path.exists(key_path):
-                return "", f"Error: Key file not found at {key_path}"
+    pool = get_ssh_pool()
+    client = pool.acquire(ip, username, *auth) if hold else pool.get_client(ip, username, *auth)
+    return client, auth, None
+
+def _exec_pooled(ip, username, key_path, password, command):
+    """
+    Run one command on a pooled connection. Only opening the session channel
+    is retried (once, on a fresh connection, if the pooled transport turned
+    out to be dead); once the command has been sent it is never re-run, as it
+    may already have taken effect.
+    """
+    for attempt in range(2):
+        client, auth, error = _pooled_client(ip, username, key_path, password, hold=True)
+        if error:
+            return "", error
+        try:
             try:
-                key = paramiko.RSAKey.from_private_key_file(key_path)
-            except paramiko.SSHException:
-                try:
-                    key = paramiko.Ed25519Key.from_private_key_file(key_path)
-                except Exception as e:
-                    return "", f"Error: Invalid key file format: {str(e)}"
-            ssh.connect(hostname=ip, username=username, pkey=key, timeout=10)
-        else:
-            return "", "Error: Either password or key file must be provided"
-
-        stdin, stdout, stderr = ssh.exec_command(command)
-        out = stdout.read().decode()
-        err = stderr.read().decode()
-        ssh.close()
-
-        return out, err
+                channel = client.get_transport().open_session()
+            except (paramiko.SSHException, EOFError, OSError, AttributeError):
+                # AttributeError: get_transport() is None once the client closed
+                get_ssh_pool().discard(ip, username, *auth)
+                if attempt:
+                    raise
+                continue
+            try:
+                channel.exec_command(command)
+                stdout, stderr = channel.makefile('r'), channel.makefile_stderr('r')
+                return stdout.read().decode(), stderr.read().decode()
+            except (paramiko.SSHException, EOFError, OSError):
+                get_ssh_pool().discard(ip, username, *auth)
+                raise
+        finally:
+            get_ssh_pool().release(client)
+
+def _exec_with_retry(ip, username, key_path, password, command):
+    """
+    Connect (retried on connect timeouts and unreachable hosts, behind a
+    per-host circuit breaker), then run `command` once with _exec_pooled.
+    """
+    _, _, error = call_with_retry(
+        lambda: _pooled_client(ip, username, key_path, password), breaker=get_breaker(('ssh', ip))
+    )
+    if error:
+        return "", error
+    return _exec_pooled(ip, username, key_path, password, command)
 
+def run_command_on_linux(ip, username, key_path, password, command):
+    try:
+        return _exec_with_retry(ip, username, key_path, password, command)
     except Exception as e:
         return "", f"Error: {str(e)}"
 
@@ -72,42 +120,132 @@ def run_multiple_commands_on_linux(ip, username, key_path, password, commands):
     if len(commands) > 50:
         return [(None, '', 'Error: Too many commands (max 50 allowed)')]
 
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     results = []
 
     try:
-        # Clean up inputs
-        key_path = key_path.strip() if key_path else ""
-        password = password.strip() if password else ""
-        
-        if password:
-            # Use password authentication
-            ssh.connect(hostname=ip, username=username, password=password, timeout=10)
-        elif key_path:
-            # Use key file authentication
-            if not os.path.exists(key_path):
-                return [(None, '', f"Error: Key file not found at {key_path}")]
-            try:
-                key = paramiko.RSAKey.from_private_key_file(key_path)
-            except paramiko.SSHException:
-                try:
-                    key = paramiko.Ed25519Key.from_private_key_file(key_path)
-                except Exception as e:
-                    return [(None, '', f"Error: Invalid key file format: {str(e)}")]
-            ssh.connect(hostname=ip, username=username, pkey=key, timeout=10)
-        else:
-            return [(None, '', "Error: Either password or key file must be provided")]
+        # Connect (or reuse the pooled connection) up front so bad
+        # credentials are reported once rather than per command
+        _, _, error = call_with_retry(
+            lambda: _pooled_client(ip, username, key_path, password), breaker=get_breaker(('ssh', ip))
+        )
+        if error:
+            return [(None, '', error)]
 
         for cmd in commands:
             try:
-                stdin, stdout, stderr = ssh.exec_command(cmd)
-                out = stdout.read().decode()
-                err = stderr.read().decode()
+                out, err = _exec_with_retry(ip, username, key_path, password, cmd)
                 results.append((cmd, out, err))
             except Exception as e:
                 results.append((cmd, '', f'Error: {str(e)}'))
-        ssh.close()
         return results
     except Exception as e:
-        return [(None, '', f'Error: {str(e)}')] 
\ No newline at end of file
+        return [(None, '', f'Error: {str(e)}')]
+
+def run_commands_on_hosts(hosts, commands, max_workers=None):
+    """
+    Runs the same command list on many hosts concurrently.
+    Args:
+        hosts (list): Dicts with 'ip', 'username' and 'password' or 'key_path'
+        commands (list): Commands to run on every host (max 50)
+        max_workers (int): Hosts processed in parallel, capped at SSH_FANOUT_WORKERS (the default)
+    Returns:
+        list: One dict per host, in input order, with 'ip', 'elapsed' seconds and
+        'results' as (command, output, error, elapsed) tuples, or 'error'
+    Raises:
+        ValueError: If max_workers is not a positive integer
+    """
+    if not isinstance(hosts, list):
+        return [{'ip': None, 'error': 'Error: hosts must be a list'}]
+    if not isinstance(commands, list):
+        return [{'ip': None, 'error': 'Error: commands must be a list'}]
+    if len(commands) > 50:
+        return [{'ip': None, 'error': 'Error: Too many commands (max 50 allowed)'}]
+
+    def run_host(host):
+        # A malformed entry only fails its own host
+        if not isinstance(host, dict):
+            return {'ip': None, 'elapsed': 0.0, 'results': [], 'error': 'Error: each host must be an object with an ip'}
+        ip = host.get('ip')
+        if not ip or not isinstance(ip, str):
+            return {'ip': ip, 'elapsed': 0.0, 'results': [], 'error': 'Error: host ip is required'}
+        started = time.monotonic()
+        results = []
+        try:
+            # Connect up front so a bad host fails once rather than per command
+            _, _, error = call_with_retry(
+                lambda: _pooled_client(ip, host.get('username'), host.get('key_path'), host.get('password')),
+                breaker=get_breaker(('ssh', ip))
+            )
+            if error:
+                return {'ip': ip, 'elapsed': round(time.monotonic() - started, 3), 'results': results, 'error': error}
+            for cmd in commands:
+                cmd_started = time.monotonic()
+                out, err = _exec_with_retry(ip, host.get('username'), host.get('key_path'), host.get('password'), cmd)
+                results.append((cmd, out, err, round(time.monotonic() - cmd_started, 3)))
+            return {'ip': ip, 'elapsed': round(time.monotonic() - started, 3), 'results': results}
+        except Exception as e:
+            return {'ip': ip, 'elapsed': round(time.monotonic() - started, 3), 'results': results, 'error': f'Error: {str(e)}'}
+
+    max_workers = clamp_workers(max_workers, int(os.getenv('SSH_FANOUT_WORKERS', 16)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(run_host, hosts))
+
+def stream_command_on_linux(ip, username, key_path, password, command, chunk_size=32768, poll_interval=1.0):
+    """
+    Runs a command over a pooled SSH connection and yields its output as it
+    arrives instead of buffering it. stdout and stderr are drained from the
+    same loop, so neither side can fill its window and stall the other.
+    Yields:
+        tuple: ('stdout' | 'stderr', text) chunks, then ('exit', exit_status);
+        ('error', message) if the command could not be started
+    """
+    # The client stays checked out until the stream ends, so the pool's idle
+    # reaper can't close it under a long-running command
+    client = None
+    try:
+        client, auth, error = _pooled_client(ip, username, key_path, password, hold=True)
+        if error:
+            yield 'error', error
+            return
+        try:
+            channel = client.get_transport().open_session()
+        except (paramiko.SSHException, EOFError, OSError):
+            # Stale pooled transport: reconnect once
+            get_ssh_pool().discard(ip, username, *auth)
+            get_ssh_pool().release(client)
+            client = None
+            client, auth, error = _pooled_client(ip, username, key_path, password, hold=True)
+            channel = client.get_transport().open_session()
+        channel.exec_command(command)
+    except Exception as e:
+        if client is not None:
+            get_ssh_pool().release(client)
+        yield 'error', f"Error: {str(e)}"
+        return
+
+    decoders = {
+        'stdout': codecs.getincrementaldecoder('utf-8')(errors='replace'),
+        'stderr': codecs.getincrementaldecoder('utf-8')(errors='replace'),
+    }
+    try:
+        while True:
+            read_any = False
+            if channel.recv_ready():
+                yield 'stdout', decoders['stdout'].decode(channel.recv(chunk_size))
+                read_any = True
+            if channel.recv_stderr_ready():
+                yield 'stderr', decoders['stderr'].decode(channel.recv_stderr(chunk_size))
+                read_any = True
+            if read_any:
+                continue
+            if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+            select.select([channel], [], [], poll_interval)
+        for stream, decoder in decoders.items():
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield stream, tail
+        yield 'exit', channel.recv_exit_status()
+    finally:
+        channel.close()
+        get_ssh_pool().release(client)
@@ -0,0 +1,81 @@
+import os
+import threading
+from scheduler import get_scheduler
+
+
+class WhatsAppTransport:
+    """
+    Base class for WhatsApp delivery backends.
+    """
+    name = None
+    # Credential group (see credentials.GROUPS) the backend needs, if any
+    credentials = None
+
+    def send(self, to_number, message):
+        """
+        Deliver one message now. Returns a status string.
+        """
+        raise NotImplementedError
+
+
+class TwilioWhatsAppTransport(WhatsAppTransport):
+    """
+    Delivers through the Twilio WhatsApp API: a single HTTP request, no browser.
+    """
+    name = 'twilio'
+    credentials = 'twilio'
+
+    def send(self, to_number, message):
+        # Imported on use so scheduling doesn't load the Twilio SDK
+        from whatsapp_utils import send_whatsapp_message_twilio
+        return send_whatsapp_message_twilio(to_number, message)
+
+
+class PyWhatKitTransport(WhatsAppTransport):
+    """
+    Delivers through WhatsApp Web via pywhatkit. This drives a desktop
+    browser, so sends are serialized and should only ever run on a
+    background worker, never in a request thread.
+    """
+    name = 'pywhatkit'
+    _browser_lock = threading.Lock()
+
+    def send(self, to_number, message):
+        from whatsapp_utils import send_whatsapp_instant
+        with self._browser_lock:
+            return send_whatsapp_instant(to_number, message)
+
+
+_transports = {}
+
+
+def register_transport(transport):
+    _transports[transport.name] = transport
+
+
+register_transport(TwilioWhatsAppTransport())
+register_transport(PyWhatKitTransport())
+
+
+def get_transport(name=None):
+    """
+    Return the transport called `name` (default: WHATSAPP_TRANSPORT, else 'twilio').
+    """
+    name = name or os.getenv('WHATSAPP_TRANSPORT', 'twilio')
+    if name not in _transports:
+        raise ValueError(f"Unknown WhatsApp transport: {name}. Available: {', '.join(_transports)}")
+    return _transports[name]
+
+
+def schedule_whatsapp(to_number, message, send_at=None, transport=None):
+    """
+    Schedule a WhatsApp message for delivery at `send_at` (Unix timestamp,
+    or now when omitted) and return its id immediately. The scheduler's
+    worker pool performs the send when it is due.
+    """
+    transport = get_transport(transport).name
+    return get_scheduler().schedule(
+        'whatsapp',
+        {'to_number': to_number, 'message': message, 'transport': transport},
+        send_at
+    )
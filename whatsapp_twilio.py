@@ -4,21 +4,21 @@ Send WhatsApp message using Twilio API.
 
 import os
 from dotenv import load_dotenv
-from twilio.rest import Client
+from twilio_client import get_twilio_client
 
 load_dotenv()
 
 def send_whatsapp_twilio(to_number: str, message: str) -> str:
     try:
         account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-from_whatsapp_number = "whatsapp:" + os.getenv("TWILIO_PHONE_NUMBER")
+        auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        from_whatsapp_number = "whatsapp:" + os.getenv("TWILIO_PHONE_NUMBER")
         to_whatsapp_number = "whatsapp:" + to_number
 
         if not all([account_sid, auth_token, from_whatsapp_number]):
             return "Twilio credentials not set properly."
 
-        client = Client(account_sid, auth_token)
+        client = get_twilio_client(account_sid, auth_token)
         message = client.messages.create(
             body=message,
             from_=from_whatsapp_number,
@@ -1,44 +1,46 @@
-import pywhatkit as kit
 import datetime
 import os
 import logging
 from dotenv import load_dotenv
-from twilio.rest import Client
+from twilio_client import get_twilio_client
+from credentials import get_credentials
+from rate_limiter import throttle
+from resilience import SendResult, before_send, call_with_retry, get_breaker
+from delivery_log import log_delivery
 
 load_dotenv(dotenv_path=os.path.join('config', '.env'))
 
+logger = logging.getLogger(__name__)
+
 def send_whatsapp_instant(to_number: str, message: str) -> str:
     """
     Send a WhatsApp message instantly using pywhatkit. Returns status string.
     """
     try:
-        print(f"Attempting to send INSTANT WhatsApp message to {to_number}")
-        print(f"Message: {message}")
+        # pywhatkit pulls in a GUI/browser stack, so it is only loaded when used
+        import pywhatkit as kit
+        logger.debug(f"Attempting to send INSTANT WhatsApp message to {to_number}")
         
         # Try multiple approaches for better reliability
         try:
             # First try: instant sending with proper timing
             kit.sendwhatmsg_instantly(to_number, message, wait_time=20, tab_close=True, close_time=5)
-            status = "Message sent INSTANTLY using pywhatkit!"
-            print("Message sent instantly!")
+            status = SendResult.success("Message sent INSTANTLY using pywhatkit!")
+            logger.debug("Message sent instantly!")
         except Exception as instant_error:
-            print(f"Instant method failed: {instant_error}")
+            logger.debug(f"Instant method failed: {instant_error}")
             
             # Fallback: schedule for 1 minute later
-            now = datetime.datetime.now()
-            minute = now.minute + 1
-            hour = now.hour
-            if minute >= 60:
-                minute = 0
-                hour = (hour + 1) % 24
-                
-            kit.sendwhatmsg(to_number, message, hour, minute, wait_time=20, tab_close=True, close_time=5)
-            status = "Message scheduled and sent using pywhatkit!"
-            print("Message sent via fallback method!")
+            send_time = datetime.datetime.now() + datetime.timedelta(minutes=1)
+            kit.sendwhatmsg(to_number, message, send_time.hour, send_time.minute, wait_time=20, tab_close=True, close_time=5)
+            status = SendResult.success("Message scheduled and sent using pywhatkit!")
+            logger.debug("Message sent via fallback method!")
+        log_delivery('whatsapp', to_number, 'sent', provider='pywhatkit')
             
     except Exception as e:
-        status = f"Error sending instant message: {str(e)}"
-        print(f"Error occurred: {e}")
+        status = SendResult.failure(f"Error sending instant message: {str(e)}", e)
+        logger.error(f"WhatsApp error: {e}")
+        log_delivery('whatsapp', to_number, 'failed', provider='pywhatkit', error=str(e))
     return status
 
 def send_whatsapp_message(to_number: str, message: str) -> str:
@@ -46,26 +48,23 @@ def send_whatsapp_message(to_number: str, message: str) -> str:
     Send a WhatsApp message using pywhatkit. Returns status string.
     """
     try:
-        print(f"Attempting to send WhatsApp message to {to_number}")
-        print(f"Message: {message}")
+        import pywhatkit as kit
+        logger.debug(f"Attempting to send WhatsApp message to {to_number}")
         
-        now = datetime.datetime.now()
-        # Schedule for current minute + 1 to ensure it's in the future
-        minute = now.minute + 1
-        hour = now.hour
-        if minute >= 60:
-            minute = 0
-            hour = (hour + 1) % 24
-            
-        print(f"Scheduling message for {hour}:{minute:02d}")
+        # pywhatkit only accepts whole minutes, so aim for the next one.
+        # Use scheduler / whatsapp_transport.schedule_whatsapp for real
+        # scheduling without blocking the caller.
+        send_time = datetime.datetime.now() + datetime.timedelta(minutes=1)
+        logger.debug(f"Scheduling message for {send_time.hour}:{send_time.minute:02d}")
         
         # Use proper wait time for reliable delivery
-        kit.sendwhatmsg(to_number, message, hour, minute, wait_time=15, tab_close=True, close_time=3)
-        status = "Message sent using pywhatkit!"
-        print("Message sent successfully!")
+        kit.sendwhatmsg(to_number, message, send_time.hour, send_time.minute, wait_time=15, tab_close=True, close_time=3)
+        status = SendResult.success("Message sent using pywhatkit!")
+        log_delivery('whatsapp', to_number, 'sent', provider='pywhatkit')
     except Exception as e:
-        status = f"Error sending message: {str(e)}"
-        print(f"Error occurred: {e}")
+        status = SendResult.failure(f"Error sending message: {str(e)}", e)
+        logger.error(f"WhatsApp error: {e}")
+        log_delivery('whatsapp', to_number, 'failed', provider='pywhatkit', error=str(e))
     return status
 
 def send_whatsapp_message_twilio(to_number: str, message: str) -> str:
@@ -73,33 +72,30 @@ def send_whatsapp_message_twilio(to_number: str, message: str) -> str:
     Send a WhatsApp message using Twilio API. Returns status string.
     """
     try:
-        print(f"Attempting to send Twilio WhatsApp message to {to_number}")
-        print(f"Message: {message}")
+        logger.debug(f"Attempting to send Twilio WhatsApp message to {to_number}")
         
-        account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-        auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-        twilio_number = os.getenv("TWILIO_PHONE_NUMBER")
+        account_sid, auth_token, twilio_number = get_credentials().twilio
         if not all([account_sid, auth_token, twilio_number]):
-            return 'Twilio credentials not set properly in environment variables.'
+            return SendResult.failure('Twilio credentials not set properly in environment variables.')
+        throttle('whatsapp', twilio_number, to_number)
         from_whatsapp_number = 'whatsapp:' + twilio_number
         to_whatsapp_number = 'whatsapp:' + to_number
-        client = Client(account_sid, auth_token)
-        message_obj = client.messages.create(
+        client = get_twilio_client(account_sid, auth_token)
+        message_obj = call_with_retry(lambda: client.messages.create(
             body=message,
             from_=from_whatsapp_number,
             to=to_whatsapp_number
-        )
-        status = f'WhatsApp message sent via Twilio. SID: {message_obj.sid}'
-        print(f"Twilio message sent successfully! SID: {message_obj.sid}")
+        ), breaker=get_breaker(('twilio', account_sid)), retry_if=before_send)
+        status = SendResult.success(f'WhatsApp message sent via Twilio. SID: {message_obj.sid}', sid=message_obj.sid)
+        log_delivery('whatsapp', to_number, 'sent', provider='twilio', sid=message_obj.sid)
     except Exception as e:
-        status = f'Error sending WhatsApp message via Twilio: {str(e)}'
-        print(f"Twilio error: {e}")
+        status = SendResult.failure(f'Error sending WhatsApp message via Twilio: {str(e)}', e)
+        logger.error(f"Twilio WhatsApp error: {e}")
+        log_delivery('whatsapp', to_number, 'failed', provider='twilio', error=str(e))
     return status
 
 def save_whatsapp_log(to_number: str, message: str, status: str):
     """
-    Save WhatsApp message log to whatsapp_log.txt
+    Record a WhatsApp message in the delivery log (see delivery_log.py).
     """
-    with open("whatsapp_log.txt", "a", encoding="utf-8") as f:
-        log_entry = f"{datetime.datetime.now()} | To: {to_number} | Message: {message} | Status: {status}\n"
-        f.write(log_entry) 
\ No newline at end of file
+    log_delivery('whatsapp', to_number, 'failed' if status.startswith('Error') else 'sent', message=message, detail=status)